@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""Deterministic datasets for benchmarks.
+
+Each dataset *shape* describes the kind of data being read (narrow or
+wide rows, short or long fields, quoted newlines, non-ASCII text). Rows
+are generated from a fixed seed so the same shape and row count always
+produce the same data.
+"""
+from __future__ import absolute_import
+import csv
+import datetime
+import io
+import random
+import struct
+import sys
+
+PY2 = sys.version_info[0] == 2
+
+if PY2:
+    text_type = unicode
+else:
+    text_type = str
+
+
+SHAPES = ('narrow', 'wide', 'long_fields', 'quoted_newlines', 'unicode')
+
+_WORDS = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot',
+          'golf', 'hotel', 'india', 'juliett', 'kilo', 'lima']
+
+_UNICODE_WORDS = [u'æble', u'αλφα', u'naïve',
+                  u'škoda', u'über', u'日本',
+                  u'слово', u'café']
+
+
+def _header(width):
+    return ['COL{0}'.format(i) for i in range(width)]
+
+
+def iter_rows(shape, nrows, seed=0):
+    """Return a generator that yields the header followed by *nrows*
+    rows of text values for the given dataset *shape*.
+    """
+    rnd = random.Random(seed)
+    choice = rnd.choice
+    randint = rnd.randint
+
+    if shape == 'narrow':
+        header = _header(3)
+        make_row = lambda: [text_type(randint(0, 100000)),
+                            choice(_WORDS),
+                            text_type(randint(0, 999) / 10.0)]
+    elif shape == 'wide':
+        header = _header(50)
+        make_row = lambda: [text_type(randint(0, 1000)) for _ in range(50)]
+    elif shape == 'long_fields':
+        header = _header(5)
+        make_row = lambda: [u' '.join(choice(_WORDS) for _ in range(30))
+                            for _ in range(5)]
+    elif shape == 'quoted_newlines':
+        header = _header(4)
+        make_row = lambda: [text_type(randint(0, 100000)),
+                            u'{0}, "{1}"'.format(choice(_WORDS), choice(_WORDS)),
+                            u'{0}\r\n{1}'.format(choice(_WORDS), choice(_WORDS)),
+                            choice(_WORDS)]
+    elif shape == 'unicode':
+        header = _header(4)
+        make_row = lambda: [choice(_UNICODE_WORDS) for _ in range(4)]
+    else:
+        raise ValueError('unknown shape {0!r}'.format(shape))
+
+    yield header
+    for _ in range(nrows):
+        yield make_row()
+
+
+def make_rows(shape, nrows, seed=0):
+    """Return a list of rows (the header followed by *nrows* rows of
+    text values) for the given dataset *shape*.
+    """
+    return list(iter_rows(shape, nrows, seed))
+
+
+class Dataset(object):
+    """A re-iterable dataset that generates its rows on demand (for
+    datasets too large to keep in memory).
+    """
+    def __init__(self, shape, nrows, seed=0):
+        self.shape = shape
+        self.nrows = nrows
+        self.seed = seed
+
+    def __iter__(self):
+        return iter_rows(self.shape, self.nrows, self.seed)
+
+
+def write_csv(path, rows):
+    """Write *rows* to a UTF-8 encoded CSV file at *path*."""
+    if PY2:
+        with open(path, 'wb') as fh:
+            writer = csv.writer(fh)
+            for row in rows:
+                writer.writerow([value.encode('utf-8') for value in row])
+    else:
+        with io.open(path, 'w', encoding='utf-8', newline='') as fh:
+            writer = csv.writer(fh)
+            writer.writerows(rows)
+
+
+def write_sqlite(connection, table, rows):
+    """Create *table* in a sqlite3 *connection* and insert *rows*."""
+    rows = iter(rows)
+    header = next(rows)
+    columns = ', '.join('{0} TEXT'.format(name) for name in header)
+    placeholders = ', '.join('?' for _ in header)
+    connection.execute('CREATE TABLE {0} ({1})'.format(table, columns))
+    connection.executemany(
+        'INSERT INTO {0} VALUES ({1})'.format(table, placeholders),
+        rows,
+    )
+    connection.commit()
+
+
+def _encode_dbf_values(row, encoding):
+    values = []
+    for value in row:
+        encoded = value.encode(encoding)
+        while len(encoded) > 254:
+            value = value[:-1]
+            encoded = value.encode(encoding)
+        values.append(encoded)
+    return values
+
+
+def write_dbf(path, rows, encoding='utf-8'):
+    """Write *rows* to a dBase III file at *path* using character
+    fields (values longer than 254 bytes are truncated). The *rows*
+    are iterated over twice: once to find the field lengths and once
+    to write the records.
+    """
+    iterator = iter(rows)
+    header = next(iterator)
+    lengths = [1] * len(header)
+    count = 0
+    for row in iterator:
+        values = _encode_dbf_values(row, encoding)
+        lengths = [max(a, len(b)) for a, b in zip(lengths, values)]
+        count += 1
+
+    today = datetime.date.today()
+    header_length = 32 + 32 * len(header) + 1
+    record_length = 1 + sum(lengths)
+    with open(path, 'wb') as fh:
+        fh.write(struct.pack('<BBBBIHH20x', 0x03, today.year - 1900,
+                             today.month, today.day, count,
+                             header_length, record_length))
+        for name, length in zip(header, lengths):
+            name = name.upper().encode('ascii')[:10]
+            fh.write(struct.pack('<11sc4xBB14x', name, b'C', length, 0))
+        fh.write(b'\r')
+
+        iterator = iter(rows)
+        next(iterator)  # Skip header.
+        for row in iterator:
+            fh.write(b' ')
+            values = _encode_dbf_values(row, encoding)
+            for value, length in zip(values, lengths):
+                fh.write(value.ljust(length, b' '))
+        fh.write(b'\x1a')
+
+
+def write_excel(path, rows):
+    """Write *rows* to an XLSX file at *path* (requires openpyxl)."""
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def make_dataframe(rows):
+    """Return a pandas DataFrame of *rows* (requires pandas)."""
+    import pandas
+    iterator = iter(rows)
+    header = next(iterator)
+    return pandas.DataFrame(list(iterator), columns=header)
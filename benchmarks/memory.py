@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure peak and steady-state memory for each get_reader constructor.
+
+Each measurement runs in a fresh subprocess that reads a generated
+dataset while tracking allocations with tracemalloc and sampling the
+process's resident set size (RSS). Memory is reported relative to a
+baseline taken after the source is prepared (for example, after a
+DataFrame is built) but before the reader is created::
+
+    python benchmarks/memory.py
+    python benchmarks/memory.py --sizes 10000 100000 1000000 10000000
+    python benchmarks/memory.py --json memory.json
+
+Streaming constructors should use about the same amount of memory no
+matter how many rows are read. The report marks these as "flat" or
+"GROWS" and the script exits with status 1 if any of them grow. Some
+constructors are known to load their entire source and are reported
+as "expected" (from_pandas copies the data with to_records() and xlrd
+loads the entire workbook for from_excel).
+
+Requires Python 3.4 or newer (for tracemalloc). Constructors whose
+optional dependencies are not installed are skipped.
+"""
+from __future__ import absolute_import
+import argparse
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.append(REPO_DIR)  # Appended so PYTHONPATH can select another version.
+
+import datasets
+
+
+STREAMING = ('from_csv', 'from_dicts', 'from_sql', 'from_dbf')
+LOADS_ALL = ('from_pandas', 'from_excel')
+CONSTRUCTORS = STREAMING + LOADS_ALL
+
+# Peak memory at the largest size may exceed the peak at the smallest
+# size by this many bytes (plus GROWTH_RATIO) before a streaming
+# constructor is reported as growing.
+GROWTH_ALLOWANCE = 1024 * 1024
+GROWTH_RATIO = 2.0
+
+
+#######################################################################
+# Child process.
+#######################################################################
+
+def _current_rss():
+    """Return the current resident set size in bytes (or None if it
+    cannot be determined).
+    """
+    try:
+        with open('/proc/self/statm') as fh:
+            pages = int(fh.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError):
+        pass
+
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+class _RssSampler(threading.Thread):
+    """Samples the process's RSS in the background and keeps the
+    maximum value.
+    """
+    def __init__(self, interval=0.01):
+        super(_RssSampler, self).__init__()
+        self.daemon = True
+        self.interval = interval
+        self.peak = _current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            rss = _current_rss()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+
+def _prepare(constructor, workdir):
+    """Return a function that creates a reader for the prepared data
+    in *workdir* (the data for a constructor is loaded here so that
+    it's included in the baseline measurement).
+    """
+    from get_reader import get_reader
+
+    with open(os.path.join(workdir, 'dataset.json')) as fh:
+        spec = json.load(fh)
+    dataset = datasets.Dataset(spec['shape'], spec['rows'])
+
+    if constructor == 'from_csv':
+        path = os.path.join(workdir, 'data.csv')
+        return lambda: get_reader.from_csv(path)
+
+    if constructor == 'from_dicts':
+        def from_dicts():
+            rows = iter(dataset)
+            header = next(rows)
+            records = (dict(zip(header, row)) for row in rows)
+            return get_reader.from_dicts(records, header)
+        return from_dicts
+
+    if constructor == 'from_sql':
+        import sqlite3
+        connection = sqlite3.connect(os.path.join(workdir, 'data.sqlite'))
+        return lambda: get_reader.from_sql(connection, 'benchmark')
+
+    if constructor == 'from_pandas':
+        df = datasets.make_dataframe(dataset)
+        return lambda: get_reader.from_pandas(df, index=False)
+
+    if constructor == 'from_excel':
+        path = os.path.join(workdir, 'data.xlsx')
+        return lambda: get_reader.from_excel(path)
+
+    if constructor == 'from_dbf':
+        path = os.path.join(workdir, 'data.dbf')
+        return lambda: get_reader.from_dbf(path, encoding='utf-8')
+
+    raise ValueError('unknown constructor {0!r}'.format(constructor))
+
+
+def measure(constructor, workdir, samples=20):
+    """Read the prepared data with *constructor* and return a
+    dictionary of memory measurements (in bytes, relative to the
+    baseline).
+    """
+    import tracemalloc
+
+    make_reader = _prepare(constructor, workdir)
+    gc.collect()
+    sampler = _RssSampler()
+    rss_baseline = _current_rss()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    sampler.start()
+
+    with open(os.path.join(workdir, 'dataset.json')) as fh:
+        total = json.load(fh)['rows'] + 1
+    every = max(total // samples, 1)
+    steady = []
+
+    start = time.time()
+    reader = make_reader()
+    count = 0
+    for _ in reader:
+        count += 1
+        if count % every == 0:
+            steady.append(tracemalloc.get_traced_memory()[0] - baseline)
+    seconds = time.time() - start
+
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    rss_peak = sampler.stop()
+
+    steady = steady[len(steady) // 2:]  # Use second half of the samples.
+    return {
+        'rows': count,
+        'seconds': seconds,
+        'peak': peak,
+        'steady': max(steady) if steady else None,
+        'rss_peak': (rss_peak - rss_baseline) if rss_peak and rss_baseline else None,
+    }
+
+
+#######################################################################
+# Parent process.
+#######################################################################
+
+def _write_data(workdir, shape, nrows, constructors):
+    """Write the data files that *constructors* need into *workdir*
+    and return the list of constructors whose data could be written.
+    """
+    dataset = datasets.Dataset(shape, nrows)
+    with open(os.path.join(workdir, 'dataset.json'), 'w') as fh:
+        json.dump({'shape': shape, 'rows': nrows}, fh)
+
+    available = []
+    for constructor in constructors:
+        try:
+            if constructor == 'from_csv':
+                datasets.write_csv(os.path.join(workdir, 'data.csv'), dataset)
+            elif constructor == 'from_sql':
+                import sqlite3
+                connection = sqlite3.connect(os.path.join(workdir, 'data.sqlite'))
+                datasets.write_sqlite(connection, 'benchmark', dataset)
+                connection.close()
+            elif constructor == 'from_dbf':
+                import dbfread
+                datasets.write_dbf(os.path.join(workdir, 'data.dbf'), dataset)
+            elif constructor == 'from_excel':
+                import xlrd
+                datasets.write_excel(os.path.join(workdir, 'data.xlsx'), dataset)
+            elif constructor == 'from_pandas':
+                import pandas
+        except ImportError:
+            continue
+        available.append(constructor)
+    return available
+
+
+def _run_child(constructor, workdir):
+    command = [sys.executable, os.path.abspath(__file__),
+               '--child', constructor, workdir]
+    try:
+        output = subprocess.check_output(command)
+    except subprocess.CalledProcessError:
+        return None  # E.g., xlrd cannot read xlsx files (xlrd 2.0+).
+    return json.loads(output.decode('utf-8'))
+
+
+def run(shape, sizes, constructors):
+    """Measure each constructor at each size and return a list of
+    result dictionaries.
+    """
+    results = []
+    for nrows in sizes:
+        workdir = tempfile.mkdtemp(prefix='get_reader_mem_')
+        try:
+            for constructor in _write_data(workdir, shape, nrows, constructors):
+                result = _run_child(constructor, workdir)
+                if result is None:
+                    continue
+                result.update({'constructor': constructor, 'shape': shape,
+                               'size': nrows})
+                results.append(result)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def assess(results):
+    """Return a dictionary mapping each constructor to 'flat', 'GROWS',
+    or 'expected' based on how its peak memory changes from the
+    smallest to the largest size.
+    """
+    by_constructor = {}
+    for result in results:
+        by_constructor.setdefault(result['constructor'], []).append(result)
+
+    assessment = {}
+    for constructor, items in by_constructor.items():
+        items.sort(key=lambda x: x['size'])
+        if constructor in LOADS_ALL:
+            assessment[constructor] = 'expected'
+            continue
+        smallest, largest = items[0]['peak'], items[-1]['peak']
+        limit = smallest * GROWTH_RATIO + GROWTH_ALLOWANCE
+        assessment[constructor] = 'flat' if largest <= limit else 'GROWS'
+    return assessment
+
+
+def _mib(value):
+    return '' if value is None else '{0:.2f}'.format(value / (1024.0 * 1024.0))
+
+
+def print_report(results, assessment):
+    print('{0:<14} {1:>10} {2:>11} {3:>11} {4:>11} {5:>9}'.format(
+        'constructor', 'rows', 'peak MiB', 'steady MiB', 'RSS MiB', 'status'))
+    for result in sorted(results, key=lambda x: (x['constructor'], x['size'])):
+        print('{0:<14} {1:>10} {2:>11} {3:>11} {4:>11} {5:>9}'.format(
+            result['constructor'], result['size'], _mib(result['peak']),
+            _mib(result['steady']), _mib(result['rss_peak']),
+            assessment[result['constructor']]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        default=[10000, 100000, 1000000])
+    parser.add_argument('--shape', default='narrow', choices=datasets.SHAPES)
+    parser.add_argument('--constructors', nargs='+', default=list(CONSTRUCTORS),
+                        choices=CONSTRUCTORS)
+    parser.add_argument('--json', metavar='PATH',
+                        help='write results as JSON to PATH')
+    parser.add_argument('--child', nargs=2, metavar=('CONSTRUCTOR', 'WORKDIR'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        result = measure(*args.child)
+        sys.stdout.write(json.dumps(result))
+        return 0
+
+    results = run(args.shape, sorted(args.sizes), args.constructors)
+    assessment = assess(results)
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump({'results': results, 'assessment': assessment}, fh, indent=2)
+    print_report(results, assessment)
+    return 1 if 'GROWS' in assessment.values() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
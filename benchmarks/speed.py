@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure reading speed for each get_reader constructor.
+
+Run benchmarks for the working tree and print a table (or write the
+results as JSON)::
+
+    python benchmarks/speed.py
+    python benchmarks/speed.py --rows 100000 --json results.json
+
+Compare two git revisions and report regressions (exits with status
+1 if any benchmark is slower than the given threshold)::
+
+    python benchmarks/speed.py --compare v1.0.0 HEAD --threshold 0.10
+
+Constructors whose optional dependencies are not installed are
+skipped.
+"""
+from __future__ import absolute_import
+import argparse
+import csv
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+
+try:
+    from time import perf_counter as timer
+except ImportError:
+    from time import time as timer
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.append(REPO_DIR)  # Appended so PYTHONPATH can select another version.
+
+import datasets
+from get_reader import get_reader
+
+
+CONSTRUCTORS = ('raw_csv', 'from_csv', 'from_csv_simple', 'from_csv_bytes',
+                'from_dicts', 'from_sql', 'from_pandas', 'from_excel',
+                'from_dbf')
+
+
+def _exhaust(iterable):
+    count = 0
+    for _ in iterable:
+        count += 1
+    return count
+
+
+def _time_best(func, repeat):
+    """Call *func* *repeat* times and return the best time in seconds
+    along with the number of rows it read.
+    """
+    best = None
+    count = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = timer()
+        count = func()
+        seconds = timer() - start
+        if best is None or seconds < best:
+            best = seconds
+    return best, count
+
+
+def _setup(constructor, rows, workdir):
+    """Return a function that reads *rows* using *constructor* and
+    returns the number of rows read (or None if the constructor's
+    requirements are not available).
+    """
+    if constructor in ('raw_csv', 'from_csv', 'from_csv_simple', 'from_csv_bytes'):
+        path = os.path.join(workdir, 'data.csv')
+        if not os.path.exists(path):
+            datasets.write_csv(path, rows)
+
+        if constructor == 'from_csv':
+            return lambda: _exhaust(get_reader.from_csv(path))
+
+        if constructor in ('from_csv_simple', 'from_csv_bytes'):
+            kwds = {'engine': 'simple'}
+            if constructor == 'from_csv_bytes':
+                kwds['decode'] = False
+            try:
+                get_reader.from_csv(path, **kwds).close()
+            except TypeError:
+                return None  # Revision does not support these arguments.
+            return lambda: _exhaust(get_reader.from_csv(path, **kwds))
+
+        if datasets.PY2:
+            def raw_csv():
+                with open(path, 'rb') as fh:
+                    return _exhaust(csv.reader(fh))
+        else:
+            def raw_csv():
+                with io.open(path, encoding='utf-8', newline='') as fh:
+                    return _exhaust(csv.reader(fh))
+        return raw_csv
+
+    if constructor == 'from_dicts':
+        header = rows[0]
+        records = [dict(zip(header, row)) for row in rows[1:]]
+        return lambda: _exhaust(get_reader.from_dicts(records, header))
+
+    if constructor == 'from_sql':
+        try:
+            import sqlite3
+        except ImportError:
+            return None
+        connection = sqlite3.connect(':memory:')
+        datasets.write_sqlite(connection, 'benchmark', rows)
+        return lambda: _exhaust(get_reader.from_sql(connection, 'benchmark'))
+
+    if constructor == 'from_pandas':
+        try:
+            df = datasets.make_dataframe(rows)
+        except ImportError:
+            return None
+        return lambda: _exhaust(get_reader.from_pandas(df, index=False))
+
+    if constructor == 'from_excel':
+        path = os.path.join(workdir, 'data.xlsx')
+        try:
+            datasets.write_excel(path, rows)
+            _exhaust(get_reader.from_excel(path))  # Check that xlrd can read it.
+        except Exception:
+            return None  # Requires openpyxl and an xlsx-capable xlrd.
+        return lambda: _exhaust(get_reader.from_excel(path))
+
+    if constructor == 'from_dbf':
+        try:
+            import dbfread
+        except ImportError:
+            return None
+        path = os.path.join(workdir, 'data.dbf')
+        datasets.write_dbf(path, rows)
+        return lambda: _exhaust(get_reader.from_dbf(path, encoding='utf-8'))
+
+    raise ValueError('unknown constructor {0!r}'.format(constructor))
+
+
+def run_benchmarks(shapes, constructors, nrows, repeat):
+    """Run benchmarks and return a list of result dictionaries."""
+    results = []
+    for shape in shapes:
+        rows = datasets.make_rows(shape, nrows)
+        workdir = tempfile.mkdtemp(prefix='get_reader_bench_')
+        try:
+            raw_seconds = None
+            for constructor in constructors:
+                func = _setup(constructor, rows, workdir)
+                if func is None:
+                    continue
+                seconds, count = _time_best(func, repeat)
+                result = {
+                    'name': '{0}/{1}'.format(constructor, shape),
+                    'constructor': constructor,
+                    'shape': shape,
+                    'rows': count,
+                    'seconds': seconds,
+                    'rows_per_second': count / seconds if seconds else None,
+                }
+                if constructor == 'raw_csv':
+                    raw_seconds = seconds
+                elif constructor.startswith('from_csv') and raw_seconds is not None:
+                    overhead = (seconds - raw_seconds) / count
+                    result['overhead_ns_per_row'] = overhead * 1e9
+                results.append(result)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def _revision_results(revision, args):
+    """Run the benchmarks in a subprocess using the get_reader.py
+    module from the given git *revision* and return the results.
+    """
+    tmpdir = tempfile.mkdtemp(prefix='get_reader_rev_')
+    try:
+        source = subprocess.check_output(
+            ['git', 'show', '{0}:get_reader.py'.format(revision)],
+            cwd=REPO_DIR,
+        )
+        with open(os.path.join(tmpdir, 'get_reader.py'), 'wb') as fh:
+            fh.write(source)
+
+        output = os.path.join(tmpdir, 'results.json')
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [tmpdir] + [x for x in [env.get('PYTHONPATH')] if x])
+        command = [sys.executable, os.path.abspath(__file__),
+                   '--rows', str(args.rows), '--repeat', str(args.repeat),
+                   '--shapes'] + args.shapes + ['--constructors'] \
+            + args.constructors + ['--json', output, '--quiet']
+        subprocess.check_call(command, env=env)
+        with open(output) as fh:
+            data = json.load(fh)
+        data['revision'] = revision
+        return data
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def compare(baseline, current, threshold):
+    """Return a list of (name, baseline rate, current rate, change,
+    is_regression) tuples for benchmarks found in both result sets.
+    """
+    base_rates = dict((x['name'], x['rows_per_second']) for x in baseline['results'])
+    comparison = []
+    for result in current['results']:
+        name = result['name']
+        if name not in base_rates or result['constructor'] == 'raw_csv':
+            continue
+        base_rate = base_rates[name]
+        rate = result['rows_per_second']
+        change = (rate - base_rate) / base_rate
+        comparison.append((name, base_rate, rate, change, change < -threshold))
+    return comparison
+
+
+def print_results(results):
+    print('{0:<32} {1:>10} {2:>14} {3:>12}'.format(
+        'benchmark', 'rows', 'rows/sec', 'ns/row extra'))
+    for result in results:
+        overhead = result.get('overhead_ns_per_row')
+        print('{0:<32} {1:>10} {2:>14,.0f} {3:>12}'.format(
+            result['name'], result['rows'], result['rows_per_second'],
+            '' if overhead is None else '{0:.0f}'.format(overhead)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--shapes', nargs='+', default=list(datasets.SHAPES),
+                        choices=datasets.SHAPES)
+    parser.add_argument('--constructors', nargs='+', default=list(CONSTRUCTORS),
+                        choices=CONSTRUCTORS)
+    parser.add_argument('--json', metavar='PATH',
+                        help='write results as JSON to PATH')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'REVISION'),
+                        help='compare two git revisions')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='slowdown that counts as a regression (default 0.10)')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        baseline = _revision_results(args.compare[0], args)
+        current = _revision_results(args.compare[1], args)
+        comparison = compare(baseline, current, args.threshold)
+        if args.json:
+            with open(args.json, 'w') as fh:
+                json.dump({'baseline': baseline, 'current': current}, fh, indent=2)
+
+        regressions = 0
+        print('{0:<32} {1:>14} {2:>14} {3:>8}'.format(
+            'benchmark', args.compare[0][:14], args.compare[1][:14], 'change'))
+        for name, base_rate, rate, change, is_regression in comparison:
+            regressions += is_regression
+            print('{0:<32} {1:>14,.0f} {2:>14,.0f} {3:>+7.1%}{4}'.format(
+                name, base_rate, rate, change, '  REGRESSION' if is_regression else ''))
+        return 1 if regressions else 0
+
+    results = run_benchmarks(args.shapes, args.constructors, args.rows, args.repeat)
+    if args.json:
+        data = {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'rows': args.rows,
+            'repeat': args.repeat,
+            'results': results,
+        }
+        with open(args.json, 'w') as fh:
+            json.dump(data, fh, indent=2)
+    if not args.quiet:
+        print_results(results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
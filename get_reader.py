@@ -1,9 +1,21 @@
 # -*- coding: utf-8 -*-
 import codecs
 import csv
+import functools
+import hashlib
 import io
+import keyword
+import numbers
+import os
+import re
+import struct
 import sys
+import tempfile
+import threading
+import time
+import weakref
 from abc import ABCMeta
+from array import array
 from itertools import (
     chain,
     islice,
@@ -23,23 +35,44 @@ try:
 except AttributeError:
     range = xrange
 
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
 
 __version__ = '1.0.1.dev0'
 
 
 __all__ = [
     'get_reader',
+    'get_writer',
     'Reader',
     'ReaderLike',
+    'SharedReader',
 ]
 
 
 try:
     string_types = basestring
     file_types = (io.IOBase, file)
+    buffer_types = (bytearray, memoryview)  # Byte strings are paths.
 except NameError:
     string_types = str
     file_types = io.IOBase
+    buffer_types = (bytes, bytearray, memoryview)
+
+
+try:
+    integer_types = (int, long)
+except NameError:
+    integer_types = (int,)
+
+
+try:
+    _timer = time.perf_counter  # New in version 3.3.
+except AttributeError:
+    _timer = time.time
 
 
 PY2 = sys.version_info[0] == 2
@@ -84,10 +117,22 @@ class Reader(object):
         if isinstance(iterable, Reader):
             if closefunc is NOVALUE:
                 closefunc = iterable._closefunc
+            self._counter = iterable._counter
+            self._progress_counter = iterable._progress_counter
+            self._checkpointfunc = iterable._checkpointfunc
+            self._bytesfunc = iterable._bytesfunc
+            self._instrument = iterable._instrument
+            self._sizes = iterable._sizes
             iterable = iterable.__wrapped__
         else:
             if closefunc is NOVALUE:
                 closefunc = None
+            self._counter = None
+            self._progress_counter = None
+            self._checkpointfunc = None
+            self._bytesfunc = None
+            self._instrument = None
+            self._sizes = None
             iterable = iter(iterable)
 
         self.__wrapped__ = iterable
@@ -105,6 +150,241 @@ class Reader(object):
     def __del__(self):
         self.close()
 
+    def checkpoint(self):
+        """Return a token that records the reader's current position.
+        The token is a dictionary of simple values that can be
+        serialized (with json, pickle, etc.) and later passed to a
+        constructor's *resume_from* argument to continue reading
+        where this reader left off::
+
+            reader = get_reader('myfile.csv', checkpoint=True)
+            ...
+            token = reader.checkpoint()
+            ...
+            reader = get_reader('myfile.csv', resume_from=token)
+
+        A resumed reader yields the header row first and then
+        continues with the row following the checkpoint.
+
+        Rows are only counted for readers created with *checkpoint*
+        set to True (or with a *resume_from* token). Other readers
+        raise a ValueError.
+        """
+        if self._counter is None:
+            msg = 'reader does not track its position, use checkpoint=True'
+            raise ValueError(msg)
+        token = {'rows': self._counter.rows}
+        if self._checkpointfunc:
+            token.update(self._checkpointfunc())
+        return token
+
+    def instrument(self, callback=None, every_rows=None, every_seconds=None):
+        """Start collecting statistics for this reader and return the
+        reader itself (so it can be chained with a constructor)::
+
+            reader = get_reader('myfile.csv').instrument()
+            for row in reader:
+                ...
+            print(reader.stats)
+
+        If *callback* is given, it is called with the current `stats`
+        every *every_rows* rows and/or every *every_seconds* seconds
+        and once more when the reader is exhausted.
+        """
+        if self._instrument is None:
+            self._instrument = _Instrument(
+                self._bytesfunc, callback, every_rows, every_seconds)
+            self.__wrapped__ = self._instrument.wrap(self.__wrapped__)
+        return self
+
+    def decode_columns(self, columns, encoding='utf-8', errors='strict'):
+        """Decode the byte string values in the given *columns* (a
+        list of names or positions) as rows are read and return the
+        reader itself. This is used with readers that produce bytes
+        (see the *decode* argument of `from_csv()`)::
+
+            reader = get_reader.from_csv('myfile.csv', decode=False)
+            reader.decode_columns(['name', 'city'])
+
+        The header row is decoded in full so that column names are
+        text. Other columns are left as bytes.
+        """
+        self.__wrapped__ = _decode_rows(self.__wrapped__, columns, encoding, errors)
+        return self
+
+    @property
+    def stats(self):
+        """A dictionary of statistics collected since `instrument()`
+        was called (or None if the reader is not instrumented):
+
+        * ``'rows'``: number of rows read from the source
+        * ``'bytes'``: bytes read from the file (None if unknown)
+        * ``'source_seconds'``: time spent producing rows
+        * ``'consumer_seconds'``: time spent between rows (in the
+          code that is consuming the reader)
+        * ``'first_row_seconds'``: time until the first row arrived
+        * ``'elapsed_seconds'``: total time so far
+        """
+        if self._instrument is None:
+            return None
+        return self._instrument.stats()
+
+    @property
+    def progress(self):
+        """A dictionary describing how much of the source has been
+        read (or None if the source's size is unknown):
+
+        * ``'bytes'`` and ``'total_bytes'``: bytes consumed and the
+          file size (CSV file paths)
+        * ``'rows'`` and ``'total_rows'``: rows read (including the
+          header, for readers created with *checkpoint* or
+          *on_progress*) and the row count (DBF and Excel files)
+        * ``'fraction'``: portion of the source read (0.0 to 1.0)
+        * ``'elapsed_seconds'`` and ``'eta_seconds'``: time since the
+          reader was created and the estimated time remaining
+        """
+        if self._sizes is None:
+            return None
+        counter = self._counter or self._progress_counter
+        rows = counter.rows if counter else None
+        return _progress(self._sizes, rows)
+
+    def replayable(self, memory_limit=100000):
+        """Return a replayable object that reads the remaining rows from
+        this reader only once but can be iterated over many times. Each
+        iteration returns a new `Reader` that starts from the first
+        buffered row::
+
+            replayable = get_reader('myfile.csv').replayable()
+            validate(replayable)  # <- Reads rows from file.
+            load(replayable)      # <- Reads buffered rows.
+
+        Rows are buffered in memory up to *memory_limit* rows, after
+        that they are written to a temporary file. This reader is
+        closed once all its rows have been read.
+        """
+        return _ReplayBuffer(self, memory_limit)
+
+    def materialize(self):
+        """Read all remaining rows into a compact, column-oriented
+        structure and return it. Numeric columns are packed into
+        arrays and repeated strings share a single object, so this
+        uses far less memory than ``list(reader)`` for large data.
+        The returned object can be iterated over many times and
+        produces rows as new lists (or tuples if the original rows
+        were tuples)::
+
+            rows = get_reader('myfile.csv').materialize()
+            for row in rows:
+                ...
+        """
+        with self:
+            return _ColumnarRows(self)
+
+    def tee(self, n=2, memory_limit=100000):
+        """Return a tuple of *n* independent `Reader` objects that each
+        produce the remaining rows from this reader. Rows are read from
+        this reader only once and are buffered (in memory up to
+        *memory_limit* rows, then in a temporary file) until every
+        reader has consumed them. The buffer and this reader are
+        closed after all *n* readers have been closed.
+        """
+        buffer = _ReplayBuffer(self, memory_limit, consumers=n)
+        return tuple(buffer.reader() for _ in range(n))
+
+    def shared(self, batch_size=1000):
+        """Return a `SharedReader` that hands out batches of rows from
+        this reader to many threads. Each batch holds up to
+        *batch_size* rows and has a sequence number::
+
+            shared = get_reader('myfile.csv').shared()
+            for sequence, rows in shared:  # <- Safe to use in threads.
+                ...
+        """
+        return SharedReader(self, batch_size)
+
+    def parallel_map(self, func, workers=None, chunksize=1000, ordered=True):
+        """Return a new `Reader` that produces the header row followed
+        by the result of calling *func* on each remaining row. Rows
+        are processed by a pool of *workers* processes (defaults to
+        the number of CPUs) which lets CPU-heavy transformations use
+        more than one core::
+
+            def transform(row):
+                ...
+
+            reader = get_reader('myfile.csv').parallel_map(transform)
+
+        Rows are sent to the workers in chunks of *chunksize* rows and
+        at most two chunks per worker are in flight at a time. The
+        *func* and rows must be picklable (*func* should be defined
+        at the top level of a module). If *ordered* is False, results
+        are produced in the order that chunks finish rather than in
+        the order of the rows. Errors raised by *func* are re-raised
+        by the returned reader. This reader is closed when the new
+        reader finishes or is closed.
+        """
+        generator = _parallel_map_rows(self, func, workers, chunksize, ordered)
+
+        def closefunc():
+            generator.close()
+            self.close()  # In case the generator was never started.
+
+        return Reader(generator, closefunc)
+
+    def to_numpy(self, dtypes=None, sample_size=1000):
+        """Read all remaining rows into a numpy structured array. The
+        first row is used for the field names and the remaining rows
+        become the array's records (requires numpy)::
+
+            array = get_reader('myfile.csv').to_numpy()
+            totals = array['amount'].sum()
+
+        The *dtypes* can be a dictionary mapping column names to
+        dtypes or a sequence of dtypes (one per column). Columns
+        without a given dtype are inferred from the first
+        *sample_size* values---numeric text becomes 'int64' or
+        'float64' and other columns are left as 'object'.
+        """
+        with self:
+            header, columns = _to_columns(self, dtypes, sample_size)
+
+        numpy = _import_numpy()
+        names = [str(name) for name in header]
+        length = len(columns[0]) if columns else 0
+        dtype = [(name, column.dtype) for name, column in zip(names, columns)]
+        result = numpy.empty(length, dtype=dtype)
+        while columns:
+            result[names.pop(0)] = columns.pop(0)
+        return result
+
+    def to_dataframe(self, dtypes=None, sample_size=1000):
+        """Read all remaining rows into a pandas DataFrame. The first
+        row is used for the column names. The *dtypes* and
+        *sample_size* arguments work the same as they do for
+        `to_numpy()` (requires pandas)::
+
+            df = get_reader('myfile.csv').to_dataframe()
+        """
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError(
+                "No module named 'pandas'\n"
+                "\n"
+                "This is an optional method that requires the "
+                "third-party library 'pandas'."
+            )
+
+        with self:
+            header, columns = _to_columns(self, dtypes, sample_size)
+
+        # Columns are keyed by position so duplicate names are kept.
+        positions = list(range(len(columns)))
+        df = pandas.DataFrame(dict(zip(positions, columns)), columns=positions)
+        df.columns = list(header)
+        return df
+
     # Iterator protocol.
 
     def __iter__(self):
@@ -114,6 +394,7 @@ class Reader(object):
         try:
             return next(self.__wrapped__)
         except StopIteration:
+            self.__wrapped__ = iter(())  # Stay exhausted once closed.
             self.close()
             raise
 
@@ -184,6 +465,95 @@ class ReaderLike(ReaderLikeABCMeta('ReaderLikeABC', (object,), {})):
         raise TypeError(msg)
 
 
+class SharedReader(object):
+    """Hands out batches of rows from a single *reader* to many
+    threads. The header row is read when the SharedReader is created
+    and is available as the `header` attribute. Each call to
+    `next_batch()` returns a tuple containing a sequence number and a
+    list of up to *batch_size* rows (or None when no rows remain)::
+
+        shared = get_reader('myfile.csv').shared()
+
+        def worker():
+            for sequence, rows in shared:
+                ...
+
+    Rows are read while holding a lock, so threads contend once per
+    batch rather than once per row. Sequence numbers start at 0 and
+    follow the order of the rows in the source so results can be
+    reordered if needed. The source reader is closed (exactly once)
+    when its rows are exhausted, when it raises an error, or when
+    `close()` is called. If the source raises an error, it is raised
+    again by every later call to `next_batch()` (in any thread) so
+    that no thread mistakes the error for the end of the rows.
+    """
+    def __init__(self, reader, batch_size=1000):
+        if not isinstance(reader, Reader):
+            reader = Reader(reader)
+        self.batch_size = batch_size
+        self._reader = reader
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._exhausted = False
+        self._error = None  # Error raised by the source, if any.
+        rows = self._read(1)
+        self.header = rows[0] if rows else None
+
+    def _read(self, size):
+        """Read up to *size* rows from the source (the lock must be
+        held or the SharedReader must not yet be shared).
+        """
+        try:
+            rows = list(islice(self._reader, size))
+        except Exception as err:
+            self._error = err
+            self._finish()
+            raise
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def _finish(self):
+        self._exhausted = True
+        self._reader.close()
+
+    def next_batch(self):
+        """Return a tuple of the next sequence number and a list of
+        rows (or None if there are no more rows). If the source raised
+        an error, the error is raised again.
+        """
+        with self._lock:
+            if self._exhausted:
+                if self._error is not None:
+                    raise self._error
+                return None
+            rows = self._read(self.batch_size)
+            if not rows:
+                return None
+            sequence = self._sequence
+            self._sequence += 1
+        return sequence, rows
+
+    def __iter__(self):
+        batch = self.next_batch()
+        while batch is not None:
+            yield batch
+            batch = self.next_batch()
+
+    def close(self):
+        """Close the source reader (rows that have not been handed
+        out are discarded).
+        """
+        with self._lock:
+            self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
 #######################################################################
 # Data handling functions.
 #######################################################################
@@ -200,28 +570,557 @@ def _normalize_decoder(encoding):
     return encoding
 
 
+def _header_hash(header):
+    """Return a stable hex digest identifying the *header* row."""
+    return hashlib.sha1(repr(list(header)).encode('utf-8')).hexdigest()
+
+
+def _resume_rows(reader, resume_from):
+    """Advance *reader* to the position recorded in the *resume_from*
+    token by consuming and discarding rows. The header row is kept
+    and will be produced again as the reader's first row.
+    """
+    rows = resume_from.get('rows', 0)
+    if rows < 2:
+        return reader  # <- EXIT! Nothing to skip after header.
+
+    header = next(reader, NOVALUE)
+    if header is NOVALUE:
+        return reader  # <- EXIT! Source is empty.
+
+    expected = resume_from.get('header')
+    if expected and expected != _header_hash(header):
+        reader.close()
+        raise ValueError('header does not match the resume_from token')
+
+    for _ in islice(reader, rows - 1):
+        pass
+    reader.__wrapped__ = chain([header], reader.__wrapped__)
+    return reader
+
+
+def _from_reader_like(obj, resume_from=None, checkpoint=False):
+    """Return a Reader for an *obj* that already produces rows (used
+    by get_reader() for lists of lists and other reader-like objects).
+    """
+    reader = Reader(obj)
+    if resume_from:
+        reader = _resume_rows(reader, resume_from)
+    if checkpoint or resume_from:
+        _count_rows(reader, _resumed_rows(resume_from))
+    return reader
+
+
+def _resumed_rows(resume_from):
+    """Return the number of rows after the header that come before
+    the position in a *resume_from* token (or 0 if there is no token).
+    """
+    if not resume_from:
+        return 0
+    return max(resume_from.get('rows', 0) - 1, 0)
+
+
+class _RowCounter(object):
+    """Wraps an *iterator* and counts the rows that it produces (the
+    count starts at *rows*).
+    """
+    def __init__(self, iterator, rows=0):
+        self._iterator = iterator
+        self.rows = rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = next(self._iterator)
+        self.rows += 1
+        return row
+
+    next = __next__  # Python 2.x support.
+
+
+def _count_rows(reader, rows=0):
+    """Update *reader* so that it counts the rows it produces (used by
+    Reader.checkpoint() and Reader.progress). Counting should be added
+    after any wrappers that read ahead so that only rows given to the
+    caller are counted. The *rows* argument is the number of rows that
+    were read before counting began.
+    """
+    reader._counter = _RowCounter(reader.__wrapped__, rows)
+    reader.__wrapped__ = reader._counter
+
+
+class _BufferIO(io.RawIOBase):
+    """A read-only raw stream over a bytes-like object (bytes,
+    bytearray, or memoryview). Data is copied from a memoryview of
+    the object as it is read so the contents are never duplicated
+    in full.
+    """
+    def __init__(self, data):
+        view = memoryview(data)
+        if view.ndim != 1 or view.itemsize != 1:
+            view = view.cast('B')  # New in version 3.3.
+        self.view = view
+        self.size = len(view)
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        start = self.position
+        chunk = self.view[start:start + len(b)]
+        size = len(chunk)
+        b[:size] = chunk if not PY2 else chunk.tobytes()
+        self.position = start + size
+        return size
+
+    def seek(self, pos, whence=0):
+        if whence == 1:
+            pos += self.position
+        elif whence == 2:
+            pos += self.size
+        self.position = max(pos, 0)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        if not self.closed and hasattr(self.view, 'release'):
+            self.view.release()  # New in version 3.2.
+        super(_BufferIO, self).close()
+
+
+def _infer_compression(path):
+    """Return the compression type ('gzip', 'bz2', 'xz', or None)
+    indicated by the extension of *path*.
+    """
+    lowercase = path.lower()
+    if lowercase.endswith('.gz'):
+        return 'gzip'
+    if lowercase.endswith('.bz2'):
+        return 'bz2'
+    if lowercase.endswith('.xz'):
+        return 'xz'
+    return None
+
+
+def _wrap_compressed(fileobj, mode, compression):
+    """Return a file object that compresses or decompresses data
+    written to or read from the binary *fileobj*.
+    """
+    if compression == 'gzip':
+        import gzip
+        return gzip.GzipFile(fileobj=fileobj, mode=mode)
+    if compression == 'bz2':
+        import bz2
+        return bz2.BZ2File(fileobj, mode)  # File objects new in version 3.3.
+    if compression == 'xz':
+        import lzma  # New in version 3.3.
+        return lzma.LZMAFile(fileobj, mode)
+    raise ValueError('unknown compression {0!r}'.format(compression))
+
+
+def _open_path(path, sizes=None, buffer_size=io.DEFAULT_BUFFER_SIZE):
+    """Open *path* for reading in binary mode and return a buffered
+    file object (decompressing it if the extension indicates gzip,
+    bz2, or xz compression). If a *sizes* dictionary is given, it is
+    updated with the file's 'total_bytes' and a 'bytesfunc' that
+    returns the number of bytes consumed so far.
+
+    The bytes consumed are taken from the raw file's position when
+    'bytesfunc' is called (so reading isn't slowed down) and the last
+    position is returned once the file is closed. Call 'bytesfunc'
+    just before closing to report the final position.
+    """
+    raw = io.FileIO(path, 'r')  # Not subclassed, io has fast paths for it.
+    if sizes is not None:
+        sizes['total_bytes'] = os.fstat(raw.fileno()).st_size
+        position = [0]
+
+        def bytesfunc():
+            if not raw.closed:
+                position[0] = raw.tell()
+            return position[0]
+        sizes['bytesfunc'] = bytesfunc
+    fh = io.BufferedReader(raw, buffer_size)
+
+    compression = _infer_compression(path)
+    if compression:
+        try:
+            return _wrap_compressed(fh, 'rb', compression)
+        except Exception:
+            fh.close()
+            raise
+    return fh
+
+
+_SNIFF_SIZE = 32768
+_sniff_cache = {}  # Maps file signature to sniffed (encoding, dialect).
+
+_BOM_ENCODINGS = [  # UTF-32 must be checked before UTF-16.
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf_8_sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def _sniff_encoding(sample):
+    """Return the encoding of the bytes *sample*: the encoding given
+    by a byte order mark, UTF-8 if the sample is valid UTF-8, or else
+    Windows-1252 (or Latin-1 if the sample is not valid Windows-1252).
+    """
+    for bom, encoding in _BOM_ENCODINGS:
+        if sample.startswith(bom):
+            return encoding
+
+    for encoding in ('utf_8_sig', 'cp1252'):
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            pass
+    return 'latin-1'
+
+
+def _sniff_dialect(text):
+    """Return a csv.Dialect for the *text* sample (or 'excel' if the
+    dialect cannot be determined).
+    """
+    end = max(text.rfind('\n'), text.rfind('\r'))
+    if end > 0:
+        text = text[:end]  # Drop incomplete last line.
+    try:
+        dialect = csv.Sniffer().sniff(text, delimiters=',\t;|')
+    except csv.Error:
+        return 'excel'
+
+    if PY2 and isinstance(dialect.delimiter, unicode):
+        dialect.delimiter = dialect.delimiter.encode('utf-8')
+        dialect.quotechar = dialect.quotechar.encode('utf-8')
+    return dialect
+
+
+def _sniff_csv(fh, path, encoding, dialect):
+    """Return the *encoding* and *dialect* to use for the file at
+    *path*, replacing 'auto' values with ones sniffed from the start
+    of *fh* (a buffered binary file). The sample is taken with
+    peek() so the file's position is unchanged. Results are cached
+    by the file's path, size, and modification time.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime, encoding, dialect)
+    cached = _sniff_cache.get(key)
+    if cached:
+        return cached  # <- EXIT! Use cached result.
+
+    sample = fh.peek(_SNIFF_SIZE)[:_SNIFF_SIZE]
+    if encoding == 'auto':
+        encoding = _sniff_encoding(sample)
+    if dialect == 'auto':
+        text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample)
+        dialect = _sniff_dialect(text)
+
+    if len(_sniff_cache) >= 1000:
+        _sniff_cache.clear()
+    _sniff_cache[key] = (encoding, dialect)
+    return encoding, dialect
+
+
+def _progress(sizes, rows):
+    """Return a dictionary describing the progress of a reader given
+    its *sizes* dictionary and the number of *rows* read so far.
+    """
+    position = sizes['bytesfunc']() if 'bytesfunc' in sizes else None
+    total_bytes = sizes.get('total_bytes')
+    total_rows = sizes.get('total_rows')
+
+    if position is not None and total_bytes:
+        fraction = min(position / float(total_bytes), 1.0)
+    elif total_rows and rows is not None:
+        fraction = min(rows / float(total_rows), 1.0)
+    else:
+        fraction = None
+
+    elapsed = _timer() - sizes['start']
+    if fraction:
+        eta = elapsed * (1.0 - fraction) / fraction
+    else:
+        eta = None
+
+    return {
+        'bytes': position,
+        'total_bytes': total_bytes,
+        'rows': rows,
+        'total_rows': total_rows,
+        'fraction': fraction,
+        'elapsed_seconds': elapsed,
+        'eta_seconds': eta,
+    }
+
+
+class _ProgressRows(object):
+    """Iterator that yields rows from *iterator*, keeps a count of them
+    in its `rows` attribute, and calls *callback* with the current
+    progress at most once every *interval* seconds (and once more when
+    the iterator is exhausted). The *rows* argument is the number of
+    rows that were read before the iterator was wrapped.
+    """
+    def __init__(self, iterator, sizes, rows, callback, interval=1.0):
+        self._iterator = iterator
+        self._sizes = sizes
+        self._callback = callback
+        self._interval = interval
+        self._next_time = _timer() + interval
+        self._finished = False
+        self.rows = rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            row = next(self._iterator)
+        except StopIteration:
+            if not self._finished:
+                self._finished = True
+                self._callback(_progress(self._sizes, self.rows))
+            raise
+        self.rows += 1
+        if _timer() >= self._next_time:
+            self._callback(_progress(self._sizes, self.rows))
+            self._next_time = _timer() + self._interval
+        return row
+
+    next = __next__  # Python 2.x support.
+
+
+def _add_progress(reader, callback, interval, rows=0):
+    """Wrap *reader* so that *callback* receives progress reports. The
+    *rows* argument is the number of rows that were already read. The
+    wrapper's count is used by Reader.progress when the reader doesn't
+    count rows for checkpoints.
+    """
+    if reader._sizes is None:
+        reader._sizes = {'start': _timer()}
+    reader._progress_counter = _ProgressRows(
+        reader.__wrapped__, reader._sizes, rows, callback, interval)
+    reader.__wrapped__ = reader._progress_counter
+
+
+_SIMPLE_CHUNK_SIZE = 262144  # Characters decoded per chunk.
+
+
+def _simple_dialect(dialect, fmtparams):
+    """Return the (delimiter, quotechar) to use with the simple CSV
+    engine or None if the dialect needs features the engine doesn't
+    handle (escape characters, skipped initial spaces, or quoting
+    modes that convert values). When quoting is QUOTE_NONE, the
+    returned quotechar is None.
+    """
+    params = csv.reader([], dialect=dialect, **fmtparams).dialect
+    if params.escapechar or params.skipinitialspace:
+        return None
+    if params.quoting == csv.QUOTE_NONE:
+        return params.delimiter, None
+    if params.quoting in (csv.QUOTE_MINIMAL, csv.QUOTE_ALL):
+        return params.delimiter, params.quotechar
+    return None
+
+
+def _simple_csv_rows(read, readline, fallback, delimiter, quotechar,
+                     chunk_size=_SIMPLE_CHUNK_SIZE):
+    """Return a generator that yields rows by splitting large chunks
+    of text (or bytes) on newlines and then on *delimiter*. The *read*
+    and *readline* functions must return data from the same stream.
+
+    As soon as a chunk contains *quotechar* (or a carriage return
+    that isn't part of a CRLF line ending), the unprocessed data is
+    read to the end of its line and passed to *fallback*. It must
+    return a csv.reader() for this data followed by the rest of the
+    stream and the rows of that reader are yielded instead.
+    """
+    chunk = read(chunk_size)
+    if isinstance(chunk, bytes):
+        newline, cr, crlf = b'\n', b'\r', b'\r\n'
+    else:
+        newline, cr, crlf = '\n', '\r', '\r\n'
+    empty = chunk[:0]
+    remainder = empty
+
+    while chunk:
+        text = remainder + chunk
+        end = text.rfind(newline) + 1
+        lines = text[:end]
+        has_cr = cr in lines
+        if (quotechar and quotechar in chunk) \
+                or (has_cr and lines.count(cr) != lines.count(crlf)):
+            for row in fallback(text + readline()):  # Complete the last line.
+                yield row
+            return  # <- EXIT!
+
+        remainder = text[end:]
+        if has_cr:
+            lines = lines.replace(cr, empty)
+        lines = lines.split(newline)
+        lines.pop()  # Remove empty string after the last newline.
+        for line in lines:
+            yield line.split(delimiter) if line else []
+        chunk = read(chunk_size)
+
+    if remainder:  # Last line has no newline.
+        for row in fallback(remainder):
+            yield row
+
+
+def _skip_utf8_bom(fh):
+    """Advance the binary file *fh* past a UTF-8 byte order mark if
+    there is one at its current position.
+    """
+    bom = codecs.BOM_UTF8
+    if hasattr(fh, 'peek'):
+        if fh.peek(len(bom))[:len(bom)] == bom:
+            fh.read(len(bom))
+    else:
+        position = fh.tell()
+        if fh.read(len(bom)) != bom:
+            fh.seek(position)
+
+
+def _encoded_rows(reader):
+    """Return a generator that yields rows from *reader* with their
+    values encoded as Latin-1 bytes. Decoding bytes as Latin-1 maps
+    each byte to one character, so this restores the original bytes
+    of data that was decoded to pass it through the csv module.
+    """
+    for row in reader:
+        yield [value.encode('latin-1') for value in row]
+
+
+def _decode_rows(reader, columns, encoding='utf-8', errors='strict'):
+    """Return a generator that yields rows from *reader* with the byte
+    string values in the given *columns* (names or positions) decoded
+    to text. The header row is decoded in full so that column names
+    are text.
+    """
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [x.decode(encoding, errors) if isinstance(x, bytes) else x
+              for x in header]
+    yield header
+
+    indexes = [x if isinstance(x, int) else header.index(x) for x in columns]
+    for row in reader:
+        if not isinstance(row, list):
+            row = list(row)
+        for index in indexes:
+            if index < len(row):
+                row[index] = row[index].decode(encoding, errors)
+        yield row
+
+
 if PY2:
 
+    # Codecs whose bytes can be passed to csv.reader() without
+    # re-encoding (the names are normalized by codecs.lookup()).
+    _SINGLE_PASS_CODECS = ('utf-8', 'utf-8-sig', 'ascii')
+
+
+    def _is_single_pass_sample(sample):
+        """Return True if the bytes *sample* can be passed directly to
+        csv.reader(): it must contain no NUL bytes (which suggest a
+        mis-identified UTF-16 or UTF-32 source) and no carriage
+        returns apart from those in CRLF line endings.
+        """
+        if b'\x00' in sample:
+            return False
+        if sample.endswith(b'\r'):
+            sample = sample[:-1]  # CRLF may be split at end of sample.
+        return sample.count(b'\r') == sample.count(b'\r\n')
+
+
+    def _decode_batches(reader, encoding, batch_size=1000):
+        """Returns a generator that yields the rows from *reader* with
+        their byte string values decoded to Unicode. Values are joined
+        with NUL characters (which csv.reader() never returns) so that
+        a whole batch of rows is decoded in a single call.
+        """
+        while True:
+            rows = list(islice(reader, batch_size))
+            if not rows:
+                return  # <- EXIT!
+            joined = b'\x00'.join([b'\x00'.join(row) for row in rows])
+            values = joined.decode(encoding).split('\x00')
+            position = 0
+            for row in rows:
+                width = len(row)
+                yield values[position:position + width]
+                position += width or 1  # An empty row still adds one value.
+
+
+    def _single_pass_rows(lines, codec, dialect, **kwds):
+        """Returns a generator that yields rows as lists of Unicode
+        values from *lines* of UTF-8 (or ASCII) encoded bytes. The
+        bytes are passed to csv.reader() as-is (after removing any
+        byte order mark) and only the resulting values are decoded.
+        A first line that is empty once its byte order mark is removed
+        (a file that contains only the mark) is dropped.
+        """
+        if codec == 'utf-8-sig':
+            lines = iter(lines)
+            first_line = next(lines, None)
+            if first_line is not None:
+                if first_line.startswith(codecs.BOM_UTF8):
+                    first_line = first_line[len(codecs.BOM_UTF8):]
+                if first_line:
+                    lines = chain([first_line], lines)
+            codec = 'utf-8'
+        reader = csv.reader(lines, dialect=dialect, **kwds)
+        return _decode_batches(reader, codec)
+
+
     def _unicode_rows(stream, encoding, dialect, **kwds):
         """Returns a generator that yields rows as lists of Unicode
         values. The Python 2 `csv` module does not support Unicode
         directly. For best results, the official docs recommend
         encoding text as UTF-8 before passing it to csv.reader().
+
+        When the *encoding* is UTF-8 or ASCII, the stream's bytes are
+        already suitable for csv.reader() so they're passed through
+        directly and only the parsed values are decoded.
         """
+        codec = codecs.lookup(encoding).name if encoding else None
+        single_pass = codec in _SINGLE_PASS_CODECS
+
         # Get Unicode stream.
         if isinstance(stream, io.IOBase):
+            if single_pass and hasattr(stream, 'peek'):
+                return _stream_rows(stream, encoding, codec, dialect, **kwds)
             streamreader_type = codecs.getreader(encoding)
             unicode_stream = streamreader_type(stream)
         elif isinstance(stream, Iterable):
             first_row, stream = iterpeek(stream)
             if isinstance(first_row, unicode):
                 unicode_stream = stream  # Ignores given *encoding*.
+            elif single_pass and first_row and b'\x00' not in first_row:
+                return _single_pass_rows(stream, codec, dialect, **kwds)
             else:
                 unicode_stream = (row.decode(encoding) for row in stream)
         else:
             cls_name = stream.__class__.__name__
             raise TypeError('unsupported type {0}'.format(cls_name))
 
+        return _transcoded_rows(unicode_stream, dialect, **kwds)
+
+
+    def _transcoded_rows(unicode_stream, dialect, **kwds):
         # Re-encode as UTF-8.
         utf8_stream = (x.encode('utf-8') for x in unicode_stream)
 
@@ -231,17 +1130,71 @@ if PY2:
         return (make_unicode(row) for row in reader)
 
 
-    def _from_csv_path(path, encoding, dialect, **kwds):
-        fh = io.open(path, 'rb')
+    def _stream_rows(stream, encoding, codec, dialect, **kwds):
+        """Returns a generator that yields rows from a buffered binary
+        *stream*. When iteration begins, the start of the stream is
+        checked with peek() to decide if the single-pass path can be
+        used (peeking is deferred so nothing is read until then).
+        """
+        if _is_single_pass_sample(stream.peek(_SNIFF_SIZE)):
+            rows = _single_pass_rows(stream, codec, dialect, **kwds)
+        else:
+            unicode_stream = codecs.getreader(encoding)(stream)
+            rows = _transcoded_rows(unicode_stream, dialect, **kwds)
+        for row in rows:
+            yield row
+
+
+    def _from_csv_path(path, encoding, dialect, offset=None, sizes=None, **kwds):
+        sniff = encoding == 'auto' or dialect == 'auto'
+        fh = _open_path(path, sizes, _SNIFF_SIZE if sniff else io.DEFAULT_BUFFER_SIZE)
+        try:
+            if sniff:
+                encoding, dialect = _sniff_csv(fh, path, encoding, dialect)
+        except Exception:
+            fh.close()
+            raise
+        return _from_csv_stream(fh, encoding, dialect, offset, **kwds)
+
+
+    def _from_csv_stream(fh, encoding, dialect, offset=None, engine='csv',
+                         decode=True, positions=False, **kwds):
+        """Returns a reader, a close function, and None (in place of
+        a position function) for the buffered binary stream *fh*.
+        """
         try:
-            generator = _unicode_rows(fh, encoding, dialect=dialect, **kwds)
+            simple = engine == 'simple' and _simple_dialect(dialect, kwds)
+            if not decode:  # The csv module reads bytes directly.
+                _skip_utf8_bom(fh)
+                lines = iter(fh.readline, b'')
+                if simple:
+                    fallback = lambda text: csv.reader(
+                        chain(io.BytesIO(text), lines), dialect=dialect, **kwds)
+                    generator = _simple_csv_rows(
+                        fh.read, fh.readline, fallback, *simple)
+                else:
+                    generator = csv.reader(lines, dialect=dialect, **kwds)
+            elif simple:
+                stream = codecs.getreader(encoding)(fh)
+                lines = iter(stream.readline, '')
+                fallback = lambda text: _single_pass_rows(
+                    (x.encode('utf-8') for x in
+                     chain(io.StringIO(text, newline=''), lines)),
+                    'utf-8', dialect, **kwds)
+                generator = _simple_csv_rows(
+                    stream.read, stream.readline, fallback, *simple)
+            else:
+                generator = _unicode_rows(fh, encoding, dialect=dialect, **kwds)
         except Exception:
             fh.close()
             raise
-        return (generator, fh.close)
+        return (generator, fh.close, None)
+        # Above, the *offset* and *positions* args are not used because
+        # the codecs StreamReader buffers decoded data and cannot report
+        # an accurate position--checkpoints fall back to row counts.
 
 
-    def _from_csv_iterable(iterable, encoding, dialect, **kwds):
+    def _from_csv_iterable(iterable, encoding, dialect, decode=True, **kwds):
         # Check that iterable is expected to return bytes (not strings).
         if isinstance(iterable, file):
             using_bytes = 'b' in iterable.mode
@@ -262,26 +1215,226 @@ if PY2:
                    'strings (did you open the file in binary mode?)')
             raise TypeError(msg)
 
+        if not decode:
+            return csv.reader(iterable, dialect=dialect, **kwds)
         return _unicode_rows(iterable, encoding, dialect=dialect, **kwds)
 
 else:  # Python 3
 
-    def _from_csv_path(path, encoding, dialect, **kwds):
-        fh = open(path, 'rt', encoding=encoding, newline='')
+    def _from_csv_path(path, encoding, dialect, offset=None, sizes=None, **kwds):
+        """Returns a reader, a close function, and a function that
+        returns the position (a tell() value) of the next row (see
+        _from_csv_stream()). If a *sizes* dictionary is given, it is
+        updated with the file's size and a function that returns the
+        number of bytes consumed.
+        """
+        sniff = encoding == 'auto' or dialect == 'auto'
+        buffered = _open_path(
+            path, sizes, _SNIFF_SIZE if sniff else io.DEFAULT_BUFFER_SIZE)
+        try:
+            if sniff:
+                encoding, dialect = _sniff_csv(buffered, path, encoding, dialect)
+        except Exception:
+            buffered.close()
+            raise
+        return _from_csv_stream(buffered, encoding, dialect, offset, **kwds)
+
+
+    def _from_csv_stream(buffered, encoding, dialect, offset=None,
+                         engine='csv', decode=True, positions=False, **kwds):
+        """Returns a reader, a close function, and a function that
+        returns the position (a tell() value) of the next row for the
+        *buffered* binary stream. If *offset* is given, the header row
+        is read and then reading continues from that position. The
+        position function is None unless *positions* is True (and
+        *engine* is not 'simple' which reads rows in large chunks).
+        When *decode* is False, rows contain bytes.
+        """
+        try:
+            if not decode:
+                _skip_utf8_bom(buffered)
+                encoding = 'latin-1'  # Maps each byte to one character.
+            fh = io.TextIOWrapper(buffered, encoding=encoding, newline='')
+        except Exception:
+            buffered.close()
+            raise
+
         try:
-            reader = csv.reader(fh, dialect=dialect, **kwds)
+            if offset or positions:
+                # Using readline() (rather than iterating over the file
+                # directly) keeps the file's tell() method available.
+                lines = iter(fh.readline, '')
+            else:
+                lines = fh
+            if offset:
+                header = next(csv.reader(lines, dialect=dialect, **kwds))
+                fh.seek(offset)
+
+            def fallback(text):
+                if not decode:
+                    text = text.decode('latin-1')
+                text_lines = chain(io.StringIO(text, newline=''), lines)
+                return csv.reader(text_lines, dialect=dialect, **kwds)
+
+            # Undecoded bytes are split directly (rather than passed
+            # through the csv module as Latin-1) unless positions are
+            # needed.
+            simple = (engine == 'simple' or not (decode or positions)) \
+                and _simple_dialect(dialect, kwds)
+            if simple and decode:
+                reader = _simple_csv_rows(fh.read, fh.readline, fallback, *simple)
+            elif simple:  # Split bytes directly (without decoding).
+                delimiter, quotechar = [x and x.encode('latin-1') for x in simple]
+                reader = _simple_csv_rows(
+                    buffered.read,
+                    buffered.readline,
+                    lambda text: _encoded_rows(fallback(text)),
+                    delimiter,
+                    quotechar,
+                )
+            else:
+                reader = csv.reader(lines, dialect=dialect, **kwds)
+                if not decode:
+                    reader = _encoded_rows(reader)
+            tell = fh.tell if (positions and not simple) else None
+
+            if offset:
+                if not decode:
+                    header = [value.encode('latin-1') for value in header]
+                reader = chain([header], reader)
         except Exception:
             fh.close()
             raise
-        return (reader, fh.close)
+        return (reader, fh.close, tell)
 
 
-    def _from_csv_iterable(iterable, encoding, dialect, **kwds):
+    def _from_csv_iterable(iterable, encoding, dialect, decode=True, **kwds):
+        if not decode:
+            lines = (line.decode('latin-1') for line in iterable)
+            return _encoded_rows(csv.reader(lines, dialect=dialect, **kwds))
         return csv.reader(iterable, dialect=dialect, **kwds)
         # Above, the *encoding* arg is not used but is included so
         # that the csv-helper functions have the same signature.
 
 
+def _from_csv_buffer(data, encoding, dialect, sizes=None, **kwds):
+    """Returns a reader, a close function, and a position function
+    for a bytes-like object *data*. The data is decoded incrementally
+    as rows are read. If a *sizes* dictionary is given, it is updated
+    with the data's size and a function that returns the number of
+    bytes consumed.
+    """
+    raw = _BufferIO(data)
+    if sizes is not None:
+        sizes['total_bytes'] = raw.size
+        sizes['bytesfunc'] = lambda: raw.position
+    return _from_csv_stream(io.BufferedReader(raw), encoding, dialect, **kwds)
+
+
+def _csv_checkpointfunc(path, encoding, dialect, tell, fmtparams):
+    """Return a function that builds the CSV-specific part of a
+    checkpoint token: a hash of the header row and, when the file
+    position can be determined, the byte offset of the next row.
+    """
+    memo = {}
+
+    def checkpointfunc():
+        if 'header' not in memo:  # Hash header on first call only.
+            reader, close_file, _ = _from_csv_path(
+                path, encoding, dialect=dialect, **fmtparams)
+            try:
+                memo['header'] = _header_hash(next(reader, []))
+            finally:
+                close_file()
+
+        token = {'header': memo['header']}
+        if tell:
+            try:
+                token['offset'] = tell()
+            except ValueError:
+                pass  # File is already closed, fall back to row count.
+        return token
+
+    return checkpointfunc
+
+
+def _low_cardinality(header, sample, max_ratio=0.5):
+    """Return the positions of columns whose number of distinct values
+    in the *sample* rows is no more than *max_ratio* of the number of
+    rows.
+    """
+    indexes = []
+    for index in range(len(header)):
+        values = set(row[index] for row in sample if len(row) > index)
+        if len(values) <= len(sample) * max_ratio:
+            indexes.append(index)
+    return indexes
+
+
+def _intern_rows(reader, columns, categories=None, sample_size=1000):
+    """Return a generator that yields rows from *reader* where repeated
+    values in the given *columns* (names or positions) are replaced by
+    a single shared object. If *columns* is 'auto', low-cardinality
+    columns are selected using a sample of rows.
+
+    If a *categories* dictionary is given, values are replaced with
+    integer codes and the dictionary is updated to map each column
+    name to a list of its values (where a value's index is its code).
+    """
+    header = next(reader, None)
+    if header is None:
+        return
+    yield header
+
+    if columns == 'auto':
+        sample = list(islice(reader, sample_size))
+        indexes = _low_cardinality(header, sample)
+        reader = chain(sample, reader)
+    else:
+        header_list = list(header)
+        indexes = [x if isinstance(x, int) else header_list.index(x) for x in columns]
+
+    memos = [{} for _ in indexes]
+    if categories is not None:
+        tables = []
+        for index in indexes:
+            tables.append(categories.setdefault(header[index], []))
+
+    for row in reader:
+        if not isinstance(row, list):
+            row = list(row)
+        for position, index in enumerate(indexes):
+            if index >= len(row):
+                continue
+            value = row[index]
+            memo = memos[position]
+            if categories is None:
+                row[index] = memo.setdefault(value, value)
+            else:
+                code = memo.get(value)
+                if code is None:
+                    table = tables[position]
+                    code = memo[value] = len(table)
+                    table.append(value)
+                row[index] = code
+        yield row
+
+
+def _intern_columns(reader, columns, categorical=False):
+    """Update *reader* so that repeated values in the given *columns*
+    share a single object (or are replaced with integer codes if
+    *categorical* is True, see _intern_rows()).
+    """
+    if columns is True:
+        columns = 'auto'
+
+    if categorical:
+        reader.categories = {}
+        reader.__wrapped__ = _intern_rows(reader.__wrapped__, columns, reader.categories)
+    else:
+        reader.__wrapped__ = _intern_rows(reader.__wrapped__, columns)
+
+
 def _from_dicts(records, fieldnames=None):
     """Takes a container of dict *records* and returns a generator."""
     if fieldnames:
@@ -299,9 +1452,10 @@ def _from_dicts(records, fieldnames=None):
         yield [row.get(key, None) for key in fieldnames]
 
 
-def _from_pandas(obj, index=True):
+def _from_pandas(obj, index=True, skip=0):
     """Takes a pandas DataFrame, Series, Index, or MultiIndex and
-    returns a generator.
+    returns a generator. If *skip* is given, that many records are
+    omitted after the header row.
     """
     if hasattr(obj, 'to_frame') and hasattr(obj, 'index'):
         # Convert series to DataFrame.
@@ -325,10 +1479,36 @@ def _from_pandas(obj, index=True):
         yield list(df.columns)
 
     records = df.to_records(index=index)
-    for record in records:
+    for record in records[skip:]:
         yield list(record)
 
 
+def _peek_pandas(obj, index=True, **kwds):
+    """Return a list of (name, type) pairs for the columns that
+    _from_pandas() would produce (without building any records).
+    Types are the names of the pandas dtypes.
+    """
+    if hasattr(obj, 'to_frame') and hasattr(obj, 'index'):
+        columns = [(obj.name, obj.dtype)]  # Series.
+    elif hasattr(obj, 'to_frame') or hasattr(obj, 'to_series'):
+        index = False  # Index or MultiIndex.
+        if hasattr(obj, 'levels'):
+            columns = [(level.name, level.dtype) for level in obj.levels]
+        else:
+            columns = [(obj.name, obj.dtype)]
+    else:
+        columns = list(obj.dtypes.items())
+
+    if index:
+        index_obj = obj.index
+        if hasattr(index_obj, 'levels'):
+            index_columns = [(x.name, x.dtype) for x in index_obj.levels]
+        else:
+            index_columns = [(index_obj.name, index_obj.dtype)]
+        columns = index_columns + columns
+    return [(name, str(dtype)) for name, dtype in columns]
+
+
 def _from_squint(obj, fieldnames=None):
     """Takes a Select, Query, or Result and returns a generator."""
     squint = sys.modules['squint']
@@ -369,8 +1549,10 @@ def _from_squint(obj, fieldnames=None):
         yield value
 
 
-def _from_excel(path, worksheet=0):
-    """Takes a Excel path and returns a generator and close method."""
+def _open_excel_sheet(path, worksheet=0):
+    """Open an Excel workbook with xlrd (loading only the requested
+    *worksheet*) and return a tuple of the book and the sheet.
+    """
     try:
         import xlrd
     except ImportError:
@@ -386,14 +1568,176 @@ def _from_excel(path, worksheet=0):
         sheet = book.sheet_by_index(worksheet)
     else:
         sheet = book.sheet_by_name(worksheet)
+    return book, sheet
+
 
-    reader = (sheet.row_values(index) for index in range(sheet.nrows))
+def _from_excel(path, worksheet=0, skip=0, sizes=None):
+    """Takes a Excel path and returns a generator and close method.
+    If *skip* is given, that many rows are omitted after the header
+    row. If a *sizes* dictionary is given, it is updated with the
+    worksheet's 'total_rows'.
+    """
+    book, sheet = _open_excel_sheet(path, worksheet)
+    if sizes is not None:
+        sizes['total_rows'] = sheet.nrows
+    indexes = chain([0], range(1 + skip, sheet.nrows)) if sheet.nrows else []
+    reader = (sheet.row_values(index) for index in indexes)
     release_resources = book.release_resources
     return (reader, release_resources)
 
 
-def _from_dbf(filename, encoding, **kwds):
-    """Takes a DBF path and returns a generator."""
+_XLSX_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_XLSX_RELS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_XLSX_TYPES = {'s': 'text', 'str': 'text', 'inlineStr': 'text',
+               'b': 'boolean', 'n': 'number', 'e': 'error'}
+_XL_CELL_TYPES = ['empty', 'text', 'number', 'date', 'boolean', 'error', 'blank']
+
+
+def _xlsx_column_index(reference):
+    """Return the zero-based column index for a cell reference like
+    'AB12'.
+    """
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + (ord(char.upper()) - 64)
+    return index - 1
+
+
+def _xlsx_sheet_path(archive, worksheet):
+    """Return the archive path of the given *worksheet* (an index or
+    a name) in an open XLSX *archive*.
+    """
+    from xml.etree import ElementTree
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    sheets = list(workbook.find(_XLSX_MAIN + 'sheets'))
+    if isinstance(worksheet, int):
+        sheet = sheets[worksheet]
+    else:
+        matches = [x for x in sheets if x.get('name') == worksheet]
+        if not matches:
+            raise ValueError('no worksheet named {0!r}'.format(worksheet))
+        sheet = matches[0]
+
+    rel_id = sheet.get(_XLSX_RELS + 'id')
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels:
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            if target.startswith('/'):
+                return target[1:]
+            return 'xl/' + target
+    raise ValueError('worksheet {0!r} not found in archive'.format(worksheet))
+
+
+def _xlsx_shared_strings(archive, count):
+    """Return the first *count* shared strings from an open XLSX
+    *archive* (reading no further than needed).
+    """
+    from xml.etree import ElementTree
+    strings = []
+    if count <= 0 or 'xl/sharedStrings.xml' not in archive.namelist():
+        return strings
+
+    fh = archive.open('xl/sharedStrings.xml')
+    try:
+        for _, elem in ElementTree.iterparse(fh):
+            if elem.tag == _XLSX_MAIN + 'si':
+                strings.append(''.join(x.text or '' for x in elem.iter(_XLSX_MAIN + 't')))
+                elem.clear()
+                if len(strings) >= count:
+                    break
+    finally:
+        fh.close()
+    return strings
+
+
+def _peek_xlsx(path, worksheet=0):
+    """Return the header row and the cell types of the first data row
+    by streaming the worksheet XML of an XLSX file (only the first two
+    rows are parsed).
+    """
+    import zipfile
+    from xml.etree import ElementTree
+
+    archive = zipfile.ZipFile(path)
+    try:
+        rows = []
+        fh = archive.open(_xlsx_sheet_path(archive, worksheet))
+        try:
+            for _, elem in ElementTree.iterparse(fh):
+                if elem.tag != _XLSX_MAIN + 'row':
+                    continue
+                cells = []
+                for cell in elem.iter(_XLSX_MAIN + 'c'):
+                    if cell.get('t') == 'inlineStr':
+                        texts = cell.iter(_XLSX_MAIN + 't')
+                        value = ''.join(x.text or '' for x in texts)
+                    else:
+                        value = cell.findtext(_XLSX_MAIN + 'v')
+                    position = _xlsx_column_index(cell.get('r', ''))
+                    if position < 0:
+                        position = len(cells)
+                    cells.append((position, cell.get('t', 'n'), value))
+                rows.append(cells)
+                elem.clear()
+                if len(rows) == 2:
+                    break
+        finally:
+            fh.close()
+
+        header_cells = rows[0] if rows else []
+        needed = [int(v) + 1 for _, t, v in header_cells if t == 's' and v]
+        strings = _xlsx_shared_strings(archive, max(needed or [0]))
+    finally:
+        archive.close()
+
+    width = max([p + 1 for p, _, _ in header_cells] or [0])
+    header = [''] * width
+    for position, cell_type, value in header_cells:
+        if cell_type == 's' and value:
+            value = strings[int(value)]
+        elif cell_type in ('n', None) and value:
+            value = float(value)
+        header[position] = value if value is not None else ''
+
+    types = [None] * width
+    for position, cell_type, value in (rows[1] if len(rows) > 1 else []):
+        if position < width:
+            types[position] = _XLSX_TYPES.get(cell_type) if value else 'empty'
+    return header, types
+
+
+def _peek_excel(path, worksheet=0, **kwds):
+    """Return a list of (name, type) pairs for the columns in the
+    given Excel worksheet. XLSX files are streamed so only the first
+    two rows are read. Other files are read with xlrd (loading only
+    the requested worksheet). Types are the cell types of the first
+    data row ('text', 'number', etc.).
+    """
+    import zipfile
+    if zipfile.is_zipfile(path):
+        header, types = _peek_xlsx(path, worksheet)
+        return list(zip(header, types))
+
+    book, sheet = _open_excel_sheet(path, worksheet)
+    try:
+        header = sheet.row_values(0) if sheet.nrows else []
+        if sheet.nrows > 1:
+            types = [_XL_CELL_TYPES[x] for x in sheet.row_types(1)]
+        else:
+            types = [None] * len(header)
+    finally:
+        book.release_resources()
+    return list(zip(header, types))
+
+
+def _from_dbf(filename, encoding, sizes=None, **kwds):
+    """Takes a DBF path and returns a generator. If a *sizes*
+    dictionary is given, it is updated with the 'total_rows' (the
+    header plus the record count---including deleted records).
+    """
     try:
         import dbfread
     except ImportError:
@@ -410,6 +1754,8 @@ def _from_dbf(filename, encoding, **kwds):
 
     table = dbfread.DBF(filename, encoding, **kwds)
     field_names = table.field_names
+    if sizes is not None:
+        sizes['total_rows'] = table.header.numrecords + 1
 
     generator = iter(table)
     close_generator = getattr(generator, 'close', None)
@@ -418,21 +1764,180 @@ def _from_dbf(filename, encoding, **kwds):
     return reader, close_generator
 
 
-def _from_sql(connection, table_or_query):
-    """Return a reader object which will iterate over records from the
-    given table or query result.
+def _peek_dbf(filename, encoding=None, **kwds):
+    """Return a list of (name, type) pairs for the fields in a DBF
+    file. Only the header block is read. Types are the DBF field type
+    codes ('C' for character, 'N' for numeric, 'D' for date, etc.).
     """
-    cursor = connection.cursor()
     try:
-        cursor.execute(table_or_query)
-    except Exception:
-        try:
-            cursor.execute('SELECT * FROM {0}'.format(table_or_query))
-        except Exception:
-            cursor.close()
-            raise
+        import dbfread
+    except ImportError:
+        raise ImportError(
+            "No module named 'dbfread'\n"
+            "\n"
+            "This is an optional constructor that requires the "
+            "third-party library 'dbfread'."
+        )
 
-    try:
+    kwds['load'] = False
+    table = dbfread.DBF(filename, encoding, **kwds)
+    return [(field.name, field.type) for field in table.fields]
+
+
+# Largest LIMIT accepted by databases that need one before OFFSET.
+_SQL_NO_LIMIT = 9223372036854775807
+
+_table_name_re = re.compile(r'^[A-Za-z_][\w$]*(\.[A-Za-z_][\w$]*)*$')
+
+
+def _skip_sql_rows(connection, cursor, count):
+    """Move *cursor* forward by *count* rows. Uses the cursor's
+    scroll() method when available (an optional DBAPI2 extension)
+    and falls back to fetching and discarding rows.
+    """
+    not_supported = getattr(connection, 'NotSupportedError', NotImplementedError)
+    try:
+        cursor.scroll(count, mode='relative')
+        return  # <- EXIT!
+    except (AttributeError, NotImplementedError, not_supported):
+        pass
+
+    while count > 0:
+        rows = cursor.fetchmany(min(count, 1000))
+        if not rows:
+            break
+        count -= len(rows)
+
+
+def _get_paramstyle(connection):
+    """Return the DBAPI2 paramstyle of the driver module that
+    defines *connection* (defaults to 'qmark' if it can't be found).
+    """
+    module_name = connection.__class__.__module__ or ''
+    while module_name:
+        module = sys.modules.get(module_name)
+        paramstyle = getattr(module, 'paramstyle', None)
+        if paramstyle:
+            return paramstyle
+        module_name = module_name.rpartition('.')[0]
+    return 'qmark'
+
+
+def _make_placeholder(paramstyle, name, position=1):
+    """Return a placeholder for a query parameter in the given
+    *paramstyle* and the type of container (tuple or dict) that
+    parameter values should be given in.
+    """
+    if paramstyle == 'qmark':
+        return '?', tuple
+    if paramstyle == 'numeric':
+        return ':{0}'.format(position), tuple
+    if paramstyle == 'named':
+        return ':{0}'.format(name), dict
+    if paramstyle == 'format':
+        return '%s', tuple
+    if paramstyle == 'pyformat':
+        return '%({0})s'.format(name), dict
+    raise ValueError('unknown paramstyle {0!r}'.format(paramstyle))
+
+
+def _incremental_query(connection, table, column, since=None):
+    """Return a query (and its parameters) that selects records from
+    *table* whose *column* value is greater than *since*, ordered by
+    *column*. If *since* is None, all records are selected. The
+    *table* and *column* names are quoted if needed.
+    """
+    table = _quote_table_name(table)
+    column = _quote_identifier(column)
+    if since is None:
+        query = 'SELECT * FROM {0} ORDER BY {1}'.format(table, column)
+        return query, None
+
+    paramstyle = _get_paramstyle(connection)
+    placeholder, container = _make_placeholder(paramstyle, 'since')
+    query = 'SELECT * FROM {0} WHERE {1} > {2} ORDER BY {1}'
+    query = query.format(table, column, placeholder)
+    if container is dict:
+        return query, {'since': since}
+    return query, (since,)
+
+
+def _watermark_rows(reader, index, reader_ref):
+    """Yields rows from *reader* unchanged. When exhausted, the value
+    at *index* of the last row is stored as the `watermark` attribute
+    of the referenced Reader. Rows are expected to be ordered by this
+    column so the last value is also the maximum.
+    """
+    yield next(reader)  # Header row.
+
+    row = None
+    for row in reader:
+        yield row
+
+    target = reader_ref()
+    if row is not None and target is not None:
+        target.watermark = row[index]
+
+
+def _from_sql(connection, table_or_query, skip=0, parameters=None,
+              offset=False):
+    """Return a reader object which will iterate over records from the
+    given table or query result. If *skip* is given, that many records
+    are omitted after the header row. If *parameters* are given, they
+    are passed to the cursor's execute() method along with the query.
+
+    If *offset* is True, *table_or_query* must be a plain table name
+    or a SELECT query that can be given a LIMIT and OFFSET clause so
+    that skipped records are never sent by the database. If the
+    clause is not supported, the records are skipped on the client.
+
+    If *connection* is a cursor, it is used as-is and is not closed
+    (the returned close function is None). Reusing a cursor lets
+    drivers reuse a prepared statement when the same query is
+    executed repeatedly with different parameters.
+    """
+    if hasattr(connection, 'cursor'):
+        cursor = connection.cursor()
+        close_cursor = cursor.close
+    else:
+        cursor = connection  # <- Given an existing cursor.
+        close_cursor = None
+
+    if offset and _table_name_re.match(table_or_query):
+        table_or_query = 'SELECT * FROM {0}'.format(table_or_query)
+
+    try:
+        executed = False
+        if skip and offset:
+            query = '{0} LIMIT {1} OFFSET {2}'.format(
+                table_or_query, _SQL_NO_LIMIT, int(skip))
+            try:
+                if parameters is not None:
+                    cursor.execute(query, parameters)
+                else:
+                    cursor.execute(query)
+                executed = True
+                skip = 0  # <- Skipped by the database.
+            except Exception:
+                pass  # Clause not supported, skip records below.
+
+        if not executed:
+            if parameters is not None:
+                cursor.execute(table_or_query, parameters)
+            else:
+                try:
+                    cursor.execute(table_or_query)
+                except Exception:
+                    cursor.execute('SELECT * FROM {0}'.format(table_or_query))
+
+        if skip:
+            _skip_sql_rows(connection, cursor, skip)
+    except Exception:
+        if close_cursor:
+            close_cursor()
+        raise
+
+    try:
         # If iterable, use cursor directly.
         iter(cursor)
         results = cursor
@@ -447,7 +1952,1403 @@ def _from_sql(connection, table_or_query):
 
     header = tuple(x[0] for x in cursor.description)
     reader = chain([header], results)
-    return (reader, cursor.close)
+    return (reader, close_cursor)
+
+
+def _peek_sql(connection, table_or_query, parameters=None, **kwds):
+    """Return a list of (name, type) pairs for the columns of a
+    table or query. Types are the driver's type codes from
+    cursor.description (sqlite3 always uses None). No records are
+    fetched: tables and queries are wrapped in a ``WHERE 1=0`` query.
+    If the wrapped query fails, the original query is executed and
+    only its description is read.
+    """
+    if hasattr(connection, 'cursor'):
+        cursor = connection.cursor()
+        close_cursor = cursor.close
+    else:
+        cursor = connection  # <- Given an existing cursor.
+        close_cursor = None
+
+    parts = table_or_query.split('.')
+    if all(_simple_identifier.match(part) for part in parts):
+        statements = ['SELECT * FROM {0} WHERE 1=0'.format(table_or_query)]
+    else:
+        query = table_or_query.strip().rstrip(';')
+        statements = ['SELECT * FROM ({0}) peek_schema WHERE 1=0'.format(query),
+                      table_or_query]
+
+    try:
+        for statement in statements:
+            try:
+                if parameters is not None:
+                    cursor.execute(statement, parameters)
+                else:
+                    cursor.execute(statement)
+                break
+            except Exception:
+                if statement is statements[-1]:
+                    raise
+        return [(x[0], x[1]) for x in cursor.description]
+    finally:
+        if close_cursor:
+            close_cursor()
+
+
+#######################################################################
+# Row types.
+#######################################################################
+
+class _NamedRow(object):
+    """Base class for compact, named row classes. Subclasses are made
+    by _get_row_class() and define a field name for each column using
+    __slots__, so rows use less memory than lists or dictionaries.
+    Values can be accessed by name or by position.
+    """
+    __slots__ = ()
+    __hash__ = None  # Rows are mutable.
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __iter__(self):
+        for name in self.__slots__:
+            yield getattr(self, name)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        return getattr(self, self.__slots__[index])
+
+    def __eq__(self, other):
+        if isinstance(other, (_NamedRow, tuple, list)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self):
+        values = ', '.join('{0}={1!r}'.format(k, v) for k, v in zip(self.__slots__, self))
+        return '{0}({1})'.format(self.__class__.__name__, values)
+
+    def __reduce__(self):
+        return (_make_named_row, (self.__slots__, tuple(self)))
+
+Sequence.register(_NamedRow)
+
+
+def _field_names(header):
+    """Return a tuple of valid, unique attribute names for the values
+    in *header*. Invalid or duplicate names are replaced with an
+    underscore and the column position (like namedtuple's *rename*).
+    """
+    names = []
+    for index, name in enumerate(header):
+        name = '{0}'.format(name)
+        if (not _simple_identifier.match(name)
+                or keyword.iskeyword(name)
+                or name.startswith('_')
+                or name in names):
+            name = '_{0}'.format(index)
+        names.append(name)
+    return tuple(names)
+
+
+_row_classes = {}
+
+def _get_row_class(fields):
+    """Return a _NamedRow subclass with the given *fields*. Classes are
+    created once and reused for all rows with the same fields.
+    """
+    try:
+        return _row_classes[fields]
+    except KeyError:
+        pass
+
+    # Unpacking directly into slots is faster than calling setattr().
+    if fields:
+        targets = ', '.join('self.' + name for name in fields)
+        source = 'def __init__(self, values):\n    ({0},) = values\n'.format(targets)
+    else:
+        source = 'def __init__(self, values):\n    pass\n'
+    namespace = {}
+    exec(source, namespace)
+
+    attrs = {'__slots__': fields, '__init__': namespace['__init__']}
+    row_class = type('Row', (_NamedRow,), attrs)
+    _row_classes[fields] = row_class
+    return row_class
+
+
+def _make_named_row(fields, values):
+    """Return a row of the _NamedRow subclass with the given *fields*."""
+    return _get_row_class(fields)(values)
+
+
+def _convert_rows(reader, row_type):
+    """Return a generator that yields the rows from *reader* as
+    *row_type* which can be list, tuple, or 'named' (a compact class
+    with a named attribute for each column). The header row is
+    always given as a tuple when using named rows and empty rows
+    (like those the csv module returns for blank lines) are skipped.
+    """
+    if row_type in (list, tuple):
+        for row in reader:
+            yield row_type(row)
+        return
+
+    if row_type != 'named':
+        raise ValueError('unknown row_type {0!r}'.format(row_type))
+
+    header = next(reader, None)
+    if header is None:
+        return
+    yield tuple(header)
+
+    row_class = _get_row_class(_field_names(header))
+    width = len(header)
+    for row in reader:
+        if not row:
+            continue  # Skip blank lines.
+        if len(row) != width:
+            msg = 'row has {0} values but header has {1}: {2!r}'
+            raise ValueError(msg.format(len(row), width, row))
+        yield row_class(row)
+
+
+#######################################################################
+# Row cache functions.
+#######################################################################
+
+_chunk_prefix = struct.Struct('<I')  # Length of pickled chunk in bytes.
+
+_replace_file = getattr(os, 'replace', os.rename)  # New in version 3.3.
+
+
+def _write_chunk(fh, rows):
+    """Write a list of *rows* to *fh* as a length-prefixed chunk."""
+    data = pickle.dumps(rows, pickle.HIGHEST_PROTOCOL)
+    fh.write(_chunk_prefix.pack(len(data)))
+    fh.write(data)
+
+
+def _load_chunk(fh):
+    """Read the next length-prefixed chunk from *fh* and return its
+    contents (returns None at end of file).
+    """
+    prefix = fh.read(_chunk_prefix.size)
+    if len(prefix) < _chunk_prefix.size:
+        return None
+    (length,) = _chunk_prefix.unpack(prefix)
+    return pickle.loads(fh.read(length))
+
+
+def _read_chunks(fh, categories=None):
+    """Return a generator that yields rows from the length-prefixed
+    chunks in *fh* (as written by _write_chunk()). Chunks that hold
+    a dictionary of categories (as written by _caching_rows()) are
+    used to update the given *categories* dictionary.
+    """
+    while True:
+        chunk = _load_chunk(fh)
+        if chunk is None:
+            break
+        if isinstance(chunk, dict):
+            if categories is not None:
+                categories.update(chunk)
+            continue
+        for row in chunk:
+            yield row
+
+
+# Constructor arguments that don't change the rows that are read
+# (callbacks and position tracking) and are not part of cache keys.
+_uncached_kwds = ('on_progress', 'progress_interval', 'checkpoint')
+
+
+def _cache_key(path, args, kwds):
+    """Return a pair of hex digests for a cached file: the first
+    identifies the *path* and constructor arguments and the second
+    identifies the file's current state (size and modification time).
+    Arguments in _uncached_kwds are not included.
+    """
+    data_kwds = sorted(x for x in kwds.items() if x[0] not in _uncached_kwds)
+    source = repr((os.path.abspath(path), args, data_kwds))
+    stat = os.stat(path)
+    state = repr((stat.st_size, stat.st_mtime, __version__,
+                  pickle.HIGHEST_PROTOCOL))
+    return (hashlib.sha1(source.encode('utf-8')).hexdigest()[:20],
+            hashlib.sha1(state.encode('utf-8')).hexdigest()[:20])
+
+
+def _evict_cache(cache_dir, cache_size, keep=None):
+    """Remove the least-recently-used sidecar files from *cache_dir*
+    until their total size is no greater than *cache_size* bytes. The
+    file named *keep* is never removed.
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith('.rows') or name == keep:
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue  # Removed by another process.
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(x[1] for x in entries)
+    if keep:
+        total += os.path.getsize(os.path.join(cache_dir, keep))
+
+    for _, size, path in sorted(entries):
+        if total <= cache_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+def _caching_rows(reader, fh, temp_path, final_path, chunk_size=1000,
+                  categories=None):
+    """Return a generator that yields rows from *reader* while writing
+    them (in chunks) to *fh*. When *reader* is exhausted, *fh* is
+    closed and *temp_path* is moved to *final_path*. If the move fails
+    (another writer replaced or removed the file first), *temp_path*
+    is removed and the other writer's file is kept.
+
+    If a *categories* dictionary is given, its contents are written
+    ahead of each chunk whose rows added new values to it.
+    """
+    sizes = {}
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if categories is not None:
+            new_sizes = dict((k, len(v)) for k, v in categories.items())
+            if new_sizes != sizes:
+                _write_chunk(fh, dict((k, list(v)) for k, v in categories.items()))
+                sizes = new_sizes
+        if chunk:
+            _write_chunk(fh, chunk)
+            for row in chunk:
+                yield row
+        if len(chunk) < chunk_size:
+            break
+
+    fh.close()
+    try:
+        _replace_file(temp_path, final_path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+
+def _from_cache(cache_dir, make_reader, path, args, kwds, cache_size=None):
+    """Return a Reader for *path* from a sidecar file in *cache_dir*.
+    If no valid sidecar exists, *make_reader* is called with *path*,
+    *args*, and *kwds* and its rows are written to a new sidecar as
+    they are read. Sidecars for previous versions of the same file
+    (or with different arguments) are removed. If *cache_size* is
+    given, least-recently-used sidecars are evicted to keep the
+    cache within that many bytes.
+
+    Rows are counted by the returned Reader itself (if requested with
+    *checkpoint* or *resume_from*) because the sidecar is written in
+    chunks that are read ahead of the caller. Progress callbacks are
+    called with row counts when the sidecar is used. When the source
+    has a `categories` attribute, it is stored in the sidecar and
+    restored as the chunks are read.
+    """
+    source_key, state_key = _cache_key(path, args, kwds)
+    filename = '{0}-{1}.rows'.format(source_key, state_key)
+    sidecar = os.path.join(cache_dir, filename)
+
+    kwds = dict(kwds)
+    resume_from = kwds.get('resume_from')
+    checkpoint = kwds.pop('checkpoint', False) or resume_from
+
+    try:
+        os.utime(sidecar, None)  # Mark as recently used.
+        fh = io.open(sidecar, 'rb')
+    except (IOError, OSError):
+        fh = None  # No sidecar, build one below.
+
+    if fh is not None:
+        categories = {} if kwds.get('categorical') else None
+        reader = Reader(_read_chunks(fh, categories), closefunc=fh.close)
+        if categories is not None:
+            reader.categories = categories
+        on_progress = kwds.get('on_progress')
+        if on_progress:
+            interval = kwds.get('progress_interval', 1.0)
+            _add_progress(reader, on_progress, interval, _resumed_rows(resume_from))
+        if checkpoint:
+            _count_rows(reader, _resumed_rows(resume_from))
+        return reader  # <- EXIT!
+
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+
+    for name in os.listdir(cache_dir):  # Remove stale sidecars.
+        if name.startswith(source_key) and name.endswith('.rows'):
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+    source = make_reader(path, *args, **kwds)
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', prefix=filename + '.',
+                                     dir=cache_dir)  # Unique per writer.
+    fh = io.open(fd, 'wb')
+
+    def closefunc():
+        source.close()
+        if not fh.closed:  # Not fully read, discard partial sidecar.
+            fh.close()
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        elif cache_size is not None and os.path.exists(sidecar):
+            _evict_cache(cache_dir, cache_size, keep=filename)
+
+    categories = getattr(source, 'categories', None)
+    generator = _caching_rows(source, fh, temp_path, sidecar,
+                              categories=categories)
+    reader = Reader(generator, closefunc=closefunc)
+    if categories is not None:
+        reader.categories = categories
+    if checkpoint:
+        _count_rows(reader, _resumed_rows(resume_from))
+    return reader
+
+
+try:
+    array('q')  # New in version 3.3.
+    _int_typecode = 'q'
+except ValueError:
+    _int_typecode = 'l'
+
+
+def _column_kind(values):
+    """Return the kind of container suited to *values*: 'int' or
+    'float' (for an array), 'str' (for deduplicated strings), or
+    'object'.
+    """
+    value_types = set(map(type, values))
+    if value_types == set([int]):
+        return 'int'
+    if value_types == set([float]):
+        return 'float'
+    if all(issubclass(x, string_types) for x in value_types):
+        return 'str'
+    return 'object'
+
+
+class _ColumnBuilder(object):
+    """Collects the values of a column one chunk at a time and keeps
+    them in a compact form. Integers and floats are packed into arrays
+    and strings are deduplicated so that repeated values share a
+    single object. If a chunk doesn't fit the current form, the values
+    collected so far are moved into a list.
+    """
+    def __init__(self):
+        self.kind = None
+        self.values = None
+        self.memo = {}
+
+    def extend(self, values):
+        kind = _column_kind(values)
+        if self.kind is None:
+            self.kind = kind
+            if kind == 'int':
+                self.values = array(_int_typecode)
+            elif kind == 'float':
+                self.values = array('d')
+            else:
+                self.values = []
+        elif kind != self.kind:
+            self._generalize()
+
+        if self.kind == 'int':
+            try:
+                values = array(_int_typecode, values)
+            except OverflowError:
+                self._generalize()  # Too large for array.
+        elif self.kind == 'str':
+            memo = self.memo
+            values = [memo.setdefault(x, x) for x in values]
+        self.values.extend(values)
+
+    def _generalize(self):
+        if isinstance(self.values, array):
+            self.values = self.values.tolist()
+        self.kind = 'object'
+        self.memo = {}
+
+    def finish(self):
+        """Return the collected values as an array or a tuple."""
+        if isinstance(self.values, array):
+            return self.values
+        return tuple(self.values or ())
+
+
+def _compact_column(values):
+    """Return a compact container for a column of *values* (see
+    _ColumnBuilder).
+    """
+    builder = _ColumnBuilder()
+    builder.extend(values)
+    return builder.finish()
+
+
+def _sizeof_column(column):
+    """Return the approximate size of *column* in bytes (counting
+    shared objects only once).
+    """
+    if isinstance(column, array):
+        return sys.getsizeof(column)
+    seen = dict((id(x), x) for x in column)
+    return sys.getsizeof(column) + sum(sys.getsizeof(x) for x in seen.values())
+
+
+class _ColumnarRows(object):
+    """A compact, column-oriented copy of a reader's rows. Each
+    iteration yields the rows again as new lists or tuples. Rows are
+    read in chunks of *chunk_size* rows and moved into the columns
+    one chunk at a time so that all of the rows are never held in
+    memory at once.
+    """
+    def __init__(self, reader, chunk_size=1000):
+        header = next(reader, None)
+        self.header = header
+        self.row_type = list
+        self.length = 0
+
+        width = len(header) if header is not None else 0
+        builders = [_ColumnBuilder() for _ in range(width)]
+        ragged = None  # List of row tuples once a ragged row is seen.
+        while True:
+            chunk = list(islice(reader, chunk_size))
+            if not chunk:
+                break
+            if not self.length:
+                self.row_type = type(chunk[0])
+
+            if ragged is None and any(len(row) != width for row in chunk):
+                columns = [builder.finish() for builder in builders]
+                ragged = list(zip(*columns)) if columns else [()] * self.length
+                builders = None
+            if ragged is not None:
+                ragged.extend(tuple(row) for row in chunk)
+            else:
+                for builder, values in zip(builders, zip(*chunk)):
+                    builder.extend(values)
+            self.length += len(chunk)
+            chunk = None  # Release rows before reading the next chunk.
+
+        if ragged is not None:
+            self.columns = None  # Ragged rows are kept as tuples.
+            self.rows = tuple(ragged)
+        elif self.length:
+            self.columns = [builder.finish() for builder in builders]
+        else:
+            self.columns = []
+
+    @property
+    def nbytes(self):
+        if self.columns is None:
+            return sum(_sizeof_column(row) for row in self.rows)
+        return sum(_sizeof_column(column) for column in self.columns)
+
+    def __iter__(self):
+        if self.header is None:
+            return iter([])
+
+        if self.columns is None:
+            rows = self.rows
+        elif self.columns:
+            rows = zip(*self.columns)
+        else:
+            rows = ((),) * self.length
+        if self.row_type is not tuple:
+            rows = (list(row) for row in rows)
+        return chain([list(self.header)], rows)
+
+
+class _ReaderCache(object):
+    """A process-wide cache of file contents that returns new `Reader`
+    objects for repeated reads of the same file. Call it like
+    `get_reader()` with a file path::
+
+        reader = get_reader.cached('lookup.csv')
+
+    Rows are kept in a compact, column-oriented form. Entries are
+    invalidated when a file's size or modification time changes and
+    the least-recently-used entries are evicted when the total size
+    exceeds the *max_bytes* budget. The *hits* and *misses*
+    attributes count cache lookups.
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # Maps key to [signature, rows, nbytes, tick].
+        self._tick = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        """Total approximate size of cached entries in bytes."""
+        return sum(entry[2] for entry in self._entries.values())
+
+    def clear(self):
+        """Remove all entries and reset the hit and miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __call__(self, path, *args, **kwds):
+        if not isinstance(path, string_types):
+            raise TypeError('cached readers require a file path')
+
+        key = repr((os.path.abspath(path), args, sorted(kwds.items())))
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime)
+
+        with self._lock:
+            self._tick += 1
+            entry = self._entries.get(key)
+            if entry and entry[0] == signature:
+                self.hits += 1
+                entry[3] = self._tick
+                return Reader(entry[1])  # <- EXIT!
+            self.misses += 1
+
+        with get_reader(path, *args, **kwds) as reader:
+            rows = _ColumnarRows(reader)
+        nbytes = rows.nbytes
+
+        with self._lock:
+            self._entries.pop(key, None)
+            if nbytes <= self.max_bytes:
+                self._entries[key] = [signature, rows, nbytes, self._tick]
+                self._evict()
+        return Reader(rows)
+
+    def _evict(self):
+        total = self.nbytes
+        by_age = sorted(self._entries.items(), key=lambda item: item[1][3])
+        for key, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            del self._entries[key]
+            total -= entry[2]
+
+
+class _ReplayBuffer(object):
+    """Reads rows from a *reader* once (as needed) and stores them in
+    chunks so that they can be iterated over many times. The first
+    *memory_limit* rows are kept in memory and the rest are written
+    to a temporary file. If *consumers* is given, the buffer and
+    *reader* are closed once that many readers have been closed.
+    """
+    def __init__(self, reader, memory_limit, consumers=None, chunk_size=1000):
+        self._source = reader
+        self._memory_limit = memory_limit
+        self._chunk_size = chunk_size
+        self._chunks = []  # Lists of rows or offsets in spill file.
+        self._buffered = 0  # Number of rows held in memory.
+        self._spill = None
+        self._exhausted = False
+        self._consumers = consumers
+
+    def _read_chunk(self, index):
+        """Return the chunk at *index*, reading a new chunk from the
+        source if needed (returns None when there are no more rows).
+        """
+        if index < len(self._chunks):
+            chunk = self._chunks[index]
+            if isinstance(chunk, list):
+                return chunk
+            self._spill.seek(chunk)
+            return _load_chunk(self._spill)
+
+        if self._exhausted:
+            return None
+
+        chunk = list(islice(self._source, self._chunk_size))
+        if len(chunk) < self._chunk_size:
+            self._exhausted = True
+        if not chunk:
+            return None
+
+        if self._buffered + len(chunk) <= self._memory_limit:
+            self._chunks.append(chunk)
+            self._buffered += len(chunk)
+        else:
+            if self._spill is None:
+                self._spill = tempfile.TemporaryFile()
+            self._spill.seek(0, 2)  # Move to end of file.
+            self._chunks.append(self._spill.tell())
+            _write_chunk(self._spill, chunk)
+        return chunk
+
+    def _iter_rows(self):
+        index = 0
+        while True:
+            chunk = self._read_chunk(index)
+            if chunk is None:
+                return
+            for row in chunk:
+                yield row
+            index += 1
+
+    def reader(self):
+        """Return a new Reader that starts at the first buffered row."""
+        if self._consumers is None:
+            return Reader(self._iter_rows())
+        return Reader(self._iter_rows(), closefunc=self._release)
+
+    def _release(self):
+        self._consumers -= 1
+        if self._consumers < 1:
+            self.close()
+
+    def close(self):
+        """Close the source reader and remove any temporary file."""
+        self._source.close()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        self._chunks = []
+        self._exhausted = True
+
+    def __iter__(self):
+        return self.reader()
+
+
+#######################################################################
+# Array export functions.
+#######################################################################
+
+def _import_numpy():
+    """Return the numpy module or raise an ImportError."""
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "No module named 'numpy'\n"
+            "\n"
+            "This is an optional method that requires the "
+            "third-party library 'numpy'."
+        )
+    return numpy
+
+
+def _read_columns(reader, numpy, batch_size=1024):
+    """Read rows from *reader* into object arrays (one per column).
+    The arrays are preallocated and their capacity is doubled as
+    needed. Returns a tuple of the header and a list of arrays.
+    """
+    header = next(reader, None)
+    if header is None:
+        return [], []
+
+    width = len(header)
+    capacity = batch_size
+    columns = [numpy.empty(capacity, dtype=object) for _ in range(width)]
+    size = 0
+    while True:
+        batch = list(islice(reader, batch_size))
+        if not batch:
+            break
+
+        end = size + len(batch)
+        if end > capacity:
+            while capacity < end:
+                capacity *= 2
+            for index, column in enumerate(columns):
+                grown = numpy.empty(capacity, dtype=object)
+                grown[:size] = column[:size]
+                columns[index] = grown
+
+        for index, column in enumerate(columns):
+            column[size:end] = [
+                (row[index] if index < len(row) else None) for row in batch
+            ]
+        size = end
+
+    return header, [column[:size] for column in columns]
+
+
+def _infer_dtype(values):
+    """Return the name of a numpy dtype suitable for the given sample
+    of *values*: 'bool', 'int64', 'float64', or 'object'. Numeric
+    strings are treated as numbers and empty strings or None values
+    as missing numbers.
+    """
+    kinds = set()
+    for value in values:
+        if value is None or value == '':
+            kinds.add('blank')
+        elif isinstance(value, bool):
+            kinds.add('bool')
+        elif isinstance(value, numbers.Integral):
+            kinds.add('int')
+        elif isinstance(value, numbers.Real):
+            kinds.add('float')
+        elif isinstance(value, string_types):
+            try:
+                int(value)
+                kinds.add('int')
+            except ValueError:
+                try:
+                    float(value)
+                    kinds.add('float')
+                except ValueError:
+                    return 'object'  # <- EXIT!
+        else:
+            return 'object'  # <- EXIT!
+
+    if kinds == set(['bool']):
+        return 'bool'
+    if kinds == set(['int']):
+        return 'int64'
+    if kinds and kinds <= set(['int', 'float', 'blank']) and kinds != set(['blank']):
+        return 'float64'
+    return 'object'
+
+
+def _convert_column(column, dtype, numpy):
+    """Return *column* (an object array) converted to *dtype* using
+    numpy's vectorized `astype()`. Missing values in float columns
+    become NaN. If the values cannot be converted, the object array
+    is returned unchanged.
+
+    The object array is converted directly. Copying it into a
+    fixed-width string array first (``numpy.array(column, dtype=str)``)
+    was measured to be several times slower with numpy 1.26 and 2.x.
+    """
+    dtype = numpy.dtype(dtype)
+    if dtype.kind == 'O':
+        return column
+
+    try:
+        if dtype.kind == 'f':
+            missing = (column == '') | (column == None)  # noqa: E711
+            if missing.any():
+                column[missing] = numpy.nan
+        return column.astype(dtype)
+    except (ValueError, TypeError, OverflowError):
+        return column
+
+
+def _to_columns(reader, dtypes=None, sample_size=1000):
+    """Read *reader* into a list of typed numpy arrays (one per
+    column) and return a tuple of the header and the arrays. The
+    *dtypes* can be a dictionary mapping column names to dtypes or
+    a sequence of dtypes (one per column). Dtypes that are not given
+    are inferred from the first *sample_size* values of each column.
+    """
+    numpy = _import_numpy()
+    header, columns = _read_columns(reader, numpy)
+
+    if dtypes is None:
+        dtypes = {}
+    elif not isinstance(dtypes, dict):
+        dtypes = dict(zip(header, dtypes))
+
+    for index, name in enumerate(header):
+        column = columns[index]
+        dtype = dtypes.get(name)
+        if dtype is None:
+            dtype = _infer_dtype(column[:sample_size])
+        columns[index] = _convert_column(column, dtype, numpy)
+    return header, columns
+
+
+#######################################################################
+# Parallel processing.
+#######################################################################
+
+def _import_futures():
+    """Return the concurrent.futures module or raise an ImportError."""
+    try:
+        import concurrent.futures  # New in version 3.2.
+    except ImportError:
+        raise ImportError(
+            "No module named 'concurrent.futures'\n"
+            "\n"
+            "This method requires Python 3.2 or newer (or the "
+            "'futures' backport on older versions)."
+        )
+    return concurrent.futures
+
+
+def _map_chunk(func, rows):
+    """Apply *func* to each row in a chunk (runs in a worker process)."""
+    return [func(row) for row in rows]
+
+
+def _parallel_map_rows(reader, func, workers, chunksize, ordered):
+    """Return a generator that yields the header row from *reader*
+    and then the result of *func* for each remaining row. Rows are
+    sent to a pool of *workers* processes in chunks of *chunksize*
+    rows (so each chunk is pickled as a whole) and no more than two
+    chunks per worker are in flight at once. If *ordered* is False,
+    the results of each chunk are yielded as soon as it's finished.
+    The pool is shut down and *reader* is closed when the generator
+    finishes, fails, or is closed.
+    """
+    futures = _import_futures()
+    if not workers:
+        import multiprocessing
+        workers = multiprocessing.cpu_count()
+    max_pending = workers * 2
+
+    try:
+        header = next(reader, None)
+        if header is None:
+            return  # <- EXIT!
+        yield header
+
+        executor = futures.ProcessPoolExecutor(workers)
+        pending = []  # Futures in the order they were submitted.
+        try:
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    chunk = list(islice(reader, chunksize))
+                    if len(chunk) < chunksize:
+                        exhausted = True
+                    if chunk:
+                        pending.append(executor.submit(_map_chunk, func, chunk))
+
+                if not pending:
+                    break
+
+                if ordered:
+                    finished = pending.pop(0)
+                else:
+                    done = futures.wait(pending, return_when=futures.FIRST_COMPLETED)[0]
+                    finished = [x for x in pending if x in done][0]
+                    pending.remove(finished)
+
+                for result in finished.result():  # Re-raises worker errors.
+                    yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+    finally:
+        reader.close()
+
+
+#######################################################################
+# Instrumentation.
+#######################################################################
+
+class _Instrument(object):
+    """Collects statistics about the rows produced by a reader. The
+    optional *bytesfunc* should return the number of bytes read so
+    far. See Reader.instrument() for the other arguments.
+    """
+    def __init__(self, bytesfunc=None, callback=None, every_rows=None,
+                 every_seconds=None):
+        self._bytesfunc = bytesfunc
+        self._callback = callback
+        self._every_rows = every_rows
+        self._every_seconds = every_seconds
+        self._start = _timer()
+        self._stop = None
+        self.rows = 0
+        self.bytes = None
+        self.source_seconds = 0.0
+        self.consumer_seconds = 0.0
+        self.first_row_seconds = None
+
+    def _read_bytes(self):
+        if self._bytesfunc:
+            try:
+                self.bytes = self._bytesfunc()
+            except ValueError:
+                pass  # File is already closed, keep the last value.
+        return self.bytes
+
+    def stats(self):
+        """Return a dictionary of the current statistics."""
+        stop = self._stop if self._stop is not None else _timer()
+        return {
+            'rows': self.rows,
+            'bytes': self._read_bytes(),
+            'source_seconds': self.source_seconds,
+            'consumer_seconds': self.consumer_seconds,
+            'first_row_seconds': self.first_row_seconds,
+            'elapsed_seconds': stop - self._start,
+        }
+
+    def wrap(self, iterator):
+        """Return a generator that yields the rows from *iterator*
+        while recording the time spent inside and outside of it.
+        """
+        timer = _timer
+        callback = self._callback
+        every_rows = self._every_rows
+        every_seconds = self._every_seconds
+        next_rows = every_rows
+        next_time = (self._start + every_seconds) if every_seconds else None
+
+        while True:
+            before = timer()
+            try:
+                row = next(iterator)
+            except StopIteration:
+                self._stop = timer()
+                self.source_seconds += self._stop - before
+                self._read_bytes()
+                if callback:
+                    callback(self.stats())
+                return
+            after = timer()
+            self.source_seconds += after - before
+            self.rows += 1
+            if self.first_row_seconds is None:
+                self.first_row_seconds = after - self._start
+
+            if callback:
+                if next_rows and self.rows >= next_rows:
+                    next_rows += every_rows
+                    callback(self.stats())
+                    after = timer()
+                elif next_time and after >= next_time:
+                    next_time = after + every_seconds
+                    callback(self.stats())
+                    after = timer()
+
+            yield row
+            self.consumer_seconds += timer() - after
+
+
+#######################################################################
+# Hooks.
+#######################################################################
+
+def _source_name(obj):
+    """Return a short string that identifies a data source."""
+    if isinstance(obj, string_types):
+        return obj
+    return '<{0} object at {1:#x}>'.format(type(obj).__name__, id(obj))
+
+
+class _HookRegistry(object):
+    """A registry of functions that are called when readers are
+    created, produce rows, close, or fail. Each hook is called with
+    a dictionary that describes the event::
+
+        def log_event(info):
+            print(info['event'], info['constructor'], info['source'])
+
+        get_reader.hooks.register('on_open', log_event)
+
+    Every event dictionary contains ``'event'``, ``'constructor'``
+    (the constructor's name), ``'source'`` (a path or object
+    description), ``'call'`` (a number that identifies a single
+    constructor call) and ``'time'`` (a timer value). Events are:
+
+    * ``'on_dispatch'``: `get_reader()` has selected a constructor
+    * ``'on_open'``: a constructor returned a reader (``'seconds'``
+      is the time it took)
+    * ``'on_first_row'``: the first row was read (``'seconds'`` is
+      the time since the constructor was called)
+    * ``'on_batch'``: *batch_size* rows (or the final, smaller batch)
+      were read (includes ``'rows'`` and ``'seconds'``)
+    * ``'on_close'``: the reader was closed (includes the total
+      ``'rows'`` and ``'seconds'``)
+    * ``'on_error'``: the constructor or the source raised an error
+      (includes ``'error'``)
+
+    When no hooks are registered, readers are created exactly as
+    they would be without the registry.
+    """
+    events = ('on_dispatch', 'on_open', 'on_first_row', 'on_batch',
+              'on_close', 'on_error')
+    _row_events = ('on_first_row', 'on_batch', 'on_close', 'on_error')
+
+    def __init__(self, batch_size=10000):
+        self.batch_size = batch_size
+        self._hooks = {}  # Maps event name to list of functions.
+        self._calls = 0
+
+    def __bool__(self):
+        return bool(self._hooks)
+
+    def __nonzero__(self):  # Python 2.x support.
+        return self.__bool__()
+
+    def register(self, event, func):
+        """Register *func* to be called for the given *event* and
+        return *func*.
+        """
+        if event not in self.events:
+            msg = 'unknown event {0!r}, must be one of: {1}'
+            raise ValueError(msg.format(event, ', '.join(self.events)))
+        self._hooks.setdefault(event, []).append(func)
+        return func
+
+    def unregister(self, event, func):
+        """Remove *func* from the hooks for the given *event*."""
+        hooks = self._hooks.get(event, [])
+        if func in hooks:
+            hooks.remove(func)
+        if not hooks:
+            self._hooks.pop(event, None)
+
+    def clear(self):
+        """Remove all registered hooks."""
+        self._hooks.clear()
+
+    def emit(self, event, info):
+        """Call the hooks registered for *event* with the *info*
+        dictionary.
+        """
+        hooks = self._hooks.get(event)
+        if hooks:
+            info = dict(info, event=event, time=_timer())
+            for func in list(hooks):
+                func(info)
+
+    def _new_call(self):
+        """Return a new number to identify a constructor call."""
+        self._calls += 1
+        return self._calls
+
+    def call(self, name, constructor, source, args, kwds, call=None):
+        """Call *constructor* with *args* and *kwds* and emit the events
+        for the resulting reader (*source* is the object the reader
+        reads from). If *call* is not given, a new call number is used.
+        """
+        if call is None:
+            call = self._new_call()
+        info = {'constructor': name, 'source': _source_name(source),
+                'call': call}
+        start = _timer()
+        try:
+            reader = constructor(*args, **kwds)
+        except Exception as err:
+            self.emit('on_error', dict(info, error=err, seconds=_timer() - start))
+            raise
+        self.emit('on_open', dict(info, seconds=_timer() - start))
+
+        if any(event in self._hooks for event in self._row_events):
+            counter = [0]
+            reader.__wrapped__ = self._rows(reader.__wrapped__, info, start, counter)
+
+            closefunc = reader._closefunc
+
+            def close():
+                if closefunc:
+                    closefunc()
+                self.emit('on_close', dict(info, rows=counter[0],
+                                           seconds=_timer() - start))
+            reader._closefunc = close
+        return reader
+
+    def _rows(self, iterator, info, start, counter):
+        """Return a generator that yields rows from *iterator* and
+        emits the row events.
+        """
+        batch_size = self.batch_size
+        batch_start = _timer()
+        batch_rows = 0
+        try:
+            for row in iterator:
+                if not counter[0]:
+                    self.emit('on_first_row', dict(info, seconds=_timer() - start))
+                counter[0] += 1
+                batch_rows += 1
+                if batch_rows == batch_size:
+                    now = _timer()
+                    self.emit('on_batch', dict(info, rows=batch_rows,
+                                               seconds=now - batch_start))
+                    batch_start = now
+                    batch_rows = 0
+                yield row
+        except Exception as err:
+            self.emit('on_error', dict(info, error=err, seconds=_timer() - start))
+            raise
+
+        if batch_rows:
+            self.emit('on_batch', dict(info, rows=batch_rows,
+                                       seconds=_timer() - batch_start))
+
+    def add_profiler(self, every=1, memory=False):
+        """Register hooks that profile every *every*-th reader from
+        the time it is opened until it is closed and return a
+        `_Profiler` whose *results* list receives a dictionary for
+        each profiled reader. If *memory* is True, peak memory is
+        measured with tracemalloc instead of profiling with cProfile.
+        """
+        profiler = _Profiler(every, memory)
+        self.register('on_open', profiler.start)
+        self.register('on_close', profiler.stop)
+        return profiler
+
+    def remove_profiler(self, profiler):
+        """Unregister the hooks for a profiler from add_profiler()."""
+        self.unregister('on_open', profiler.start)
+        self.unregister('on_close', profiler.stop)
+
+
+class _Profiler(object):
+    """Sampling profiler for use with _HookRegistry.add_profiler().
+    Each item in *results* is a dictionary with ``'constructor'``,
+    ``'source'`` and ``'seconds'`` plus either ``'stats'`` (a
+    `pstats.Stats` object) or ``'peak_memory'`` (in bytes).
+    """
+    def __init__(self, every=1, memory=False):
+        self.every = every
+        self.memory = memory
+        self.results = []
+        self._count = 0
+        self._active = None  # Tuple of call number and profile object.
+
+    def start(self, info):
+        self._count += 1
+        if self._active or (self._count - 1) % self.every:
+            return  # <- EXIT! Already profiling or not sampled.
+
+        if self.memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                return  # <- EXIT! Memory is traced by someone else.
+            tracemalloc.start()
+            self._active = (info['call'], None)
+        else:
+            import cProfile
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                return  # <- EXIT! Another profiler is active.
+            self._active = (info['call'], profile)
+
+    def stop(self, info):
+        if not self._active or self._active[0] != info['call']:
+            return  # <- EXIT! Reader was not profiled.
+
+        profile = self._active[1]
+        self._active = None
+        result = {'constructor': info['constructor'],
+                  'source': info['source'],
+                  'seconds': info['seconds']}
+        if profile is None:
+            import tracemalloc
+            result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            import pstats
+            profile.disable()
+            result['stats'] = pstats.Stats(profile)
+        self.results.append(result)
+
+
+def _hooked(constructor):
+    """Decorator for GetReaderType constructor methods that passes
+    calls through the hook registry when any hooks are registered.
+    """
+    name = constructor.__name__
+    source_name = constructor.__code__.co_varnames[1]  # After *self*.
+
+    @functools.wraps(constructor)
+    def wrapper(self, *args, **kwds):
+        if not self.hooks:
+            return constructor(self, *args, **kwds)
+        bound = functools.partial(constructor, self)
+        source = args[0] if args else kwds.get(source_name)
+        return self.hooks.call(name, bound, source, args, kwds)
+    wrapper._unhooked = constructor
+    return wrapper
+
+
+#######################################################################
+# Constructor registry.
+#######################################################################
+
+class _LazyConstructor(object):
+    """Wraps an entry point and loads its constructor on first use."""
+    def __init__(self, entry_point):
+        self.entry_point = entry_point
+        self.__name__ = entry_point.name
+        self._func = None
+
+    def __call__(self, obj, *args, **kwds):
+        if self._func is None:
+            self._func = self.entry_point.load()
+        return self._func(obj, *args, **kwds)
+
+
+def _iter_entry_points(group):
+    """Return the installed entry points for *group* (without loading
+    them).
+    """
+    try:
+        from importlib import metadata  # New in version 3.8.
+    except ImportError:
+        try:
+            import pkg_resources
+        except ImportError:
+            return []
+        return list(pkg_resources.iter_entry_points(group))
+
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, 'select'):  # New in version 3.10.
+        return list(entry_points.select(group=group))
+    return list(entry_points.get(group, []))
+
+
+class _ConstructorRegistry(object):
+    """Maps file extensions and object types to reader constructors.
+    A constructor can be the name of a `get_reader` method (like
+    ``'from_csv'``) or a callable that takes an object (plus any
+    additional arguments) and returns a reader::
+
+        get_reader.registry.register_extension('.tsv', read_tsv)
+        get_reader.registry.register_type(MyTable, read_mytable)
+
+    Extensions can be compound (like ``'.csv.gz'``), in which case
+    the longest matching extension is used. Types are matched using
+    the object's method resolution order and the result is cached
+    for each type. A type can also be given as a dotted name (like
+    ``'pandas.DataFrame'``) so that the module doesn't need to be
+    imported until it's used.
+
+    Third-party packages can register constructors with entry points
+    in the ``'get_reader.extensions'`` group (named by extension) or
+    the ``'get_reader.types'`` group (named by dotted type name).
+    Entry points are only read when built-in dispatch fails: for a
+    path with no registered extension or for an object of a
+    non-built-in type that matches no registered type or built-in
+    check (so lists, dictionaries, and other built-in objects never
+    read them). Plugin modules are only imported when they are used.
+    """
+    def __init__(self):
+        self._extensions = {}
+        self._max_parts = 1  # Most parts in a registered extension.
+        self._types = {}
+        self._lazy_types = {}  # Maps module name to list of (name, constructor).
+        self._type_cache = {}
+        self._entry_points_loaded = False
+
+    def register_extension(self, extension, constructor):
+        """Use *constructor* for file paths ending with *extension*."""
+        if not extension.startswith('.'):
+            msg = "extension must start with a period, got {0!r}"
+            raise ValueError(msg.format(extension))
+        extension = extension.lower()
+        self._extensions[extension] = constructor
+        self._max_parts = max(self._max_parts, extension.count('.'))
+
+    def unregister_extension(self, extension):
+        """Remove the constructor for *extension*."""
+        self._extensions.pop(extension.lower(), None)
+
+    def register_type(self, type_, constructor):
+        """Use *constructor* for instances of *type_* (a class or a
+        dotted name like 'package.module.ClassName').
+        """
+        if isinstance(type_, string_types):
+            module_name, _, name = type_.rpartition('.')
+            if not module_name:
+                msg = "type name must include its module, got {0!r}"
+                raise ValueError(msg.format(type_))
+            self._lazy_types.setdefault(module_name, []).append((name, constructor))
+        else:
+            self._types[type_] = constructor
+        self._type_cache.clear()
+
+    def unregister_type(self, type_):
+        """Remove the constructor for *type_* (a class or dotted name)."""
+        if isinstance(type_, string_types):
+            module_name, _, name = type_.rpartition('.')
+            lazy = self._lazy_types.get(module_name, [])
+            lazy[:] = [x for x in lazy if x[0] != name]
+            if not lazy:
+                self._lazy_types.pop(module_name, None)
+            module = sys.modules.get(module_name)
+            type_ = getattr(module, name, None) if module else None
+        self._types.pop(type_, None)
+        self._type_cache.clear()
+
+    def _resolve_lazy_types(self):
+        """Register types whose modules have been imported."""
+        modules = sys.modules
+        for module_name in list(self._lazy_types):
+            module = modules.get(module_name)
+            if module is None:
+                continue
+            for name, constructor in self._lazy_types.pop(module_name):
+                type_ = getattr(module, name, None)
+                if type_ is not None:
+                    self._types[type_] = constructor
+            self._type_cache.clear()
+
+    def for_path(self, path):
+        """Return the constructor for *path* (or None)."""
+        parts = os.path.basename(path).lower().split('.')
+        extensions = self._extensions
+        for index in range(max(len(parts) - self._max_parts, 1), len(parts)):
+            extension = '.' + '.'.join(parts[index:])
+            if extension in extensions:
+                return extensions[extension]
+        return None
+
+    def for_type(self, type_):
+        """Return the constructor for instances of *type_* (or None)."""
+        if self._lazy_types:
+            self._resolve_lazy_types()
+
+        try:
+            return self._type_cache[type_]
+        except KeyError:
+            pass
+
+        constructor = None
+        for base in getattr(type_, '__mro__', (type_,)):
+            if base in self._types:
+                constructor = self._types[base]
+                break
+        self._type_cache[type_] = constructor
+        return constructor
+
+    def cache_type(self, type_, constructor):
+        """Remember the *constructor* found for *type_* by other means
+        (like duck-typing) so later lookups are direct.
+        """
+        self._type_cache[type_] = constructor
+
+    def load_entry_points(self):
+        """Register constructors from installed entry points (only
+        reads them once). Returns True if entry points were read.
+        """
+        if self._entry_points_loaded:
+            return False
+        self._entry_points_loaded = True
+
+        for entry_point in _iter_entry_points('get_reader.extensions'):
+            if entry_point.name.lower() not in self._extensions:
+                self.register_extension(entry_point.name, _LazyConstructor(entry_point))
+
+        for entry_point in _iter_entry_points('get_reader.types'):
+            self.register_type(entry_point.name, _LazyConstructor(entry_point))
+        return True
 
 
 #######################################################################
@@ -460,7 +3361,7 @@ class GetReaderType(object):
 
     * CSV file (string path or file object)
     * iterable of dictionary rows
-    * database connection (should be DBAPI2 compatible)
+    * database connection or cursor (should be DBAPI2 compatible)
     * pandas DataFrame, Series, Index, or MultiIndex
     * squint Select, Query, or Result
 
@@ -498,39 +3399,165 @@ class GetReaderType(object):
 
     If the *obj* type cannot be determined automatically, users can
     call the constructor methods directly.
-    """
-    def __call__(self, obj, *args, **kwds):
-        if isinstance(obj, string_types):
-            lowercase = obj.lower()
 
-            if lowercase.endswith('.csv'):
-                return self.from_csv(obj, *args, **kwds)
+    When *obj* is a file path, a *cache_dir* can be given to keep a
+    compact binary copy of the file's rows. Later reads of an
+    unchanged file (with the same arguments) are loaded from this
+    copy instead of being parsed again. An optional *cache_size*
+    limits the total size of the cache directory in bytes by
+    removing the least-recently-used files::
 
-            if lowercase.endswith('.xlsx') or lowercase.endswith('.xls'):
-                return self.from_excel(obj, *args, **kwds)
+        reader = get_reader('myfile.xlsx', cache_dir='.reader_cache')
 
-            if lowercase.endswith('.dbf'):
-                return self.from_dbf(obj, *args, **kwds)
+    Cached rows are stored with pickle and loading a pickle can run
+    arbitrary code, so only use a *cache_dir* that can't be written
+    to by untrusted users.
+
+    Small files that are read repeatedly can also be kept in memory
+    by calling `get_reader.cached(...)` instead of `get_reader(...)`.
+
+    Functions can be registered with `get_reader.hooks` to trace or
+    profile reader activity (see _HookRegistry for details). Other
+    file formats and types can be supported by adding constructors
+    to `get_reader.registry` (see _ConstructorRegistry for details).
+
+    Rows are normally produced as lists (or tuples for some sources).
+    Use *row_type* to choose ``list``, ``tuple``, or ``'named'``---a
+    compact row class (generated once from the header) whose values
+    can be accessed by position or by column name::
+
+        reader = get_reader('myfile.csv', row_type='named')
+        header = next(reader)
+        for row in reader:
+            print(row.col1, row[1])
+    """
+    cached = _ReaderCache()
+    hooks = _HookRegistry()
+    registry = _ConstructorRegistry()
 
+    def __call__(self, obj, *args, **kwds):
+        row_type = kwds.pop('row_type', None)
+        if row_type is not None:
+            reader = self(obj, *args, **kwds)
+            reader.__wrapped__ = _convert_rows(reader.__wrapped__, row_type)
+            return reader
+
+        cache_dir = kwds.pop('cache_dir', None)
+        if cache_dir:
+            if not isinstance(obj, string_types):
+                raise TypeError('cache_dir requires a file path')
+            cache_size = kwds.pop('cache_size', None)
+            return _from_cache(cache_dir, self, obj, args, kwds, cache_size)
+
+        query = bool(args) or 'table_or_query' in kwds
+        constructor, obj = self._find_constructor(obj, query)
+        if constructor is Reader:
+            name = 'Reader'
+        elif isinstance(constructor, string_types):
+            name = constructor
+            constructor = getattr(self, constructor)
+        else:
+            name = getattr(constructor, '__name__', repr(constructor))
+            constructor = functools.partial(_call_plugin, constructor)
+
+        hooks = self.hooks
+        if hooks:
+            call = hooks._new_call()
+            hooks.emit('on_dispatch', {'constructor': name,
+                                       'source': _source_name(obj),
+                                       'call': call})
+            if constructor is Reader:  # Already seems reader-like.
+                return _from_reader_like(obj, *args, **kwds)
+            if not isinstance(constructor, functools.partial):
+                # Call the undecorated method so the call number is kept.
+                unhooked = getattr(type(self), name)._unhooked
+                constructor = functools.partial(unhooked, self)
+            return hooks.call(name, constructor, obj, (obj,) + args, kwds, call)
+
+        if constructor is Reader:  # Already seems reader-like.
+            return _from_reader_like(obj, *args, **kwds)
+        return constructor(obj, *args, **kwds)
+
+    def peek_schema(self, obj, *args, **kwds):
+        """Return a list of ``(name, type)`` pairs describing the
+        columns of *obj* without reading its records. Arguments are
+        the same as for `get_reader()`. Types are given where the
+        source provides them (otherwise they are None)::
+
+            >>> get_reader.peek_schema('myfile.dbf')
+            [('NAME', 'C'), ('AMOUNT', 'N')]
+
+        Only as much of the source is read as is needed: SQL queries
+        are run with a ``WHERE 1=0`` condition, DBF files read only
+        their header block, XLSX files stream their first two rows,
+        pandas objects use their columns and dtypes, and CSV files
+        (and other sources) read only their first row. The *cache_dir*,
+        *cache_size*, and *row_type* arguments don't change the column
+        names and are ignored.
+        """
+        for name in ('cache_dir', 'cache_size', 'row_type'):
+            kwds.pop(name, None)
+
+        query = bool(args) or 'table_or_query' in kwds
+        constructor, obj = self._find_constructor(obj, query)
+        if isinstance(constructor, string_types):
+            peek = _schema_peekers.get(constructor)
+            if peek:
+                return peek(obj, *args, **kwds)  # <- EXIT!
+            reader = getattr(self, constructor)(obj, *args, **kwds)
+        elif constructor is Reader:
+            reader = _from_reader_like(obj, *args, **kwds)
         else:
+            reader = _call_plugin(constructor, obj, *args, **kwds)
+
+        with reader:
+            header = next(reader, [])
+        return [(name, None) for name in header]
+
+    def _find_constructor(self, obj, query=False):
+        """Return a tuple containing the constructor for *obj* and the
+        object that should be passed to it. The constructor is a
+        method name, a callable from the registry, or the Reader class
+        itself (for objects that are already reader-like). A DBAPI2
+        cursor is only passed to from_sql() if *query* is True (a
+        table or query was given), otherwise its current result set is
+        read like any other iterable.
+        """
+        registry = self.registry
+        if isinstance(obj, string_types):
+            constructor = registry.for_path(obj)
+            if constructor is None and registry.load_entry_points():
+                constructor = registry.for_path(obj)  # <- From a plugin.
+            if constructor is not None:
+                return constructor, obj
+
+        else:
+            obj_type = type(obj)
+            constructor = registry.for_type(obj_type)
+            if constructor is not None:
+                return constructor, obj
+
             if isinstance(obj, file_types) \
                     and getattr(obj, 'name', '').lower().endswith('.csv'):
-                return self.from_csv(obj, *args, **kwds)
+                return 'from_csv', obj
+
+            if isinstance(obj, buffer_types):
+                return 'from_csv', obj
 
             if all(hasattr(obj, x) for x in ('cursor', 'commit', 'close')):
-                return self.from_sql(obj, *args, **kwds)
+                registry.cache_type(obj_type, 'from_sql')
+                return 'from_sql', obj
 
-            squint = sys.modules.get('squint')
-            if squint:
-                if isinstance(obj, (squint.Query,
-                                    squint.Select,
-                                    squint.Result)):
-                    return self.from_squint(obj, *args, **kwds)
+            if query and all(hasattr(obj, x) for x in ('execute', 'fetchone', 'description')):
+                return 'from_sql', obj  # <- DBAPI2 cursor.
 
-            pandas = sys.modules.get('pandas')
-            if pandas:
-                if isinstance(obj, (pandas.DataFrame, pandas.Series, pandas.Index)):
-                    return self.from_pandas(obj, *args, **kwds)
+            # Built-in types are never named by plugins, so entry points
+            # are only read for other types (and before any iteration).
+            if obj_type.__module__ not in ('builtins', '__builtin__') \
+                    and registry.load_entry_points():
+                constructor = registry.for_type(obj_type)  # <- From a plugin.
+                if constructor is not None:
+                    return constructor, obj
 
             if isinstance(obj, Iterable):
                 iterator = iter(obj)
@@ -538,56 +3565,271 @@ class GetReaderType(object):
                 iterator = chain([first_value], iterator)
 
                 if isinstance(first_value, dict):
-                    return self.from_dicts(iterator, *args, **kwds)
+                    return 'from_dicts', iterator
 
                 if isinstance(first_value, (list, tuple)):
-                    return iterator  # Already seems reader-like.
+                    return Reader, iterator
 
         msg = ('unable to determine constructor for {0!r}: specify a '
                'constructor to load, for example get_reader.from_csv(...), '
                'get_reader.from_pandas(...), etc.')
         raise TypeError(msg.format(obj))
 
-    def from_csv(self, csvfile, encoding='utf-8', dialect='excel', **kwds):
+    @_hooked
+    def from_csv(self, csvfile, encoding='utf-8', dialect='excel',
+                 resume_from=None, checkpoint=False,
+                 intern_columns=None, categorical=False,
+                 on_progress=None, progress_interval=1.0, engine='csv',
+                 decode=True, **kwds):
         """Return a reader object which will iterate over lines in
         the given *csvfile*. The *csvfile* can be a string (treated
         as a file path) or any object which supports the iterator
         protocol and returns a string each time its __next__() method
         is called---file objects and list objects are both suitable.
         If *csvfile* is a file object, it should be opened with
-        ``newline=''``.
+        ``newline=''``. The *csvfile* can also be a bytes-like object
+        (bytes, bytearray, or memoryview) containing encoded CSV data
+        which is decoded incrementally as rows are read::
+
+            reader = get_reader.from_csv(payload, encoding='utf-8')
+
+        On Python 2, byte strings are treated as file paths (use a
+        bytearray or memoryview for data).
+
+        If *checkpoint* is True, the reader counts its rows (and, when
+        *csvfile* is a path, tracks the byte offset of the next row)
+        so that `Reader.checkpoint()` can be called. If *resume_from*
+        is given, it should be a token returned by `Reader.checkpoint()`.
+        When *csvfile* is a path, the file is positioned directly at
+        the recorded byte offset rather than re-reading the rows that
+        came before it. Resumed readers can also be checkpointed.
+
+        Columns with many repeated values (country, status, etc.) can
+        share a single string object per distinct value by giving a
+        list of column names or positions as *intern_columns* (or
+        ``'auto'`` to select low-cardinality columns from a sample of
+        rows). If *categorical* is True, these values are replaced
+        with integer codes and the reader's `categories` attribute
+        maps each column name to its list of values (indexed by
+        code)::
+
+            reader = get_reader.from_csv('myfile.csv',
+                                         intern_columns=['country'],
+                                         categorical=True)
+            rows = list(reader)
+            countries = reader.categories['country']
+
+        Checkpoints taken with ``'auto'`` record row counts rather
+        than byte offsets (the sample is read ahead of the rows that
+        have been produced).
+
+        When *csvfile* is a path, *encoding* and *dialect* can be
+        ``'auto'`` to detect them from a sample at the start of the
+        file (using byte order marks, a UTF-8 validity check, and
+        `csv.Sniffer`). Detected values are cached by file path,
+        size, and modification time so repeat reads skip detection.
+
+        When *csvfile* is a path, the reader's `progress` attribute
+        reports the bytes consumed and the file size. If *on_progress*
+        is given, it is called with the current `progress` at most
+        once every *progress_interval* seconds and once more when the
+        reader is exhausted.
+
+        When *csvfile* is a path (or bytes) with no quoted values, the
+        *engine* can be ``'simple'`` to split large chunks of text on
+        newlines and delimiters instead of parsing them with the csv
+        module. As soon as a chunk contains a quote character, the
+        rest of the file is read with the csv module. Dialects that
+        use escape characters or *skipinitialspace* are always read
+        with the csv module. Checkpoints taken with the simple engine
+        record row counts rather than byte offsets.
+
+        If *decode* is False, values are returned as bytes without
+        decoding them (the *encoding* is ignored but a UTF-8 byte
+        order mark is skipped). The data must use an ASCII-compatible
+        encoding. Lines are split as bytes (as with ``engine='simple'``)
+        until a quote character appears, after which the csv module
+        is used with the bytes passed through it as Latin-1 (it only
+        handles text). When *checkpoint* or *resume_from* is given
+        with the default engine, the csv module is used throughout so
+        that byte offsets can be recorded. Use
+        `Reader.decode_columns()` to decode only the columns that are
+        needed as text::
+
+            reader = get_reader.from_csv('myfile.csv', decode=False)
+            reader.decode_columns(['name'])
+
+        When *csvfile* is not a path, it must produce bytes.
         """
-        if isinstance(csvfile, string_types):
-            encoding = _normalize_decoder(encoding)
-            reader, close_file = _from_csv_path(csvfile, encoding, dialect=dialect, **kwds)
-            return Reader(reader, closefunc=close_file)
+        if engine not in ('csv', 'simple'):
+            raise ValueError("engine must be 'csv' or 'simple', got {0!r}".format(engine))
 
-        reader = _from_csv_iterable(csvfile, encoding, dialect=dialect, **kwds)
-        return Reader(reader)
+        checkpoint = checkpoint or bool(resume_from)
+        skip = _resumed_rows(resume_from)
 
-    def from_dicts(self, records, fieldnames=None):
+        if isinstance(csvfile, string_types):
+            if encoding != 'auto':
+                encoding = _normalize_decoder(encoding)
+            offset = resume_from.get('offset') if resume_from else None
+            sizes = {'start': _timer()}
+            reader, close_file, tell = _from_csv_path(
+                csvfile, encoding, dialect=dialect, offset=offset,
+                sizes=sizes, engine=engine, decode=decode,
+                positions=checkpoint, **kwds)
+            bytesfunc = sizes['bytesfunc']
+
+            def closefunc():
+                bytesfunc()  # Record the final position.
+                close_file()
+            reader = Reader(reader, closefunc=closefunc)
+            if intern_columns is True or intern_columns == 'auto':
+                tell = None  # Sampling reads ahead of the caller.
+            if checkpoint:
+                reader._checkpointfunc = _csv_checkpointfunc(
+                    csvfile, encoding, dialect, tell, dict(kwds, decode=decode))
+            reader._bytesfunc = bytesfunc
+            reader._sizes = sizes
+
+            if offset:
+                header, reader.__wrapped__ = iterpeek(reader.__wrapped__)
+                expected = resume_from.get('header')
+                if expected and expected != _header_hash(header):
+                    reader.close()
+                    raise ValueError('header does not match the resume_from token')
+                resume_from = None  # Already positioned at offset.
+        elif encoding == 'auto' or dialect == 'auto':
+            raise ValueError("'auto' encoding or dialect requires a file path")
+        elif isinstance(csvfile, buffer_types):
+            sizes = {'start': _timer()}
+            reader, close_buffer, _ = _from_csv_buffer(
+                csvfile, _normalize_decoder(encoding), dialect=dialect,
+                sizes=sizes, engine=engine, decode=decode, **kwds)
+            reader = Reader(reader, closefunc=close_buffer)
+            reader._bytesfunc = sizes['bytesfunc']
+            reader._sizes = sizes
+        else:
+            if engine == 'simple':
+                raise ValueError("engine='simple' requires a file path or bytes")
+            reader = _from_csv_iterable(
+                csvfile, encoding, dialect=dialect, decode=decode, **kwds)
+            reader = Reader(reader)
+
+        if resume_from:
+            reader = _resume_rows(reader, resume_from)
+        if intern_columns:
+            _intern_columns(reader, intern_columns, categorical)
+        if on_progress:
+            _add_progress(reader, on_progress, progress_interval, skip)
+        if checkpoint:
+            _count_rows(reader, skip)
+        return reader
+
+    @_hooked
+    def from_dicts(self, records, fieldnames=None, resume_from=None,
+                   checkpoint=False):
         """Takes a container of dictionary *records* and returns a
         Reader. This can be thought of as converting a `csv.DictReader`
         into a plain, non-dictionary reader.
         """
         generator = _from_dicts(records, fieldnames=fieldnames)
-        return Reader(generator)
-
-    def from_sql(self, connection, table_or_query):
+        reader = Reader(generator)
+        if resume_from:
+            reader = _resume_rows(reader, resume_from)
+        if checkpoint or resume_from:
+            _count_rows(reader, _resumed_rows(resume_from))
+        return reader
+
+    @_hooked
+    def from_sql(self, connection, table_or_query, parameters=None,
+                 incremental_on=None, since=None, resume_from=None,
+                 checkpoint=False):
         """Return a reader object which will iterate over the records
         from a given database table or over the records returned from
-        a SQL query.
+        a SQL query. When resuming from a checkpoint token with a
+        table name (or with *incremental_on*), previously read records
+        are skipped by the database with a ``LIMIT ... OFFSET`` clause.
+        Otherwise (or if the clause isn't supported), the cursor is
+        scrolled past them if the driver supports it or they are
+        fetched and discarded.
+
+        Query *parameters* are passed to the cursor's execute() method
+        and should use the driver's paramstyle::
+
+            reader = get_reader.from_sql(
+                connection, 'SELECT * FROM mytable WHERE id=?', (42,))
+
+        The *connection* may also be an existing cursor. The cursor is
+        not closed when the reader is finished and it can be reused
+        for many queries---this lets the driver reuse a prepared
+        statement when the same query is executed repeatedly with
+        different parameters::
+
+            cursor = connection.cursor()
+            for key in keys:
+                reader = get_reader.from_sql(cursor, query, (key,))
+                ...  # <- Consume reader before the next query.
+
+        To read only records that were added or changed since a
+        previous read, give a table name and the name of a watermark
+        column as *incremental_on* (a timestamp or an increasing ID).
+        Records are selected where this column is greater than *since*
+        and are returned in watermark order. Once the reader is
+        exhausted, its `watermark` attribute contains the largest
+        value seen (use this as *since* for the next read)::
+
+            reader = get_reader.from_sql(connection, 'mytable',
+                                         incremental_on='updated_at',
+                                         since=last_watermark)
+            for row in reader:
+                ...
+            last_watermark = reader.watermark
         """
-        reader, close_cursor = _from_sql(connection, table_or_query)
-        return Reader(reader, closefunc=close_cursor)
-
-    def from_pandas(self, obj, index=True):
+        skip = _resumed_rows(resume_from)
+
+        if incremental_on:
+            if parameters is not None:
+                msg = 'cannot combine parameters with incremental_on'
+                raise ValueError(msg)
+            query, parameters = _incremental_query(
+                connection, table_or_query, incremental_on, since)
+            offset = True  # Ordered by the watermark column.
+        else:
+            query = table_or_query
+            offset = parameters is None and bool(_table_name_re.match(query))
+
+        reader, close_cursor = _from_sql(
+            connection, query, skip=skip, parameters=parameters, offset=offset)
+        reader = Reader(reader, closefunc=close_cursor)
+
+        if incremental_on:
+            header, rows = iterpeek(reader.__wrapped__)
+            try:
+                index = list(header).index(incremental_on)
+            except ValueError:
+                reader.close()
+                msg = 'incremental_on column {0!r} not found in {1!r}'
+                raise ValueError(msg.format(incremental_on, header))
+            reader.watermark = since
+            reader.__wrapped__ = _watermark_rows(rows, index, weakref.ref(reader))
+
+        if checkpoint or resume_from:
+            _count_rows(reader, skip)
+        return reader
+
+    @_hooked
+    def from_pandas(self, obj, index=True, resume_from=None, checkpoint=False):
         """Return a reader object which will iterate over records in
         a pandas DataFrame, Series, Index, or MultiIndex.
         """
-        return Reader(_from_pandas(obj, index=index))
-
-    def from_squint(self, obj, fieldnames=None):
+        skip = _resumed_rows(resume_from)
+        reader = Reader(_from_pandas(obj, index=index, skip=skip))
+        if checkpoint or resume_from:
+            _count_rows(reader, skip)
+        return reader
+
+    @_hooked
+    def from_squint(self, obj, fieldnames=None, resume_from=None,
+                    checkpoint=False):
         """Return a reader object which will iterate over the records
         returned from a squint Select, Query, or Result. If the
         *fieldnames* argument is not provided, this function tries to
@@ -598,9 +3840,17 @@ class GetReaderType(object):
             This constructor requires the optional, third-party
             library squint.
         """
-        return Reader(_from_squint(obj, fieldnames=fieldnames))
-
-    def from_excel(self, path, worksheet=0):
+        reader = Reader(_from_squint(obj, fieldnames=fieldnames))
+        if resume_from:
+            reader = _resume_rows(reader, resume_from)
+        if checkpoint or resume_from:
+            _count_rows(reader, _resumed_rows(resume_from))
+        return reader
+
+    @_hooked
+    def from_excel(self, path, worksheet=0, resume_from=None,
+                   checkpoint=False, intern_columns=None, categorical=False,
+                   on_progress=None, progress_interval=1.0):
         """Return a reader object which will iterate over lines in the
         given Excel worksheet. The *path* must specify an XLSX or XLS
         file and *worksheet* should specify the index or name of the
@@ -615,25 +3865,367 @@ class GetReaderType(object):
 
             reader = get_reader.from_excel('mydata.xlsx', 'Sheet 2')
 
+        The *resume_from*, *checkpoint*, *intern_columns*,
+        *categorical*, *on_progress*, and *progress_interval* arguments
+        work the same as they do for `from_csv()`---progress is
+        reported in rows (counted when *checkpoint*, *resume_from*, or
+        *on_progress* is given).
+
         .. note::
 
             This constructor requires the optional, third-party
             library xlrd.
         """
-        reader, release_resources = _from_excel(path, worksheet=worksheet)
-        return Reader(reader, closefunc=release_resources)
-
-    def from_dbf(self, filename, encoding=None, **kwds):
+        skip = _resumed_rows(resume_from)
+        sizes = {'start': _timer()}
+        reader, release_resources = _from_excel(
+            path, worksheet=worksheet, skip=skip, sizes=sizes)
+        reader = Reader(reader, closefunc=release_resources)
+        reader._sizes = sizes
+        if intern_columns:
+            _intern_columns(reader, intern_columns, categorical)
+        if on_progress:
+            _add_progress(reader, on_progress, progress_interval, skip)
+        if checkpoint or resume_from:
+            _count_rows(reader, skip)
+        return reader
+
+    @_hooked
+    def from_dbf(self, filename, encoding=None, resume_from=None,
+                 checkpoint=False, intern_columns=None, categorical=False,
+                 on_progress=None, progress_interval=1.0, **kwds):
         """Return a reader object which will iterate over lines in the
-        given DBF file (from dBase, FoxPro, etc.).
+        given DBF file (from dBase, FoxPro, etc.). The *resume_from*,
+        *checkpoint*, *intern_columns*, *categorical*, *on_progress*,
+        and *progress_interval* arguments work the same as they do for
+        `from_csv()`---progress is reported in rows (counted when
+        *checkpoint*, *resume_from*, or *on_progress* is given).
 
         .. note::
 
             This constructor requires the optional, third-party
             library dbfread.
         """
-        reader, close_generator = _from_dbf(filename, encoding=encoding, **kwds)
-        return Reader(reader, closefunc=close_generator)
+        sizes = {'start': _timer()}
+        reader, close_generator = _from_dbf(
+            filename, encoding=encoding, sizes=sizes, **kwds)
+        reader = Reader(reader, closefunc=close_generator)
+        reader._sizes = sizes
+        skip = _resumed_rows(resume_from)
+        if resume_from:
+            reader = _resume_rows(reader, resume_from)
+        if intern_columns:
+            _intern_columns(reader, intern_columns, categorical)
+        if on_progress:
+            _add_progress(reader, on_progress, progress_interval, skip)
+        if checkpoint or resume_from:
+            _count_rows(reader, skip)
+        return reader
+
+
+_schema_peekers = {
+    'from_sql': _peek_sql,
+    'from_pandas': _peek_pandas,
+    'from_excel': _peek_excel,
+    'from_dbf': _peek_dbf,
+}
+
+
+def _call_plugin(constructor, obj, *args, **kwds):
+    """Call a registered *constructor* and return its result as a
+    Reader.
+    """
+    reader = constructor(obj, *args, **kwds)
+    if not isinstance(reader, Reader):
+        reader = Reader(reader)
+    return reader
 
 
 get_reader = GetReaderType()
+
+for _extension in ('.csv', '.csv.gz', '.csv.bz2', '.csv.xz'):
+    get_reader.registry.register_extension(_extension, 'from_csv')
+get_reader.registry.register_extension('.xlsx', 'from_excel')
+get_reader.registry.register_extension('.xls', 'from_excel')
+get_reader.registry.register_extension('.dbf', 'from_dbf')
+
+for _type in ('pandas.DataFrame', 'pandas.Series', 'pandas.Index'):
+    get_reader.registry.register_type(_type, 'from_pandas')
+for _type in ('squint.Query', 'squint.Select', 'squint.Result'):
+    get_reader.registry.register_type(_type, 'from_squint')
+del _extension, _type
+
+
+#######################################################################
+# Writer helper functions.
+#######################################################################
+
+_simple_identifier = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+def _quote_identifier(name):
+    """Return *name* unchanged if it's a simple SQL identifier or
+    return it wrapped in double quotes if it's not.
+    """
+    name = '{0}'.format(name)
+    if _simple_identifier.match(name):
+        return name
+    return '"{0}"'.format(name.replace('"', '""'))
+
+
+def _quote_table_name(name):
+    """Return the table *name* with each of its dot-separated parts
+    (like 'schema.table') quoted if needed. Names that already contain
+    double quotes are assumed to be quoted and are returned unchanged.
+    """
+    name = '{0}'.format(name)
+    if '"' in name:
+        return name
+    return '.'.join(_quote_identifier(part) for part in name.split('.'))
+
+
+def _sql_column_type(values):
+    """Return a column type (INTEGER, REAL, or TEXT) suitable for
+    storing the given *values*.
+    """
+    value_types = set(type(x) for x in values if x is not None)
+    if not value_types:
+        return 'TEXT'
+    if all(issubclass(x, integer_types) for x in value_types):
+        return 'INTEGER'
+    if all(issubclass(x, integer_types + (float,)) for x in value_types):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _create_table_statement(table, header, rows):
+    """Return a CREATE TABLE statement for the given *header* using
+    column types that fit the values in *rows* (a sample of records).
+    """
+    columns = []
+    for index, name in enumerate(header):
+        values = [row[index] for row in rows if len(row) > index]
+        column_type = _sql_column_type(values)
+        columns.append('{0} {1}'.format(_quote_identifier(name), column_type))
+    table = _quote_table_name(table)
+    return 'CREATE TABLE {0} ({1})'.format(table, ', '.join(columns))
+
+
+def _insert_statement(paramstyle, table, header):
+    """Return an INSERT statement for the given *header* and the type
+    of container (tuple or dict) that each record should be given in.
+    """
+    placeholders = []
+    for position in range(1, len(header) + 1):
+        name = 'p{0}'.format(position)
+        placeholder, container = _make_placeholder(paramstyle, name, position)
+        placeholders.append(placeholder)
+
+    statement = 'INSERT INTO {0} ({1}) VALUES ({2})'.format(
+        _quote_table_name(table),
+        ', '.join(_quote_identifier(x) for x in header),
+        ', '.join(placeholders),
+    )
+    return statement, container
+
+
+def _to_sql(connection, table, reader, batch_size=1000, create=False):
+    """Insert the records from *reader* into the given database *table*
+    using executemany() in batches of *batch_size* records. Each batch
+    is committed as its own transaction. Returns a dictionary with the
+    number of rows inserted, the elapsed time, and the rows per second.
+    """
+    start = _timer()
+    rowcount = 0
+    cursor = connection.cursor()
+    try:
+        header = next(reader, None)
+        if not header:
+            return {'rows': 0, 'seconds': 0.0, 'rows_per_second': 0.0}
+
+        first_batch = list(islice(reader, batch_size))
+        if create:
+            cursor.execute(_create_table_statement(table, header, first_batch))
+
+        paramstyle = _get_paramstyle(connection)
+        statement, container = _insert_statement(paramstyle, table, header)
+
+        if container is dict:
+            names = ['p{0}'.format(x) for x in range(1, len(header) + 1)]
+            make_batch = lambda rows: [dict(zip(names, row)) for row in rows]
+        else:
+            make_batch = list
+
+        if first_batch:
+            cursor.executemany(statement, make_batch(first_batch))
+            connection.commit()
+            rowcount += len(first_batch)
+
+        if connection.__class__.__module__ == 'sqlite3' and container is tuple:
+            # Fast path: the sqlite3 module accepts any iterator so
+            # records can be streamed without building intermediate
+            # lists.
+            while True:
+                cursor.executemany(statement, islice(reader, batch_size))
+                if cursor.rowcount < 1:
+                    break
+                connection.commit()
+                rowcount += cursor.rowcount
+        else:
+            while True:
+                batch = make_batch(islice(reader, batch_size))
+                if not batch:
+                    break
+                cursor.executemany(statement, batch)
+                connection.commit()
+                rowcount += len(batch)
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+        reader.close()
+
+    seconds = _timer() - start
+    return {
+        'rows': rowcount,
+        'seconds': seconds,
+        'rows_per_second': (rowcount / seconds) if seconds else 0.0,
+    }
+
+
+def _open_compressed(path, mode, compression='infer'):
+    """Open *path* as a binary file object in the given *mode* ('rb'
+    or 'wb'). The *compression* can be 'gzip', 'bz2', 'xz', None (no
+    compression), or 'infer' to use the file extension.
+    """
+    if compression == 'infer':
+        compression = _infer_compression(path)
+
+    if compression is None:
+        return io.open(path, mode)
+    if compression == 'gzip':
+        import gzip
+        return gzip.GzipFile(path, mode)
+    if compression == 'bz2':
+        import bz2
+        return bz2.BZ2File(path, mode)
+    if compression == 'xz':
+        import lzma  # New in version 3.3.
+        return lzma.LZMAFile(path, mode)
+    raise ValueError('unknown compression {0!r}'.format(compression))
+
+
+def _to_csv(path, reader, encoding='utf-8', dialect='excel',
+             compression='infer', batch_size=10000, **fmtparams):
+    """Write the records from *reader* to a CSV file at *path*. Each
+    batch of *batch_size* records is formatted with writerows() into
+    an in-memory buffer and then encoded and written with a single
+    call. Returns a dictionary with the number of rows written (not
+    counting the header), the elapsed time, and the rows per second.
+    """
+    start = _timer()
+    rowcount = 0
+
+    # The incremental encoder writes any byte order mark only once.
+    encoder = codecs.getincrementalencoder(encoding)()
+    if PY2:
+        buf = io.BytesIO()
+        to_utf8 = lambda x: x.encode('utf-8') if isinstance(x, unicode) else x
+        rows = ([to_utf8(x) for x in row] for row in reader)
+        get_text = lambda: buf.getvalue().decode('utf-8')
+    else:
+        buf = io.StringIO()
+        rows = reader
+        get_text = buf.getvalue
+    writer = csv.writer(buf, dialect=dialect, **fmtparams)
+
+    try:
+        fh = _open_compressed(path, 'wb', compression)
+        try:
+            header = next(rows, None)
+            if header is not None:
+                writer.writerow(header)
+
+            while True:
+                batch = list(islice(rows, batch_size))
+                writer.writerows(batch)
+                fh.write(encoder.encode(get_text()))
+                buf.seek(0)
+                buf.truncate()
+                if not batch:
+                    break
+                rowcount += len(batch)
+
+            fh.write(encoder.encode('', True))
+        finally:
+            fh.close()
+    finally:
+        reader.close()
+
+    seconds = _timer() - start
+    return {
+        'rows': rowcount,
+        'seconds': seconds,
+        'rows_per_second': (rowcount / seconds) if seconds else 0.0,
+    }
+
+
+#######################################################################
+# Get Writer.
+#######################################################################
+class GetWriterType(object):
+    """Write records from a `Reader` (or any object supported by
+    `get_reader()`) to another data store. The writer methods
+    consume the given reader and close it when finished::
+
+        from get_reader import get_writer
+
+        # Load a CSV file into a database table.
+        connection = ...
+        get_writer.to_sql(connection, 'mytable', 'myfile.csv', create=True)
+    """
+    def to_sql(self, connection, table, reader, batch_size=1000, create=False):
+        """Insert records from *reader* into the given database *table*
+        and return a dictionary with the number of ``'rows'`` inserted,
+        the elapsed ``'seconds'``, and the ``'rows_per_second'``. The
+        first row of *reader* must be a header whose values match the
+        table's column names. If *reader* is not a `Reader`, it is
+        passed to `get_reader()` first.
+
+        Table and column names are quoted when they aren't simple
+        identifiers (a dotted *table* name like ``'schema.mytable'``
+        is quoted one part at a time). A *table* name that already
+        contains double quotes is used as given.
+
+        Records are inserted with executemany() in batches of
+        *batch_size* records and each batch is committed as its own
+        transaction. If *create* is True, the table is created using
+        column types based on the values in the first batch.
+        """
+        if not isinstance(reader, Reader):
+            reader = get_reader(reader)
+        return _to_sql(connection, table, reader, batch_size, create)
+
+    def to_csv(self, path, reader, encoding='utf-8', dialect='excel',
+               compression='infer', **fmtparams):
+        """Write records from *reader* to a CSV file at the given *path*
+        and return a dictionary with the number of ``'rows'`` written
+        (not counting the header), the elapsed ``'seconds'``, and the
+        ``'rows_per_second'``. If *reader* is not a `Reader`, it is
+        passed to `get_reader()` first.
+
+        Records are formatted in large batches and written with a
+        single call per batch. The *dialect* and any *fmtparams* are
+        passed to `csv.writer()`. The 'utf-8' encoding writes no byte
+        order mark (BOM), use 'utf-8-sig' to write one. The
+        *compression* can be 'gzip', 'bz2', 'xz', None, or 'infer' to
+        choose one based on the file extension (.gz, .bz2, or .xz)::
+
+            get_writer.to_csv('myfile.csv.gz', reader)
+        """
+        if not isinstance(reader, Reader):
+            reader = get_reader(reader)
+        return _to_csv(path, reader, encoding, dialect, compression, **fmtparams)
+
+
+get_writer = GetWriterType()
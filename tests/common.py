@@ -25,6 +25,16 @@ try:
 except ImportError:
     dbfread = None
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from concurrent import futures  # New in version 3.2.
+except ImportError:
+    futures = None
+
 try:
     import pandas
 except ImportError:
@@ -4,6 +4,7 @@ import csv
 import io
 import os
 import platform
+from itertools import chain
 from .common import (
     unittest,
     PY2,
@@ -20,6 +21,8 @@ from get_reader import (
     _normalize_decoder,
     _from_csv_path,
     _from_csv_iterable,
+    _simple_csv_rows,
+    _simple_dialect,
 )
 
 
@@ -187,6 +190,7 @@ class TestFromCsvIterable(unittest.TestCase):
 
 
 class TestFromCsvPath(unittest.TestCase):
+    engine = 'csv'
     _original_dir = os.path.abspath(os.getcwd())
     _relative_dir = os.path.abspath(os.path.dirname(__file__))
 
@@ -195,8 +199,9 @@ class TestFromCsvPath(unittest.TestCase):
         os.chdir(self._relative_dir)
 
     def test_utf8(self):
-        reader, closefunc = _from_csv_path(
-            'sample_text_utf8.csv', encoding='utf-8', dialect='excel')
+        reader, closefunc, _ = _from_csv_path(
+            'sample_text_utf8.csv', encoding='utf-8', dialect='excel',
+            engine=self.engine)
         self.addCleanup(closefunc)
 
         expected = [
@@ -206,8 +211,9 @@ class TestFromCsvPath(unittest.TestCase):
         self.assertEqual(list(reader), expected)
 
     def test_utf8_with_bom(self):
-        reader, closefunc = _from_csv_path(
-            'sample_text_utf8_bom.csv', encoding='utf-8-sig', dialect='excel')
+        reader, closefunc, _ = _from_csv_path(
+            'sample_text_utf8_bom.csv', encoding='utf-8-sig', dialect='excel',
+            engine=self.engine)
         self.addCleanup(closefunc)
 
         expected = [
@@ -217,8 +223,9 @@ class TestFromCsvPath(unittest.TestCase):
         self.assertEqual(list(reader), expected)
 
     def test_utf16(self):
-        reader, closefunc = _from_csv_path(
-            'sample_text_utf16.csv', encoding='utf-16', dialect='excel')
+        reader, closefunc, _ = _from_csv_path(
+            'sample_text_utf16.csv', encoding='utf-16', dialect='excel',
+            engine=self.engine)
         self.addCleanup(closefunc)
 
         expected = [
@@ -228,8 +235,9 @@ class TestFromCsvPath(unittest.TestCase):
         self.assertEqual(list(reader), expected)
 
     def test_iso88591(self):
-        reader, closefunc = _from_csv_path(
-            'sample_text_iso88591.csv', encoding='iso8859-1', dialect='excel')
+        reader, closefunc, _ = _from_csv_path(
+            'sample_text_iso88591.csv', encoding='iso8859-1', dialect='excel',
+            engine=self.engine)
         self.addCleanup(closefunc)
 
         expected = [
@@ -240,15 +248,17 @@ class TestFromCsvPath(unittest.TestCase):
 
     def test_wrong_encoding(self):
         with self.assertRaises(UnicodeDecodeError):
-            reader, closefunc = _from_csv_path(
-                'sample_text_utf16.csv', encoding='utf-8', dialect='excel')
+            reader, closefunc, _ = _from_csv_path(
+                'sample_text_utf16.csv', encoding='utf-8', dialect='excel',
+                engine=self.engine)
             self.addCleanup(closefunc)
 
             list(reader)  # Trigger evaluation.
 
         with self.assertRaises(UnicodeDecodeError):
-            reader, closefunc = _from_csv_path(
-                'sample_text_iso88591.csv', encoding='ascii', dialect='excel')
+            reader, closefunc, _ = _from_csv_path(
+                'sample_text_iso88591.csv', encoding='ascii', dialect='excel',
+                engine=self.engine)
             self.addCleanup(closefunc)
             list(reader)  # Trigger evaluation.
 
@@ -257,12 +267,129 @@ class TestFromCsvPath(unittest.TestCase):
 
         # Following ISO-8859-1 (mis-identified as UTF-8) doesn't fail on Py 2.x.
         with self.assertRaises(UnicodeDecodeError):
-            reader, closefunc = _from_csv_path(
-                'sample_text_iso88591.csv', encoding='utf-8', dialect='excel')
+            reader, closefunc, _ = _from_csv_path(
+                'sample_text_iso88591.csv', encoding='utf-8', dialect='excel',
+                engine=self.engine)
             self.addCleanup(closefunc)
             list(reader)  # Trigger evaluation.
 
     def test_file_not_found(self):
         with self.assertRaises(FileNotFoundError):
-            reader, _ = _from_csv_path(
-                'missing_file.csv', encoding='iso8859-1', dialect='excel')
+            reader, _, _ = _from_csv_path(
+                'missing_file.csv', encoding='iso8859-1', dialect='excel',
+                engine=self.engine)
+
+
+class TestFromCsvPathSimpleEngine(TestFromCsvPath):
+    engine = 'simple'
+
+
+class TestSimpleDialect(unittest.TestCase):
+    def test_supported(self):
+        self.assertEqual(_simple_dialect('excel', {}), (',', '"'))
+        self.assertEqual(_simple_dialect('excel-tab', {}), ('\t', '"'))
+        self.assertEqual(_simple_dialect('excel', {'delimiter': '|'}), ('|', '"'))
+
+        fmtparams = {'quoting': csv.QUOTE_NONE}
+        self.assertEqual(_simple_dialect('excel', fmtparams), (',', None))
+
+    def test_unsupported(self):
+        self.assertIsNone(_simple_dialect('excel', {'escapechar': '\\'}))
+        self.assertIsNone(_simple_dialect('excel', {'skipinitialspace': True}))
+        self.assertIsNone(_simple_dialect('excel', {'quoting': csv.QUOTE_NONNUMERIC}))
+
+
+@unittest.skipIf(PY2, 'Python 2 csv.reader() does not accept unicode text')
+class TestSimpleCsvRows(unittest.TestCase):
+    def read_rows(self, text, chunk_size=8):
+        """Read *text* with small chunks so rows span chunk boundaries."""
+        stream = io.StringIO(text, newline='')
+        fallback_lines = []
+
+        def fallback(text):
+            lines = chain(io.StringIO(text, newline=''), iter(stream.readline, ''))
+            lines = list(lines)
+            fallback_lines.extend(lines)
+            return csv.reader(lines)
+
+        rows = _simple_csv_rows(stream.read, stream.readline, fallback,
+                                ',', '"', chunk_size=chunk_size)
+        return list(rows), fallback_lines
+
+    def test_matches_csv_reader(self):
+        texts = [
+            'a,b\n1,2\n3,4\n',
+            'a,b\r\n1,2\r\n3,4\r\n',
+            'a,b\n1,2\n3,4',           # No newline at end of file.
+            'a,b\n\n1,2\n\n',        # Blank lines.
+            'a,b\n,\n1,\n,2\n',      # Empty values.
+            'a,b\r\n1,2\r',          # Ends with carriage return.
+            '',
+        ]
+        for text in texts:
+            expected = list(csv.reader(io.StringIO(text, newline='')))
+            rows, _ = self.read_rows(text)
+            self.assertEqual(rows, expected, msg=repr(text))
+
+    def test_no_fallback(self):
+        rows, fallback_lines = self.read_rows('a,b\n1,2\n3,4\n')
+        self.assertEqual(rows, [['a', 'b'], ['1', '2'], ['3', '4']])
+        self.assertEqual(fallback_lines, [])
+
+    def test_quote_fallback(self):
+        text = 'a,b\n1,2\n3,"x,\r\ny"\n5,6\n'
+        rows, fallback_lines = self.read_rows(text)
+        self.assertEqual(rows, [['a', 'b'], ['1', '2'], ['3', 'x,\r\ny'], ['5', '6']])
+        self.assertEqual(fallback_lines[0], '3,"x,\r\n', msg='starts at unread line')
+
+    def test_lone_carriage_return_fallback(self):
+        text = 'a,b\r1,2\r3,4\r'
+        rows, fallback_lines = self.read_rows(text)
+        self.assertEqual(rows, [['a', 'b'], ['1', '2'], ['3', '4']])
+        self.assertTrue(fallback_lines)
+
+    def test_quote_none(self):
+        stream = io.StringIO('a,"b\n1,2"\n', newline='')
+        fallback = lambda text: csv.reader(io.StringIO(text, newline=''))
+        rows = _simple_csv_rows(stream.read, stream.readline, fallback,
+                                ',', None, chunk_size=4)
+        self.assertEqual(list(rows), [['a', '"b'], ['1', '2"']])
+
+    def test_bytes(self):
+        stream = io.BytesIO(b'a,b\r\n1,\xc3\xa6\r\n2,"x"\r\n')
+        fallback = lambda text: [[b'fallback']]
+        rows = _simple_csv_rows(stream.read, stream.readline, fallback,
+                                b',', b'"', chunk_size=12)
+        expected = [[b'a', b'b'], [b'1', b'\xc3\xa6'], [b'fallback']]
+        self.assertEqual(list(rows), expected)
+
+
+@unittest.skipIf(not PY2, 'single-pass decoding is used on Python 2 only')
+class TestSinglePassRows(unittest.TestCase):
+    def test_decode_batches(self):
+        from get_reader import _decode_batches
+        rows = [[b'a', b'b'], [], [b'\xc3\xa6', b''], [b'c']]
+        decoded = list(_decode_batches(iter(rows), 'utf-8', batch_size=3))
+        self.assertEqual(decoded, [['a', 'b'], [], [u'\xe6', ''], ['c']])
+
+    def test_bom_removed(self):
+        from get_reader import _single_pass_rows
+        lines = [b'\xef\xbb\xbfcol1,col2\r\n', b'1,\xc3\xa6\r\n']
+        rows = _single_pass_rows(lines, 'utf-8-sig', 'excel')
+        self.assertEqual(list(rows), [['col1', 'col2'], ['1', u'\xe6']])
+
+    def test_bom_only(self):
+        from get_reader import _single_pass_rows
+        rows = _single_pass_rows([b'\xef\xbb\xbf'], 'utf-8-sig', 'excel')
+        self.assertEqual(list(rows), [])
+
+    def test_buffered_stream(self):
+        stream = io.BufferedReader(io.BytesIO(b'col1,col2\r\n1,"a\r\nb"\r\n'))
+        reader = _from_csv_iterable(stream, encoding='utf-8', dialect='excel')
+        self.assertEqual(list(reader), [['col1', 'col2'], ['1', 'a\r\nb']])
+
+    def test_carriage_return_line_endings(self):
+        """Bare CR line endings need the codecs StreamReader."""
+        stream = io.BufferedReader(io.BytesIO(b'col1,col2\r1,a\r2,b\r'))
+        reader = _from_csv_iterable(stream, encoding='utf-8', dialect='excel')
+        self.assertEqual(list(reader), [['col1', 'col2'], ['1', 'a'], ['2', 'b']])
@@ -1,11 +1,16 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
+import sys
+import types
 from .common import (
     unittest,
     sqlite3,
 )
 
 from get_reader import _from_sql
+from get_reader import _get_paramstyle
+from get_reader import _incremental_query
+from get_reader import get_reader
 
 
 @unittest.skipIf(not sqlite3, 'sqlite3 not found')
@@ -144,3 +149,130 @@ class TestFromSql(unittest.TestCase):
             pass
 
         self.assertTrue(log['is_closed'], msg='internal cursor should be closed on error')
+
+    def test_parameters(self):
+        query = 'SELECT * FROM mytable WHERE foo=? AND bar > ?;'
+        reader, _ = _from_sql(self.connection, query, parameters=('b', 2.6))
+        self.assertEqual(list(reader), [('foo', 'bar'), ('b', 3.0)])
+
+    def test_existing_cursor(self):
+        """Given cursors should be reused and should not be closed."""
+        cursor = self.connection.cursor()
+        query = 'SELECT * FROM mytable WHERE bar > ?;'
+
+        reader, closefunc = _from_sql(cursor, query, parameters=(2.6,))
+        self.assertIsNone(closefunc)
+        self.assertEqual(list(reader), [('foo', 'bar'), ('b', 3.0)])
+
+        reader, closefunc = _from_sql(cursor, query, parameters=(2.0,))
+        self.assertEqual(list(reader), [('foo', 'bar'), ('b', 2.5), ('b', 3.0)])
+
+    def test_existing_cursor_on_error(self):
+        log = {'is_closed': False}
+
+        class MockCursor(object):
+            def execute(_self, *args, **kwds):
+                raise Exception('Failed execution!')
+
+            def close(_self):
+                log['is_closed'] = True
+
+        with self.assertRaises(Exception):
+            _from_sql(MockCursor(), 'SELECT 1;', parameters=())
+        self.assertFalse(log['is_closed'], msg='given cursor should be left open')
+
+
+class TestIncrementalQuery(unittest.TestCase):
+    @unittest.skipIf(not sqlite3, 'sqlite3 not found')
+    def test_get_paramstyle(self):
+        connection = sqlite3.connect(':memory:')
+        self.assertEqual(_get_paramstyle(connection), 'qmark')
+
+    def test_paramstyles(self):
+        class MockConnection(object):
+            pass
+
+        connection = MockConnection()
+        connection.__class__.__module__ = 'mockdriver.connections'
+        sys.modules['mockdriver'] = module = types.ModuleType('mockdriver')
+        self.addCleanup(lambda: sys.modules.pop('mockdriver'))
+
+        module.paramstyle = 'pyformat'
+        query, parameters = _incremental_query(connection, 'tbl', 'col', 5)
+        self.assertEqual(
+            query, 'SELECT * FROM tbl WHERE col > %(since)s ORDER BY col')
+        self.assertEqual(parameters, {'since': 5})
+
+        module.paramstyle = 'numeric'
+        query, parameters = _incremental_query(connection, 'tbl', 'col', 5)
+        self.assertEqual(query, 'SELECT * FROM tbl WHERE col > :1 ORDER BY col')
+        self.assertEqual(parameters, (5,))
+
+    def test_no_since(self):
+        query, parameters = _incremental_query(None, 'tbl', 'col')
+        self.assertEqual(query, 'SELECT * FROM tbl ORDER BY col')
+        self.assertIsNone(parameters)
+
+
+@unittest.skipIf(not sqlite3, 'sqlite3 not found')
+class TestFromSqlIncremental(unittest.TestCase):
+    def setUp(self):
+        connection = sqlite3.connect(':memory:')
+        connection.executescript("""
+            CREATE TABLE mytable (
+                foo TEXT,
+                updated INTEGER
+            );
+            INSERT INTO mytable
+            VALUES ('a', 3),
+                   ('b', 1),
+                   ('c', 2);
+        """)
+        self.connection = connection
+
+    def test_all_records(self):
+        reader = get_reader.from_sql(self.connection, 'mytable',
+                                     incremental_on='updated')
+        self.assertIsNone(reader.watermark)
+
+        expected = [('foo', 'updated'), ('b', 1), ('c', 2), ('a', 3)]
+        self.assertEqual(list(reader), expected)
+        self.assertEqual(reader.watermark, 3)
+
+    def test_since(self):
+        reader = get_reader.from_sql(self.connection, 'mytable',
+                                     incremental_on='updated', since=1)
+        expected = [('foo', 'updated'), ('c', 2), ('a', 3)]
+        self.assertEqual(list(reader), expected)
+        self.assertEqual(reader.watermark, 3)
+
+    def test_no_new_records(self):
+        reader = get_reader.from_sql(self.connection, 'mytable',
+                                     incremental_on='updated', since=3)
+        self.assertEqual(list(reader), [('foo', 'updated')])
+        self.assertEqual(reader.watermark, 3, msg='should keep *since* value')
+
+    def test_quoted_names(self):
+        self.connection.executescript("""
+            CREATE TABLE "My Table" ("Updated At" INTEGER, foo TEXT);
+            INSERT INTO "My Table" VALUES (2, 'x'), (1, 'y');
+        """)
+        reader = get_reader.from_sql(self.connection, 'My Table',
+                                     incremental_on='Updated At')
+        expected = [('Updated At', 'foo'), (1, 'y'), (2, 'x')]
+        self.assertEqual(list(reader), expected)
+        self.assertEqual(reader.watermark, 2)
+
+    def test_injection(self):
+        with self.assertRaises(Exception):
+            list(get_reader.from_sql(self.connection, 'mytable',
+                                     incremental_on='updated; DROP TABLE mytable'))
+        self.assertEqual(len(list(get_reader(self.connection, 'mytable'))), 4)
+
+    def test_column_not_in_header(self):
+        """SQLite accepts 'UPDATED' in the query but the header uses
+        the declared name 'updated'.
+        """
+        with self.assertRaises(ValueError):
+            get_reader.from_sql(self.connection, 'mytable',
+                                incremental_on='UPDATED')
@@ -1,6 +1,15 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
+import gzip
+import io
 import os
+import shutil
+import sys
+import types
+import tempfile
+import weakref
+from array import array
+from itertools import islice
 from .common import (
     unittest,
     sqlite3,
@@ -15,6 +24,13 @@ from .common import (
 
 from get_reader import Reader
 from get_reader import get_reader
+from get_reader import _write_chunk
+from get_reader import _ColumnarRows
+from get_reader import _ReaderCache
+from get_reader import _compact_column
+from get_reader import _ConstructorRegistry
+from get_reader import _sniff_cache
+from get_reader import _sniff_encoding
 
 
 class TestFunctionDispatching(unittest.TestCase):
@@ -107,6 +123,14 @@ class TestFunctionDispatching(unittest.TestCase):
         ]
         self.assertEqual(list(reader), expected)
 
+        cursor = connection.cursor()
+        reader = get_reader(cursor, 'SELECT * FROM mytable WHERE bar > ?', (2.6,))
+        self.assertEqual(list(reader), [('foo', 'bar'), ('b', 3.0)])
+
+        cursor.execute('SELECT * FROM mytable WHERE bar > ?', (2.0,))
+        reader = get_reader(cursor)  # <- Already executed, no query.
+        self.assertEqual(list(reader), [('b', 2.5), ('b', 3.0)])
+
     @unittest.skipIf(not pandas, 'pandas not found')
     def test_pandas(self):
         df = pandas.DataFrame({
@@ -220,3 +244,1073 @@ class TestFunctionDispatching(unittest.TestCase):
 
         with self.assertRaises(TypeError):
             get_reader([object(), object()])
+
+
+class TestResumeFrom(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(lambda: os.remove(self.path))
+        with io.open(fd, 'wb') as fh:
+            fh.write(b'col1,col2\r\n1,a\r\n2,"b\r\nb"\r\n3,c\r\n4,d\r\n')
+
+    def test_csv_path(self):
+        reader = get_reader(self.path, checkpoint=True)
+        self.assertEqual(next(reader), ['col1', 'col2'])
+        self.assertEqual(next(reader), ['1', 'a'])
+        self.assertEqual(next(reader), ['2', 'b\r\nb'])
+        token = reader.checkpoint()
+        reader.close()
+
+        self.assertEqual(token['rows'], 3)
+        if not PY2:
+            self.assertEqual(token['offset'], 26, msg='byte offset of next row')
+
+        reader = get_reader(self.path, resume_from=token)
+        expected = [['col1', 'col2'], ['3', 'c'], ['4', 'd']]
+        self.assertEqual(list(reader), expected)
+        self.assertEqual(reader.checkpoint()['rows'], 5)
+
+    def test_csv_intern_auto(self):
+        with io.open(self.path, 'wb') as fh:
+            fh.write(b'id,country\r\n')
+            for i in range(1500):
+                fh.write('{0},Canada\r\n'.format(i).encode('ascii'))
+
+        reader = get_reader(self.path, intern_columns='auto', checkpoint=True)
+        rows = list(islice(reader, 11))
+        self.assertEqual(rows[-1], ['9', 'Canada'])
+        token = reader.checkpoint()
+        reader.close()
+        self.assertEqual(token['rows'], 11)
+        self.assertNotIn('offset', token, msg='sample was read ahead of the caller')
+
+        reader = get_reader(self.path, intern_columns='auto', resume_from=token)
+        self.assertEqual(next(reader), ['id', 'country'])
+        self.assertEqual(next(reader), ['10', 'Canada'])
+        self.assertEqual(len(list(reader)), 1489)
+
+    def test_csv_header_mismatch(self):
+        reader = get_reader(self.path, checkpoint=True)
+        list(islice(reader, 3))
+        token = reader.checkpoint()
+        reader.close()
+
+        token['header'] = 'not-a-matching-hash'
+        with self.assertRaises(ValueError):
+            get_reader(self.path, resume_from=token)
+
+    def test_dicts(self):
+        records = [{'col1': 'a'}, {'col1': 'b'}, {'col1': 'c'}]
+        reader = get_reader(records, checkpoint=True)
+        list(islice(reader, 2))
+        token = reader.checkpoint()
+
+        reader = get_reader(records, resume_from=token)
+        self.assertEqual(list(reader), [['col1'], ['b'], ['c']])
+
+    @unittest.skipIf(not sqlite3, 'sqlite3 not found')
+    def test_sql(self):
+        connection = sqlite3.connect(':memory:')
+        connection.executescript("""
+            CREATE TABLE mytable (foo TEXT);
+            INSERT INTO mytable VALUES ('a'), ('b'), ('c');
+        """)
+        reader = get_reader(connection, 'mytable', checkpoint=True)
+        list(islice(reader, 2))
+        token = reader.checkpoint()
+        reader.close()
+
+        statements = []
+        if hasattr(connection, 'set_trace_callback'):  # New in version 3.3.
+            connection.set_trace_callback(statements.append)
+        reader = get_reader(connection, 'mytable', resume_from=token)
+        self.assertEqual(list(reader), [('foo',), ('b',), ('c',)])
+        if statements:
+            self.assertIn('OFFSET 1', statements[-1], msg='skipped by the database')
+
+    @unittest.skipIf(not sqlite3, 'sqlite3 not found')
+    def test_sql_incremental(self):
+        connection = sqlite3.connect(':memory:')
+        connection.executescript("""
+            CREATE TABLE mytable (foo TEXT, updated INTEGER);
+            INSERT INTO mytable VALUES ('a', 1), ('b', 2), ('c', 3);
+        """)
+        reader = get_reader.from_sql(connection, 'mytable', incremental_on='updated',
+                                     since=1, checkpoint=True)
+        list(islice(reader, 2))
+        token = reader.checkpoint()
+        reader.close()
+
+        reader = get_reader.from_sql(connection, 'mytable', incremental_on='updated',
+                                     since=1, resume_from=token)
+        self.assertEqual(list(reader), [('foo', 'updated'), ('c', 3)])
+        self.assertEqual(reader.watermark, 3)
+
+    @unittest.skipIf(not sqlite3, 'sqlite3 not found')
+    def test_sql_query(self):
+        connection = sqlite3.connect(':memory:')
+        connection.executescript("""
+            CREATE TABLE mytable (foo TEXT);
+            INSERT INTO mytable VALUES ('a'), ('b'), ('c');
+        """)
+        query = 'SELECT foo FROM mytable ORDER BY foo'
+        token = {'rows': 2}
+        reader = get_reader(connection, query, resume_from=token)
+        self.assertEqual(list(reader), [('foo',), ('b',), ('c',)])
+
+    def test_reader_like(self):
+        rows = [['col1'], ['a'], ['b'], ['c']]
+        reader = get_reader(rows, checkpoint=True)
+        list(islice(reader, 2))
+        token = reader.checkpoint()
+        self.assertEqual(token, {'rows': 2})
+
+        reader = get_reader(rows, resume_from=token)
+        self.assertEqual(list(reader), [['col1'], ['b'], ['c']])
+        self.assertEqual(reader.checkpoint(), {'rows': 4})
+
+        with self.assertRaises(TypeError):
+            get_reader(rows, encoding='utf-8')  # <- Unexpected argument.
+
+
+class TestCacheDir(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(lambda: shutil.rmtree(self.tempdir))
+
+        self.cache_dir = os.path.join(self.tempdir, 'cache')
+        self.path = os.path.join(self.tempdir, 'myfile.csv')
+        with io.open(self.path, 'wb') as fh:
+            fh.write(b'col1,col2\r\n1,a\r\n2,b\r\n')
+
+    def sidecars(self):
+        return sorted(x for x in os.listdir(self.cache_dir) if x.endswith('.rows'))
+
+    def test_write_and_read_sidecar(self):
+        expected = [['col1', 'col2'], ['1', 'a'], ['2', 'b']]
+
+        reader = get_reader(self.path, cache_dir=self.cache_dir)
+        self.assertEqual(list(reader), expected)
+        self.assertEqual(len(self.sidecars()), 1)
+
+        reader = get_reader(self.path, cache_dir=self.cache_dir)
+        self.assertEqual(list(reader), expected)
+        self.assertEqual(len(self.sidecars()), 1)
+
+    def test_sidecar_is_used(self):
+        list(get_reader(self.path, cache_dir=self.cache_dir))
+        sidecar = os.path.join(self.cache_dir, self.sidecars()[0])
+
+        # Replace sidecar contents to prove that it's being read.
+        with io.open(sidecar, 'wb') as fh:
+            _write_chunk(fh, [['x'], ['from cache']])
+
+        reader = get_reader(self.path, cache_dir=self.cache_dir)
+        self.assertEqual(list(reader), [['x'], ['from cache']])
+
+    def test_invalidation(self):
+        list(get_reader(self.path, cache_dir=self.cache_dir))
+        old_sidecars = self.sidecars()
+
+        with io.open(self.path, 'ab') as fh:
+            fh.write(b'3,c\r\n')
+
+        reader = get_reader(self.path, cache_dir=self.cache_dir)
+        self.assertEqual(list(reader)[-1], ['3', 'c'])
+        self.assertEqual(len(self.sidecars()), 1, msg='stale sidecar removed')
+        self.assertNotEqual(self.sidecars(), old_sidecars)
+
+    def test_partial_read(self):
+        reader = get_reader(self.path, cache_dir=self.cache_dir)
+        next(reader)
+        reader.close()
+        self.assertEqual(os.listdir(self.cache_dir), [],
+                         msg='partially read sidecars are discarded')
+
+    def test_eviction(self):
+        other_path = os.path.join(self.tempdir, 'other.csv')
+        with io.open(other_path, 'wb') as fh:
+            fh.write(b'col1\r\nx\r\n')
+
+        list(get_reader(self.path, cache_dir=self.cache_dir))
+        list(get_reader(other_path, cache_dir=self.cache_dir, cache_size=1))
+        self.assertEqual(len(self.sidecars()), 1, msg='oldest file evicted')
+
+        reader = get_reader(other_path, cache_dir=self.cache_dir)
+        self.assertEqual(list(reader), [['col1'], ['x']])
+
+    def test_callbacks_not_in_key(self):
+        reports = []
+        reader = get_reader(self.path, cache_dir=self.cache_dir,
+                            on_progress=reports.append)
+        list(reader)
+        reader = get_reader(self.path, cache_dir=self.cache_dir,
+                            on_progress=lambda progress: reports.append(progress))
+        self.assertEqual(list(reader)[-1], ['2', 'b'])
+        self.assertEqual(len(self.sidecars()), 1, msg='callback should not change key')
+        self.assertEqual(reports[-1]['rows'], 3)
+
+    def test_checkpoint(self):
+        expected = [['col1', 'col2'], ['1', 'a'], ['2', 'b']]
+        for _ in range(2):  # <- Cache miss, then hit.
+            reader = get_reader(self.path, cache_dir=self.cache_dir, checkpoint=True)
+            self.assertEqual(next(reader), expected[0])
+            self.assertEqual(reader.checkpoint(), {'rows': 1})
+            self.assertEqual(list(reader), expected[1:])
+        self.assertEqual(len(self.sidecars()), 1)
+
+    def test_concurrent_misses(self):
+        expected = [['col1', 'col2'], ['1', 'a'], ['2', 'b']]
+        first = get_reader(self.path, cache_dir=self.cache_dir)
+        second = get_reader(self.path, cache_dir=self.cache_dir)
+        self.assertEqual(next(first), expected[0])
+        self.assertEqual(list(second), expected)
+        self.assertEqual(list(first), expected[1:])
+        self.assertEqual(len(self.sidecars()), 1)
+
+        os.remove(os.path.join(self.cache_dir, self.sidecars()[0]))  # <- Force misses.
+        third = get_reader(self.path, cache_dir=self.cache_dir)
+        fourth = get_reader(self.path, cache_dir=self.cache_dir)
+        next(third)
+        self.assertEqual(list(fourth), expected)
+        third.close()  # <- Partial read, discards only its own file.
+        self.assertEqual(len(self.sidecars()), 1)
+
+        leftovers = [x for x in os.listdir(self.cache_dir) if x.endswith('.tmp')]
+        self.assertEqual(leftovers, [])
+
+    def test_categorical(self):
+        with io.open(self.path, 'wb') as fh:
+            fh.write(b'col1,col2\r\n1,a\r\n2,b\r\n3,a\r\n')
+
+        expected = [['col1', 'col2'], ['1', 0], ['2', 1], ['3', 0]]
+        for _ in range(2):  # <- Cache miss, then hit.
+            reader = get_reader(self.path, cache_dir=self.cache_dir,
+                                intern_columns=['col2'], categorical=True)
+            self.assertEqual(list(reader), expected)
+            self.assertEqual(reader.categories, {'col2': ['a', 'b']})
+        self.assertEqual(len(self.sidecars()), 1)
+
+    def test_requires_path(self):
+        with self.assertRaises(TypeError):
+            get_reader([['col1'], ['x']], cache_dir=self.cache_dir)
+
+
+class TestCached(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(lambda: shutil.rmtree(self.tempdir))
+
+        self.path = os.path.join(self.tempdir, 'lookup.csv')
+        with io.open(self.path, 'wb') as fh:
+            fh.write(b'col1,col2\r\n1,a\r\n2,a\r\n')
+
+        self.cache = _ReaderCache()
+
+    def test_hits_and_misses(self):
+        expected = [['col1', 'col2'], ['1', 'a'], ['2', 'a']]
+
+        reader = self.cache(self.path)
+        self.assertIsInstance(reader, Reader)
+        self.assertEqual(list(reader), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+
+        reader = self.cache(self.path)
+        self.assertEqual(list(reader), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_fresh_rows(self):
+        reader = self.cache(self.path)
+        header = next(reader)
+        header.append('changed!')  # <- Should not change cached header.
+        self.assertEqual(next(self.cache(self.path)), ['col1', 'col2'])
+
+    def test_invalidation(self):
+        list(self.cache(self.path))
+        with io.open(self.path, 'ab') as fh:
+            fh.write(b'3,b\r\n')
+
+        reader = self.cache(self.path)
+        self.assertEqual(list(reader)[-1], ['3', 'b'])
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_memory_budget(self):
+        other_path = os.path.join(self.tempdir, 'other.csv')
+        with io.open(other_path, 'wb') as fh:
+            fh.write(b'col1\r\nx\r\n')
+
+        list(self.cache(self.path))
+        self.cache.max_bytes = self.cache.nbytes  # <- Room for one file only.
+
+        list(self.cache(other_path))
+        list(self.cache(self.path))
+        self.assertEqual(self.cache.misses, 3, msg='first file was evicted')
+
+    def test_clear(self):
+        list(self.cache(self.path))
+        self.cache.clear()
+        self.assertEqual(self.cache.nbytes, 0)
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+
+    def test_process_wide_instance(self):
+        self.assertIsInstance(get_reader.cached, _ReaderCache)
+
+
+class TestColumnarRows(unittest.TestCase):
+    def test_compact_column(self):
+        self.assertIsInstance(_compact_column([1, 2, 3]), array)
+        self.assertIsInstance(_compact_column([1.5, 2.5]), array)
+        self.assertEqual(_compact_column([True, False]), (True, False))
+
+        column = _compact_column(['x', ''.join(['x'])])
+        self.assertIs(column[0], column[1], msg='should share one object')
+
+    def test_roundtrip(self):
+        rows = [('A', 'B'), (1, 'x'), (2, 1.5), (3, None)]
+        self.assertEqual(list(_ColumnarRows(iter(rows))), [['A', 'B']] + rows[1:])
+
+        rows = [['A', 'B'], [1, 'x'], [2]]  # <- Ragged rows.
+        self.assertEqual(list(_ColumnarRows(iter(rows))), rows)
+
+        rows = [['A']]  # <- Header only.
+        self.assertEqual(list(_ColumnarRows(iter(rows))), rows)
+
+    def test_chunks(self):
+        rows = [['A', 'B']] + [[x, 'x'] for x in range(5)] + [['y', 1.5]] * 5
+        materialized = _ColumnarRows(iter(rows), chunk_size=4)
+        self.assertEqual(list(materialized), rows)
+        self.assertIsInstance(materialized.columns[1], tuple)
+
+        rows = [['A', 'B']] + [[x, 'x'] for x in range(5)] + [[5]]  # <- Ragged.
+        self.assertEqual(list(_ColumnarRows(iter(rows), chunk_size=2)), rows)
+
+    def test_rows_not_retained(self):
+        class Row(list):  # <- Subclass so rows can be weakly referenced.
+            pass
+
+        live = [0]  # Number of rows that haven't been freed.
+        most_live = [0]
+        refs = []
+
+        def freed(ref):
+            live[0] -= 1
+
+        def generate():
+            yield ['A', 'B']
+            for x in range(1000):
+                row = Row([x, 'x'])
+                refs.append(weakref.ref(row, freed))
+                live[0] += 1
+                most_live[0] = max(most_live[0], live[0])
+                yield row
+
+        materialized = _ColumnarRows(generate(), chunk_size=100)
+        self.assertLessEqual(most_live[0], 101, msg='rows kept one chunk at a time')
+        self.assertIsInstance(materialized.columns[0], array)
+        self.assertEqual(len(materialized.columns[0]), 1000)
+        self.assertEqual(list(materialized)[-1], [999, 'x'])
+
+
+class TestRowType(unittest.TestCase):
+    def test_row_type(self):
+        records = [{'col1': 'a'}, {'col1': 'b'}]
+
+        reader = get_reader(records, row_type=tuple)
+        self.assertIsInstance(reader, Reader)
+        self.assertEqual(list(reader), [('col1',), ('a',), ('b',)])
+
+        reader = get_reader(records, row_type='named')
+        header = next(reader)
+        self.assertEqual([row.col1 for row in reader], ['a', 'b'])
+
+    def test_named_csv_blank_line(self):
+        csvfile = ['col1,col2\r\n', '1,a\r\n', '\r\n', '2,b\r\n']
+        reader = get_reader.from_csv(csvfile)
+        reader = get_reader(reader, row_type='named')
+        self.assertEqual(next(reader), ('col1', 'col2'))
+        self.assertEqual([row.col2 for row in reader], ['a', 'b'])
+
+
+class TestInternColumns(unittest.TestCase):
+    def setUp(self):
+        self.csvdata = [
+            'id,country\r\n',
+            '1,Canada\r\n',
+            '2,Mexico\r\n',
+            '3,Canada\r\n',
+            '4,Canada\r\n',
+        ]
+
+    def test_shared_values(self):
+        reader = get_reader.from_csv(self.csvdata, intern_columns=['country'])
+        rows = list(reader)
+        self.assertEqual(rows[0], ['id', 'country'])
+        self.assertEqual([row[1] for row in rows[1:]],
+                         ['Canada', 'Mexico', 'Canada', 'Canada'])
+        self.assertIs(rows[1][1], rows[3][1])
+        self.assertIs(rows[1][1], rows[4][1])
+
+    def test_position(self):
+        reader = get_reader.from_csv(self.csvdata, intern_columns=[1])
+        rows = list(reader)
+        self.assertIs(rows[1][1], rows[3][1])
+
+    def test_categorical(self):
+        reader = get_reader.from_csv(self.csvdata, intern_columns=['country'],
+                                     categorical=True)
+        rows = list(reader)
+        self.assertEqual(rows, [['id', 'country'],
+                                ['1', 0], ['2', 1], ['3', 0], ['4', 0]])
+        self.assertEqual(reader.categories, {'country': ['Canada', 'Mexico']})
+
+    def test_auto(self):
+        reader = get_reader.from_csv(self.csvdata, intern_columns='auto',
+                                     categorical=True)
+        rows = list(reader)
+        self.assertEqual([row[0] for row in rows], ['id', '1', '2', '3', '4'])
+        self.assertEqual(reader.categories, {'country': ['Canada', 'Mexico']})
+
+    def test_unknown_column(self):
+        reader = get_reader.from_csv(self.csvdata, intern_columns=['missing'])
+        with self.assertRaises(ValueError):
+            list(reader)
+
+
+class TestInstrument(unittest.TestCase):
+    def setUp(self):
+        self._orig_dir = os.getcwd()
+        os.chdir(os.path.dirname(__file__) or '.')
+
+        def restore_dir():
+            os.chdir(self._orig_dir)
+        self.addCleanup(restore_dir)
+
+    @unittest.skipIf(PY2, 'file positions are not available on Python 2')
+    def test_csv_bytes(self):
+        reader = get_reader('sample_text_utf8.csv', encoding='utf-8').instrument()
+        list(reader)
+        self.assertEqual(reader.stats['bytes'], os.path.getsize('sample_text_utf8.csv'))
+
+
+class TestKeywordArguments(unittest.TestCase):
+    """Constructors accept their source as a keyword argument, with
+    or without hooks registered.
+    """
+    def setUp(self):
+        self._orig_dir = os.getcwd()
+        os.chdir(os.path.dirname(__file__) or '.')
+
+        def restore_dir():
+            os.chdir(self._orig_dir)
+        self.addCleanup(restore_dir)
+        self.addCleanup(get_reader.hooks.clear)
+
+    def assertConstructors(self):
+        reader = get_reader.from_csv(csvfile='sample_text_utf8.csv')
+        self.assertEqual(next(reader), ['col1', 'col2'])
+        reader.close()
+
+        reader = get_reader.from_dicts(records=[{'A': 'x'}])
+        self.assertEqual(list(reader), [['A'], ['x']])
+
+        if sqlite3:
+            connection = sqlite3.connect(':memory:')
+            connection.execute('CREATE TABLE mytable (foo TEXT)')
+            reader = get_reader.from_sql(connection=connection,
+                                         table_or_query='mytable')
+            self.assertEqual(list(reader), [('foo',)])
+
+        if xlrd:
+            reader = get_reader.from_excel(path='sample_excel1997.xls')
+            self.assertEqual(next(reader), ['col1', 'col2'])
+            reader.close()
+
+        if dbfread:
+            reader = get_reader.from_dbf(filename='sample_dbase.dbf')
+            self.assertEqual(next(reader), ['COL1', 'COL2'])
+            reader.close()
+
+        if pandas:
+            df = pandas.DataFrame({'A': ['x']})
+            reader = get_reader.from_pandas(obj=df, index=False)
+            self.assertEqual(list(reader), [['A'], ['x']])
+
+    def test_without_hooks(self):
+        self.assertConstructors()
+
+    def test_with_hooks(self):
+        events = []
+        get_reader.hooks.register('on_open', events.append)
+        self.assertConstructors()
+        self.assertEqual(events[0]['source'], 'sample_text_utf8.csv')
+        self.assertEqual(events[0]['constructor'], 'from_csv')
+
+
+class TestHooks(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.addCleanup(get_reader.hooks.clear)
+
+    def record(self, info):
+        self.events.append(info)
+
+    def test_unregistered(self):
+        self.assertFalse(get_reader.hooks)
+        reader = get_reader([['A'], ['x']])
+        self.assertEqual(list(reader), [['A'], ['x']])
+
+    def test_unknown_event(self):
+        with self.assertRaises(ValueError):
+            get_reader.hooks.register('on_something', self.record)
+
+    def test_events(self):
+        for event in get_reader.hooks.events:
+            get_reader.hooks.register(event, self.record)
+        get_reader.hooks.batch_size = 2
+
+        records = [{'A': 'x'}, {'A': 'y'}, {'A': 'z'}]
+        reader = get_reader(records)
+        self.assertEqual(list(reader), [['A'], ['x'], ['y'], ['z']])
+
+        names = [info['event'] for info in self.events]
+        expected = ['on_dispatch', 'on_open', 'on_first_row',
+                    'on_batch', 'on_batch', 'on_close']
+        self.assertEqual(names, expected)
+        self.assertEqual(self.events[0]['constructor'], 'from_dicts')
+        self.assertEqual([x['rows'] for x in self.events[3:]], [2, 2, 4])
+        self.assertIsNotNone(self.events[0]['call'])
+        self.assertTrue(all(x['call'] == self.events[0]['call'] for x in self.events))
+
+        first_call = self.events[0]['call']
+        del self.events[:]
+        list(get_reader(records))  # <- Next call gets a new number.
+        self.assertTrue(all(x['call'] == first_call + 1 for x in self.events))
+
+    def test_unregister(self):
+        get_reader.hooks.register('on_open', self.record)
+        get_reader.hooks.unregister('on_open', self.record)
+        self.assertFalse(get_reader.hooks)
+        get_reader.from_dicts([{'A': 'x'}])
+        self.assertEqual(self.events, [])
+
+    def test_error(self):
+        get_reader.hooks.register('on_error', self.record)
+        with self.assertRaises(Exception):
+            get_reader.from_csv('missing_file.csv')
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(self.events[0]['constructor'], 'from_csv')
+        self.assertEqual(self.events[0]['source'], 'missing_file.csv')
+
+    def test_profiler(self):
+        profiler = get_reader.hooks.add_profiler(every=2)
+        for _ in range(3):
+            list(get_reader.from_dicts([{'A': 'x'}]))
+        get_reader.hooks.remove_profiler(profiler)
+        self.assertFalse(get_reader.hooks)
+        self.assertEqual(len(profiler.results), 2)
+        self.assertIn('stats', profiler.results[0])
+
+    @unittest.skipIf(PY2, 'tracemalloc requires Python 3.4 or newer')
+    def test_memory_profiler(self):
+        profiler = get_reader.hooks.add_profiler(memory=True)
+        list(get_reader.from_dicts([{'A': 'x'}]))
+        self.assertEqual(len(profiler.results), 1)
+        self.assertGreaterEqual(profiler.results[0]['peak_memory'], 0)
+
+
+class TestProgress(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(lambda: os.remove(self.path))
+        with io.open(fd, 'wb') as fh:
+            fh.write(b'col1,col2\r\n')
+            for i in range(5000):
+                fh.write(b'1,a\r\n')
+        self.size = os.path.getsize(self.path)
+
+    def test_unknown_size(self):
+        reader = get_reader([['A'], ['x']])
+        self.assertIsNone(reader.progress)
+
+    def test_csv_path(self):
+        reader = get_reader(self.path, checkpoint=True)
+        progress = reader.progress
+        self.assertEqual(progress['bytes'], 0)
+        self.assertEqual(progress['total_bytes'], self.size)
+        self.assertEqual(progress['fraction'], 0.0)
+        self.assertIsNone(progress['eta_seconds'])
+
+        next(reader)
+        progress = reader.progress
+        self.assertGreater(progress['bytes'], 0)
+        self.assertEqual(progress['rows'], 1)
+
+        list(reader)
+        progress = reader.progress
+        self.assertEqual(progress['bytes'], self.size)
+        self.assertEqual(progress['rows'], 5001)
+        self.assertEqual(progress['fraction'], 1.0)
+        self.assertEqual(progress['eta_seconds'], 0.0)
+
+    def test_csv_path_uncounted(self):
+        reader = get_reader(self.path)
+        list(reader)
+        progress = reader.progress
+        self.assertEqual(progress['bytes'], self.size)
+        self.assertIsNone(progress['rows'], msg='rows are counted only on request')
+        self.assertEqual(progress['fraction'], 1.0)
+
+    def test_callback(self):
+        reports = []
+        reader = get_reader(self.path, on_progress=reports.append)
+        list(reader)
+        self.assertEqual(len(reports), 1, msg='throttled to final report')
+        self.assertEqual(reports[-1]['rows'], 5001)
+        self.assertEqual(reports[-1]['fraction'], 1.0)
+
+        reports = []
+        reader = get_reader(self.path, on_progress=reports.append,
+                            progress_interval=0)
+        list(reader)
+        self.assertEqual(len(reports), 5002)
+
+    @unittest.skipIf(not dbfread, 'dbfread not found')
+    def test_dbf(self):
+        path = os.path.join(os.path.dirname(__file__), 'sample_dbase.dbf')
+        reader = get_reader.from_dbf(path)
+        self.assertIsNone(reader._counter, msg='rows are counted only on request')
+        list(reader)
+        self.assertIsNone(reader.progress['rows'])
+        with self.assertRaises(ValueError):
+            reader.checkpoint()
+
+        reports = []
+        reader = get_reader.from_dbf(path, on_progress=reports.append)
+        list(reader)
+        self.assertIsNone(reader._counter, msg='progress keeps its own count')
+        self.assertEqual(reports[-1]['rows'], 2)
+        self.assertEqual(reports[-1]['fraction'], 1.0)
+        self.assertEqual(reader.progress['rows'], 2)
+
+    def test_callback_iterable(self):
+        reports = []
+        csvfile = ['col1\r\n', 'a\r\n', 'b\r\n']
+        list(get_reader.from_csv(csvfile, on_progress=reports.append))
+        self.assertEqual(reports[-1]['rows'], 3)
+        self.assertIsNone(reports[-1]['fraction'])
+
+
+class TestConstructorRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = _ConstructorRegistry()
+        self.registry._entry_points_loaded = True  # Skip installed plugins.
+
+    def test_extensions(self):
+        self.registry.register_extension('.csv', 'from_csv')
+        self.registry.register_extension('.CSV.GZ', 'from_csv_gz')
+        for_path = self.registry.for_path
+        self.assertEqual(for_path('data.csv'), 'from_csv')
+        self.assertEqual(for_path('Data.CSV'), 'from_csv')
+        self.assertEqual(for_path('data.csv.gz'), 'from_csv_gz')
+        self.assertEqual(for_path('my.data.v2.csv.gz'), 'from_csv_gz')
+        self.assertEqual(for_path(os.path.join('a.csv', 'data')), None)
+        self.assertIsNone(for_path('data.gz'))
+        self.assertIsNone(for_path('csv'))
+
+        self.registry.unregister_extension('.csv.gz')
+        self.assertIsNone(for_path('data.csv.gz'))
+
+        with self.assertRaises(ValueError):
+            self.registry.register_extension('csv', 'from_csv')
+
+    def test_types(self):
+        class Base(object):
+            pass
+
+        class Child(Base):
+            pass
+
+        self.registry.register_type(Base, 'from_base')
+        self.assertEqual(self.registry.for_type(Child), 'from_base')
+        self.assertIn(Child, self.registry._type_cache)
+        self.assertIsNone(self.registry.for_type(int))
+
+        self.registry.register_type(Child, 'from_child')
+        self.assertEqual(self.registry.for_type(Child), 'from_child')
+
+        self.registry.unregister_type(Child)
+        self.assertEqual(self.registry.for_type(Child), 'from_base')
+
+    def test_lazy_types(self):
+        module = types.ModuleType('fake_table_module')
+
+        class FakeTable(object):
+            pass
+
+        module.FakeTable = FakeTable
+        self.registry.register_type('fake_table_module.FakeTable', 'from_fake')
+        self.assertIsNone(self.registry.for_type(FakeTable))
+
+        sys.modules['fake_table_module'] = module
+        self.addCleanup(lambda: sys.modules.pop('fake_table_module'))
+        self.assertEqual(self.registry.for_type(FakeTable), 'from_fake')
+
+        with self.assertRaises(ValueError):
+            self.registry.register_type('FakeTable', 'from_fake')
+
+    def test_entry_points(self):
+        loaded = []
+
+        class FakeEntryPoint(object):
+            name = '.fake'
+
+            def load(self):
+                loaded.append(True)
+                return lambda obj: [['A'], [obj]]
+
+        import get_reader as module
+        orig_iter_entry_points = module._iter_entry_points
+
+        def restore():
+            module._iter_entry_points = orig_iter_entry_points
+        self.addCleanup(restore)
+
+        module._iter_entry_points = lambda group: (
+            [FakeEntryPoint()] if group == 'get_reader.extensions' else [])
+
+        self.registry._entry_points_loaded = False
+        self.assertTrue(self.registry.load_entry_points())
+        self.assertFalse(self.registry.load_entry_points(), msg='only once')
+        self.assertEqual(loaded, [], msg='plugin should not be imported yet')
+
+        constructor = self.registry.for_path('data.fake')
+        self.assertEqual(constructor('x'), [['A'], ['x']])
+        self.assertEqual(loaded, [True])
+
+
+class TestRegistryDispatch(unittest.TestCase):
+    def test_compressed_csv(self):
+        fd, path = tempfile.mkstemp(suffix='.csv.gz')
+        os.close(fd)
+        self.addCleanup(lambda: os.remove(path))
+        fh = gzip.GzipFile(path, 'wb')
+        try:
+            fh.write(b'col1,col2\r\n1,a\r\n2,b\r\n')
+        finally:
+            fh.close()
+
+        reader = get_reader(path)
+        self.assertEqual(list(reader), [['col1', 'col2'], ['1', 'a'], ['2', 'b']])
+        self.assertEqual(reader.progress['bytes'], os.path.getsize(path))
+
+    def test_plugin_extension(self):
+        def read_fake(path, suffix=''):
+            return [['path'], [path + suffix]]
+
+        get_reader.registry.register_extension('.fake', read_fake)
+        self.addCleanup(lambda: get_reader.registry.unregister_extension('.fake'))
+
+        reader = get_reader('data.fake', suffix='!')
+        self.assertIsInstance(reader, Reader)
+        self.assertEqual(list(reader), [['path'], ['data.fake!']])
+
+    def test_plugin_type(self):
+        class FakeTable(object):
+            pass
+
+        get_reader.registry.register_type(FakeTable, lambda obj: [['A'], ['x']])
+        self.addCleanup(lambda: get_reader.registry.unregister_type(FakeTable))
+        self.assertEqual(list(get_reader(FakeTable())), [['A'], ['x']])
+
+    def test_entry_points_not_read_for_builtins(self):
+        registry = _ConstructorRegistry()
+        get_reader.registry = registry  # <- Instance attribute, hides class attribute.
+        self.addCleanup(lambda: delattr(get_reader, 'registry'))
+
+        list(get_reader([['A'], ['x']]))
+        list(get_reader([{'A': 'x'}]))
+        self.assertFalse(registry._entry_points_loaded)
+
+        class FakeTable(object):
+            pass
+
+        with self.assertRaises(TypeError):
+            get_reader(FakeTable())
+        self.assertTrue(registry._entry_points_loaded)
+
+    @unittest.skipIf(not sqlite3, 'sqlite3 not found')
+    def test_duck_typed_cache(self):
+        connection = sqlite3.connect(':memory:')
+        connection.execute('CREATE TABLE mytable (foo TEXT)')
+        list(get_reader(connection, 'mytable'))
+        self.assertEqual(get_reader.registry._type_cache[type(connection)], 'from_sql')
+
+
+class TestAutoDetect(unittest.TestCase):
+    def write_file(self, data):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(lambda: os.remove(path))
+        with io.open(fd, 'wb') as fh:
+            fh.write(data)
+        return path
+
+    def test_sniff_encoding(self):
+        self.assertEqual(_sniff_encoding(b'\xef\xbb\xbfa,b'), 'utf_8_sig')
+        self.assertEqual(_sniff_encoding(b'\xff\xfea\x00'), 'utf-16')
+        self.assertEqual(_sniff_encoding(b'\xff\xfe\x00\x00a\x00\x00\x00'), 'utf-32')
+        self.assertEqual(_sniff_encoding(b'caf\xc3\xa9'), 'utf_8_sig')
+        self.assertEqual(_sniff_encoding(b'caf\xc3'), 'utf_8_sig', msg='truncated sample')
+        self.assertEqual(_sniff_encoding(b'caf\xe9,1'), 'cp1252')
+        self.assertEqual(_sniff_encoding(b'\x81\xe9'), 'latin-1')
+
+    def test_delimiter_and_encoding(self):
+        data = u'col1;col2\r\ncaf\xe9;1\r\nna\xefve;2\r\n'.encode('cp1252')
+        path = self.write_file(data)
+        reader = get_reader.from_csv(path, encoding='auto', dialect='auto')
+        expected = [['col1', 'col2'], [u'caf\xe9', '1'], [u'na\xefve', '2']]
+        self.assertEqual(list(reader), expected)
+
+    def test_utf16_tabs(self):
+        data = u'col1\tcol2\r\n\u03b1\t1\r\n\u03b2\t2\r\n'.encode('utf-16')
+        path = self.write_file(data)
+        reader = get_reader(path, encoding='auto', dialect='auto')
+        expected = [['col1', 'col2'], [u'\u03b1', '1'], [u'\u03b2', '2']]
+        self.assertEqual(list(reader), expected)
+
+    def test_cached(self):
+        path = self.write_file(b'col1|col2\r\na|1\r\nb|2\r\n')
+        list(get_reader(path, encoding='auto', dialect='auto'))
+        keys = [key for key in _sniff_cache if key[0] == os.path.abspath(path)]
+        self.assertEqual(len(keys), 1)
+        encoding, dialect = _sniff_cache[keys[0]]
+        self.assertEqual(dialect.delimiter, '|')
+
+        _sniff_cache[keys[0]] = (encoding, 'excel')  # <- Cached value is used.
+        reader = get_reader(path, encoding='auto', dialect='auto')
+        self.assertEqual(next(reader), ['col1|col2'])
+        reader.close()
+
+    def test_requires_path(self):
+        with self.assertRaises(ValueError):
+            get_reader.from_csv(['a,b\r\n'], dialect='auto')
+
+
+class TestSimpleEngine(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(lambda: os.remove(self.path))
+        with io.open(fd, 'wb') as fh:
+            fh.write(b'col1,col2\r\n1,a\r\n2,"b\r\nb"\r\n3,c\r\n4,d\r\n')
+
+    def test_same_rows(self):
+        expected = list(get_reader.from_csv(self.path))
+        reader = get_reader.from_csv(self.path, engine='simple')
+        self.assertEqual(list(reader), expected)
+
+    def test_dialect(self):
+        with io.open(self.path, 'wb') as fh:
+            fh.write(b'col1\tcol2\n1\ta\n2\tb\n')
+        reader = get_reader.from_csv(self.path, engine='simple', dialect='excel-tab')
+        self.assertEqual(list(reader), [['col1', 'col2'], ['1', 'a'], ['2', 'b']])
+
+    def test_checkpoint(self):
+        reader = get_reader.from_csv(self.path, engine='simple', checkpoint=True)
+        list(islice(reader, 3))
+        token = reader.checkpoint()
+        reader.close()
+        self.assertEqual(token['rows'], 3)
+        self.assertNotIn('offset', token)
+
+        reader = get_reader.from_csv(self.path, engine='simple', resume_from=token)
+        self.assertEqual(list(reader), [['col1', 'col2'], ['3', 'c'], ['4', 'd']])
+
+    @unittest.skipIf(PY2, 'checkpoints use row counts on Python 2')
+    def test_resume_from_offset(self):
+        reader = get_reader.from_csv(self.path, checkpoint=True)
+        list(islice(reader, 3))
+        token = reader.checkpoint()
+        reader.close()
+
+        reader = get_reader.from_csv(self.path, engine='simple', resume_from=token)
+        self.assertEqual(list(reader), [['col1', 'col2'], ['3', 'c'], ['4', 'd']])
+
+    def test_bad_engine(self):
+        with self.assertRaises(ValueError):
+            get_reader.from_csv(self.path, engine='fast')
+
+    def test_requires_path(self):
+        with self.assertRaises(ValueError):
+            get_reader.from_csv(['a,b\r\n'], engine='simple')
+
+
+class TestBufferInput(unittest.TestCase):
+    data = b'\xef\xbb\xbfcol1,col2\r\n1,caf\xc3\xa9\r\n2,"x\r\ny"\r\n'
+    expected = [['col1', 'col2'], ['1', u'caf\xe9'], ['2', 'x\r\ny']]
+
+    @unittest.skipIf(PY2, 'byte strings are file paths on Python 2')
+    def test_bytes(self):
+        self.assertEqual(list(get_reader.from_csv(self.data)), self.expected)
+        self.assertEqual(list(get_reader(self.data)), self.expected)
+
+    def test_bytearray(self):
+        data = bytearray(self.data)
+        self.assertEqual(list(get_reader.from_csv(data)), self.expected)
+        self.assertEqual(list(get_reader(data)), self.expected)
+
+    def test_memoryview(self):
+        data = memoryview(bytearray(self.data))
+        self.assertEqual(list(get_reader.from_csv(data)), self.expected)
+        self.assertEqual(list(get_reader(data)), self.expected)
+
+    def test_encoding(self):
+        data = bytearray(u'col1,col2\r\n1,\u03b1\r\n'.encode('utf-16'))
+        reader = get_reader.from_csv(data, encoding='utf-16')
+        self.assertEqual(list(reader), [['col1', 'col2'], ['1', u'\u03b1']])
+
+    def test_engine_and_decode(self):
+        data = bytearray(b'col1,col2\n1,a\n2,b\n')
+        reader = get_reader.from_csv(data, engine='simple', decode=False)
+        self.assertEqual(list(reader), [[b'col1', b'col2'], [b'1', b'a'], [b'2', b'b']])
+
+    def test_progress(self):
+        data = bytearray(self.data)
+        reader = get_reader.from_csv(data)
+        self.assertEqual(reader.progress['total_bytes'], len(data))
+        list(reader)
+        self.assertEqual(reader.progress['bytes'], len(data))
+
+    def test_requires_path_for_auto(self):
+        with self.assertRaises(ValueError):
+            get_reader.from_csv(bytearray(self.data), dialect='auto')
+
+
+class TestDecodeFalse(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(lambda: os.remove(self.path))
+        with io.open(fd, 'wb') as fh:
+            fh.write(b'\xef\xbb\xbfname,city\r\n'
+                     b'caf\xc3\xa9,Paris\r\n'
+                     b'"x\r\ny",Oslo\r\n'
+                     b'z,Rome\r\n')
+        self.expected = [
+            [b'name', b'city'],
+            [b'caf\xc3\xa9', b'Paris'],
+            [b'x\r\ny', b'Oslo'],
+            [b'z', b'Rome'],
+        ]
+
+    def test_csv_engine(self):
+        reader = get_reader.from_csv(self.path, decode=False)
+        self.assertEqual(list(reader), self.expected)
+
+    def test_simple_engine(self):
+        reader = get_reader.from_csv(self.path, decode=False, engine='simple')
+        self.assertEqual(list(reader), self.expected)
+
+    def test_csv_engine_unquoted(self):
+        with io.open(self.path, 'wb') as fh:
+            fh.write(b'name,city\r\ncaf\xc3\xa9,Paris\r\n\r\nz,Rome')
+        reader = get_reader.from_csv(self.path, decode=False)
+        expected = [[b'name', b'city'], [b'caf\xc3\xa9', b'Paris'], [], [b'z', b'Rome']]
+        self.assertEqual(list(reader), expected)
+
+    def test_iterable(self):
+        with io.open(self.path, 'rb') as fh:
+            lines = fh.read()[3:].splitlines(True)  # Remove BOM.
+        reader = get_reader.from_csv(lines, decode=False)
+        self.assertEqual(list(reader), self.expected)
+
+    def test_checkpoint(self):
+        reader = get_reader.from_csv(self.path, decode=False, checkpoint=True)
+        list(islice(reader, 2))
+        token = reader.checkpoint()
+        reader.close()
+
+        reader = get_reader.from_csv(self.path, decode=False, resume_from=token)
+        self.assertEqual(list(reader), [self.expected[0]] + self.expected[2:])
+
+    def test_decode_columns(self):
+        reader = get_reader.from_csv(self.path, decode=False)
+        reader = reader.decode_columns(['name'])
+        expected = [
+            ['name', 'city'],
+            [u'caf\xe9', b'Paris'],
+            [u'x\r\ny', b'Oslo'],
+            [u'z', b'Rome'],
+        ]
+        self.assertEqual(list(reader), expected)
+
+
+class TestPeekSchema(unittest.TestCase):
+    def setUp(self):
+        self._orig_dir = os.getcwd()
+        os.chdir(os.path.dirname(__file__) or '.')
+
+        def restore_dir():
+            os.chdir(self._orig_dir)
+        self.addCleanup(restore_dir)
+
+    def test_csv(self):
+        schema = get_reader.peek_schema('sample_text_utf8.csv', encoding='utf-8')
+        self.assertEqual(schema, [('col1', None), ('col2', None)])
+
+    def test_get_reader_arguments(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(lambda: shutil.rmtree(cache_dir))
+        schema = get_reader.peek_schema('sample_text_utf8.csv', cache_dir=cache_dir,
+                                        cache_size=1000, row_type='named')
+        self.assertEqual(schema, [('col1', None), ('col2', None)])
+        self.assertEqual(os.listdir(cache_dir), [], msg='should not write a sidecar')
+
+    def test_xlsx_streaming(self):
+        """Should not require xlrd for XLSX files."""
+        schema = get_reader.peek_schema('sample_multiworksheet.xlsx')
+        self.assertEqual(schema, [('col1', 'number'), ('col2', 'text')])
+
+        schema = get_reader.peek_schema('sample_multiworksheet.xlsx', 'Sheet2')
+        self.assertEqual(schema, [('col1', 'number'), ('col2', 'text')])
+
+        schema = get_reader.peek_schema('sample_excel2007.xlsx')
+        self.assertEqual([x[0] for x in schema], ['col1', 'col2'])
+
+    @unittest.skipIf(not xlrd, 'xlrd not found')
+    def test_xls(self):
+        schema = get_reader.peek_schema('sample_excel1997.xls')
+        self.assertEqual([x[0] for x in schema], ['col1', 'col2'])
+
+    @unittest.skipIf(not dbfread, 'dbfread not found')
+    def test_dbf(self):
+        schema = get_reader.peek_schema('sample_dbase.dbf')
+        self.assertEqual([x[0] for x in schema], ['COL1', 'COL2'])
+        self.assertTrue(all(x[1] for x in schema))
+
+    @unittest.skipIf(not sqlite3, 'sqlite3 not found')
+    def test_sql(self):
+        connection = sqlite3.connect(':memory:')
+        connection.executescript("""
+            CREATE TABLE mytable (foo TEXT, bar INTEGER);
+            INSERT INTO mytable VALUES ('a', 1);
+        """)
+        expected = [('foo', None), ('bar', None)]
+        self.assertEqual(get_reader.peek_schema(connection, 'mytable'), expected)
+
+        query = 'SELECT bar, foo FROM mytable WHERE bar > ?;'
+        schema = get_reader.peek_schema(connection, query, parameters=(0,))
+        self.assertEqual(schema, [('bar', None), ('foo', None)])
+
+    @unittest.skipIf(not pandas, 'pandas not found')
+    def test_pandas(self):
+        df = pandas.DataFrame({'A': [1, 2], 'B': [0.5, 1.5]})
+        schema = get_reader.peek_schema(df)
+        self.assertEqual(schema, [(None, 'int64'), ('A', 'int64'), ('B', 'float64')])
+
+        schema = get_reader.peek_schema(df, index=False)
+        self.assertEqual(schema, [('A', 'int64'), ('B', 'float64')])
+
+    def test_dicts_and_lists(self):
+        schema = get_reader.peek_schema([{'A': 1, 'B': 2}])
+        self.assertEqual(sorted(schema), [('A', None), ('B', None)])
+
+        schema = get_reader.peek_schema([['A', 'B'], [1, 2]])
+        self.assertEqual(schema, [('A', None), ('B', None)])
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+import gzip
+import io
+import os
+import shutil
+import tempfile
+from .common import (
+    unittest,
+    sqlite3,
+    unicode_alpha,
+)
+
+from get_reader import Reader
+from get_reader import _create_table_statement
+from get_reader import _insert_statement
+from get_reader import _quote_identifier
+from get_reader import _quote_table_name
+from get_reader import get_reader
+from get_reader import get_writer
+
+
+class TestSqlStatements(unittest.TestCase):
+    def test_quote_identifier(self):
+        self.assertEqual(_quote_identifier('col1'), 'col1')
+        self.assertEqual(_quote_identifier('col 1'), '"col 1"')
+        self.assertEqual(_quote_identifier('a"b'), '"a""b"')
+
+    def test_quote_table_name(self):
+        self.assertEqual(_quote_table_name('mytable'), 'mytable')
+        self.assertEqual(_quote_table_name('my table'), '"my table"')
+        self.assertEqual(_quote_table_name('main.my table'), 'main."my table"')
+        self.assertEqual(_quote_table_name('"my.table"'), '"my.table"')
+
+    def test_create_table(self):
+        header = ['A', 'B', 'C', 'D']
+        rows = [[1, 1.5, 'x', None], [2, 2, 'y', None]]
+        statement = _create_table_statement('mytable', header, rows)
+        expected = 'CREATE TABLE mytable (A INTEGER, B REAL, C TEXT, D TEXT)'
+        self.assertEqual(statement, expected)
+
+    def test_insert(self):
+        statement, container = _insert_statement('qmark', 'mytable', ['A', 'B'])
+        self.assertEqual(statement, 'INSERT INTO mytable (A, B) VALUES (?, ?)')
+        self.assertIs(container, tuple)
+
+        statement, container = _insert_statement('named', 'mytable', ['A', 'B'])
+        self.assertEqual(statement, 'INSERT INTO mytable (A, B) VALUES (:p1, :p2)')
+        self.assertIs(container, dict)
+
+
+@unittest.skipIf(not sqlite3, 'sqlite3 not found')
+class TestToSql(unittest.TestCase):
+    def setUp(self):
+        self.connection = sqlite3.connect(':memory:')
+
+    def fetch_all(self, table):
+        cursor = self.connection.cursor()
+        cursor.execute('SELECT * FROM {0}'.format(table))
+        return cursor.fetchall()
+
+    def test_create_and_insert(self):
+        records = [['A', 'B'], [1, 'x'], [2, 'y'], [3, 'z']]
+        result = get_writer.to_sql(self.connection, 'mytable', records,
+                                   batch_size=2, create=True)
+        self.assertEqual(result['rows'], 3)
+        self.assertEqual(self.fetch_all('mytable'), [(1, 'x'), (2, 'y'), (3, 'z')])
+
+    def test_table_name_needs_quotes(self):
+        records = [['A', 'B'], [1, 'x'], [2, 'y']]
+        result = get_writer.to_sql(self.connection, 'my table', records, create=True)
+        self.assertEqual(result['rows'], 2)
+        self.assertEqual(self.fetch_all('"my table"'), [(1, 'x'), (2, 'y')])
+
+    def test_existing_table(self):
+        self.connection.execute('CREATE TABLE mytable (A INTEGER, B TEXT)')
+        reader = Reader([['B', 'A'], ['x', 1], ['y', 2]])
+        result = get_writer.to_sql(self.connection, 'mytable', reader)
+        self.assertEqual(result['rows'], 2)
+        self.assertEqual(self.fetch_all('mytable'), [(1, 'x'), (2, 'y')])
+
+    def test_empty_reader(self):
+        result = get_writer.to_sql(self.connection, 'mytable', Reader([]))
+        self.assertEqual(result['rows'], 0)
+
+    def test_closes_reader(self):
+        log = {'is_closed': False}
+
+        def closefunc():
+            log['is_closed'] = True
+
+        reader = Reader([['A'], [1]], closefunc)
+        get_writer.to_sql(self.connection, 'mytable', reader, create=True)
+        self.assertTrue(log['is_closed'])
+
+    def test_rollback_on_error(self):
+        self.connection.execute('CREATE TABLE mytable (A INTEGER NOT NULL)')
+        self.connection.commit()
+
+        records = [['A'], [1], [2], [None]]  # <- Last value violates NOT NULL.
+        with self.assertRaises(sqlite3.IntegrityError):
+            get_writer.to_sql(self.connection, 'mytable', records, batch_size=2)
+        self.assertEqual(self.fetch_all('mytable'), [(1,), (2,)],
+                         msg='first batch was committed, second rolled back')
+
+
+class TestToCsv(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(lambda: shutil.rmtree(self.tempdir))
+
+    def read_bytes(self, filename, opener=io.open):
+        with opener(os.path.join(self.tempdir, filename), 'rb') as fh:
+            return fh.read()
+
+    def test_basic(self):
+        path = os.path.join(self.tempdir, 'myfile.csv')
+        records = [['A', 'B'], ['1', 'x'], ['2', unicode_alpha]]
+        result = get_writer.to_csv(path, records)
+        self.assertEqual(result['rows'], 2)
+
+        expected = b'A,B\r\n1,x\r\n2,\xce\xb1\r\n'  # <- No BOM.
+        self.assertEqual(self.read_bytes('myfile.csv'), expected)
+
+        reader = get_reader(path)
+        self.assertEqual(list(reader), records)
+
+    def test_encoding_with_bom(self):
+        path = os.path.join(self.tempdir, 'myfile.csv')
+        get_writer.to_csv(path, [['A'], ['1']], encoding='utf-8-sig')
+        self.assertEqual(self.read_bytes('myfile.csv'), b'\xef\xbb\xbfA\r\n1\r\n')
+
+        path = os.path.join(self.tempdir, 'utf16.csv')
+        get_writer.to_csv(path, [['A'], ['1']], encoding='utf-16')
+        self.assertEqual(self.read_bytes('utf16.csv').decode('utf-16'), 'A\r\n1\r\n')
+
+    def test_fmtparams(self):
+        path = os.path.join(self.tempdir, 'myfile.tsv')
+        get_writer.to_csv(path, [['A', 'B'], ['1', 'x']], delimiter='\t',
+                          lineterminator='\n')
+        self.assertEqual(self.read_bytes('myfile.tsv'), b'A\tB\n1\tx\n')
+
+    def test_compression(self):
+        path = os.path.join(self.tempdir, 'myfile.csv.gz')
+        get_writer.to_csv(path, [['A', 'B'], ['1', 'x']])
+        self.assertEqual(self.read_bytes('myfile.csv.gz', gzip.open), b'A,B\r\n1,x\r\n')
+
+        path = os.path.join(self.tempdir, 'uncompressed.csv.gz')
+        get_writer.to_csv(path, [['A', 'B'], ['1', 'x']], compression=None)
+        self.assertEqual(self.read_bytes('uncompressed.csv.gz'), b'A,B\r\n1,x\r\n')
+
+    def test_many_batches(self):
+        path = os.path.join(self.tempdir, 'myfile.csv')
+        records = [['A']] + [[str(x)] for x in range(25000)]
+        result = get_writer.to_csv(path, records)
+        self.assertEqual(result['rows'], 25000)
+        self.assertEqual(list(get_reader(path)), records)
+
+    def test_path_source(self):
+        source = os.path.join(self.tempdir, 'source.csv')
+        with io.open(source, 'wb') as fh:
+            fh.write(b'A,B\r\n1,x\r\n')
+
+        path = os.path.join(self.tempdir, 'myfile.csv')
+        get_writer.to_csv(path, source)
+        self.assertEqual(self.read_bytes('myfile.csv'), b'A,B\r\n1,x\r\n')
@@ -1,10 +1,23 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import
 import csv
-from .common import unittest
+import pickle
+import threading
+from .common import (
+    unittest,
+    futures,
+    numpy,
+    pandas,
+)
 
 from get_reader import Reader
 from get_reader import ReaderLike
+from get_reader import SharedReader
+from get_reader import _ReplayBuffer
+from get_reader import _convert_rows
+from get_reader import _count_rows
+from get_reader import _field_names
+from get_reader import _infer_dtype
 
 
 class TestReader(unittest.TestCase):
@@ -154,3 +167,386 @@ class TestReaderLike(unittest.TestCase):
         non_iterable = 123
         msg = 'cannot be non-iterable'
         self.assertFalse(isinstance(non_iterable, ReaderLike), msg=msg)
+
+
+class TestReaderCheckpoint(unittest.TestCase):
+    def test_not_counted(self):
+        reader = Reader([['a', 'x'], ['b', 'y']])
+        next(reader)
+        with self.assertRaises(ValueError):
+            reader.checkpoint()
+
+    def test_row_count(self):
+        reader = Reader([['a', 'x'], ['b', 'y'], ['c', 'z']])
+        _count_rows(reader)
+        self.assertEqual(reader.checkpoint(), {'rows': 0})
+
+        next(reader)
+        next(reader)
+        self.assertEqual(reader.checkpoint(), {'rows': 2})
+
+    def test_checkpointfunc(self):
+        reader = Reader([['a', 'x'], ['b', 'y']])
+        _count_rows(reader)
+        reader._checkpointfunc = lambda: {'offset': 123}
+        next(reader)
+        self.assertEqual(reader.checkpoint(), {'rows': 1, 'offset': 123})
+
+    def test_inherit_position(self):
+        reader = Reader([['a', 'x'], ['b', 'y'], ['c', 'z']])
+        _count_rows(reader, rows=1)
+        next(reader)
+        reader = Reader(reader)
+        next(reader)
+        self.assertEqual(reader.checkpoint(), {'rows': 3})
+
+
+class TestReaderInstrument(unittest.TestCase):
+    def test_disabled(self):
+        reader = Reader([['a'], ['b']])
+        self.assertIsNone(reader.stats)
+
+    def test_stats(self):
+        reader = Reader([['A'], ['x'], ['y']]).instrument()
+        self.assertEqual(reader.stats['rows'], 0)
+        self.assertIsNone(reader.stats['first_row_seconds'])
+
+        self.assertEqual(list(reader), [['A'], ['x'], ['y']])
+        stats = reader.stats
+        self.assertEqual(stats['rows'], 3)
+        self.assertIsNone(stats['bytes'])
+        self.assertGreaterEqual(stats['source_seconds'], 0.0)
+        self.assertGreaterEqual(stats['consumer_seconds'], 0.0)
+        self.assertGreaterEqual(stats['first_row_seconds'], 0.0)
+        self.assertEqual(stats['elapsed_seconds'], reader.stats['elapsed_seconds'],
+                         msg='elapsed time should stop when exhausted')
+
+    def test_bytesfunc(self):
+        reader = Reader([['A'], ['x']])
+        reader._bytesfunc = lambda: 42
+        reader.instrument()
+        self.assertEqual(reader.stats['bytes'], 42)
+
+    def test_callback(self):
+        calls = []
+        reader = Reader([['A']] + [[x] for x in range(9)])
+        reader.instrument(callback=calls.append, every_rows=4)
+        list(reader)
+        self.assertEqual([x['rows'] for x in calls], [4, 8, 10])
+
+    def test_inherit_instrument(self):
+        reader = Reader([['A'], ['x']]).instrument()
+        reader = Reader(reader)
+        list(reader)
+        self.assertEqual(reader.stats['rows'], 2)
+
+
+class TestReaderReplay(unittest.TestCase):
+    def setUp(self):
+        self.log = {'close_count': 0}
+
+        def close():
+            self.log['close_count'] += 1
+
+        self.rows = [['A', 'B']] + [[x, str(x)] for x in range(25)]
+        self.reader = Reader(self.rows, close)
+
+    def test_replayable(self):
+        replayable = self.reader.replayable()
+        self.assertEqual(list(replayable), self.rows)
+        self.assertEqual(list(replayable), self.rows)
+        self.assertEqual(self.log['close_count'], 1, msg='source read once')
+
+    def test_replayable_readers(self):
+        replayable = self.reader.replayable()
+        self.assertIsInstance(iter(replayable), Reader)
+        self.assertTrue(isinstance(replayable, ReaderLike))
+
+    def test_interleaved(self):
+        replayable = _ReplayBuffer(self.reader, memory_limit=100, chunk_size=4)
+        reader1 = replayable.reader()
+        reader2 = replayable.reader()
+        self.assertEqual(next(reader1), ['A', 'B'])
+        self.assertEqual(list(reader2), self.rows)
+        self.assertEqual(list(reader1), self.rows[1:])
+
+    def test_spill_to_disk(self):
+        replayable = _ReplayBuffer(self.reader, memory_limit=8, chunk_size=4)
+        self.assertEqual(list(replayable), self.rows)
+        self.assertIsNotNone(replayable._spill, msg='should use temporary file')
+        self.assertEqual(list(replayable), self.rows)
+
+        replayable.close()
+        self.assertIsNone(replayable._spill)
+
+    def test_tee(self):
+        reader1, reader2 = self.reader.tee(2, memory_limit=5)
+        self.assertEqual(list(reader1), self.rows)
+        self.assertEqual(list(reader2), self.rows)
+        self.assertEqual(self.log['close_count'], 1)
+
+    def test_tee_close(self):
+        rows = [['A']] + [[x] for x in range(5000)]
+        reader = Reader(rows, self.reader._closefunc)
+        reader1, reader2, reader3 = reader.tee(3)
+        next(reader1)
+        reader1.close()
+        reader2.close()
+        self.assertEqual(self.log['close_count'], 0)
+
+        reader3.close()  # <- Closing last reader closes the source.
+        self.assertEqual(self.log['close_count'], 1)
+
+
+class TestRowTypes(unittest.TestCase):
+    def test_tuple_and_list(self):
+        rows = [['A', 'B'], ['x', 1]]
+        self.assertEqual(list(_convert_rows(iter(rows), tuple)), [('A', 'B'), ('x', 1)])
+
+        rows = [('A', 'B'), ('x', 1)]
+        self.assertEqual(list(_convert_rows(iter(rows), list)), [['A', 'B'], ['x', 1]])
+
+    def test_named(self):
+        rows = [['A', 'B'], ['x', 1], ['y', 2]]
+        header, row1, row2 = _convert_rows(iter(rows), 'named')
+        self.assertEqual(header, ('A', 'B'))
+
+        self.assertEqual((row1.A, row1.B), ('x', 1))
+        self.assertEqual((row2[0], row2[-1], row2[:1]), ('y', 2, ('y',)))
+        self.assertEqual(len(row1), 2)
+        self.assertEqual(list(row1), ['x', 1])
+        self.assertEqual(row1, ('x', 1))
+        self.assertNotEqual(row1, row2)
+        self.assertIs(type(row1), type(row2), msg='class should be made once')
+        self.assertFalse(hasattr(row1, '__dict__'), msg='should use __slots__')
+        self.assertTrue(isinstance([header, row1], ReaderLike))
+
+    def test_named_pickle(self):
+        rows = [['A', 'B'], ['x', 1]]
+        _, row = _convert_rows(iter(rows), 'named')
+        self.assertEqual(pickle.loads(pickle.dumps(row)), row)
+
+    def test_field_names(self):
+        header = ['col 1', 'class', '_private', 'A', 'A', 5]
+        self.assertEqual(_field_names(header), ('_0', '_1', '_2', 'A', '_4', '_5'))
+
+    def test_named_blank_line(self):
+        rows = [['A', 'B'], ['x', 1], [], ['y', 2]]  # <- csv gives [] for blank lines.
+        header, row1, row2 = _convert_rows(iter(rows), 'named')
+        self.assertEqual((row1.A, row2.A), ('x', 'y'))
+
+    def test_named_ragged_row(self):
+        rows = [['A', 'B'], ['x']]
+        with self.assertRaises(ValueError):
+            list(_convert_rows(iter(rows), 'named'))
+
+    def test_unknown_row_type(self):
+        with self.assertRaises(ValueError):
+            list(_convert_rows(iter([['A']]), 'unknown'))
+
+
+class TestReaderMaterialize(unittest.TestCase):
+    def test_materialize(self):
+        log = {'is_closed': False}
+
+        def closefunc():
+            log['is_closed'] = True
+
+        rows = [['A', 'B']] + [[x, float(x)] for x in range(10)]
+        materialized = Reader(rows, closefunc).materialize()
+        self.assertTrue(log['is_closed'])
+        self.assertEqual(list(materialized), rows)
+        self.assertEqual(list(materialized), rows)
+
+
+class TestInferDtype(unittest.TestCase):
+    def test_numeric_text(self):
+        self.assertEqual(_infer_dtype(['1', '2', '3']), 'int64')
+        self.assertEqual(_infer_dtype(['1', '2.5', '3']), 'float64')
+        self.assertEqual(_infer_dtype(['1', '', '3']), 'float64')
+        self.assertEqual(_infer_dtype(['1', 'x', '3']), 'object')
+
+    def test_objects(self):
+        self.assertEqual(_infer_dtype([1, 2, 3]), 'int64')
+        self.assertEqual(_infer_dtype([1, 2.5, None]), 'float64')
+        self.assertEqual(_infer_dtype([True, False]), 'bool')
+        self.assertEqual(_infer_dtype([None, '']), 'object')
+        self.assertEqual(_infer_dtype([]), 'object')
+
+
+@unittest.skipIf(not numpy, 'numpy not found')
+class TestReaderToNumpy(unittest.TestCase):
+    def setUp(self):
+        self.data = [
+            ['A', 'B', 'C'],
+            ['x', '1', '1.5'],
+            ['y', '2', ''],
+        ] + [['z', str(i), '0.5'] for i in range(3000)]
+
+    def test_inferred_dtypes(self):
+        array = Reader(self.data).to_numpy()
+        self.assertEqual(array.dtype.names, ('A', 'B', 'C'))
+        self.assertEqual(array['A'].dtype, numpy.dtype(object))
+        self.assertEqual(array['B'].dtype, numpy.dtype('int64'))
+        self.assertEqual(array['C'].dtype, numpy.dtype('float64'))
+        self.assertEqual(len(array), 3002)
+        self.assertEqual(array['B'][1], 2)
+        self.assertTrue(numpy.isnan(array['C'][1]))
+
+    def test_explicit_dtypes(self):
+        array = Reader(self.data).to_numpy(dtypes={'B': 'float64'})
+        self.assertEqual(array['B'].dtype, numpy.dtype('float64'))
+
+        array = Reader(self.data).to_numpy(dtypes=[object, object, object])
+        self.assertEqual(array['B'].dtype, numpy.dtype(object))
+
+    def test_unconvertible_values(self):
+        data = [['A'], ['1']] + [['x']]
+        array = Reader(data).to_numpy(sample_size=1)
+        self.assertEqual(array['A'].dtype, numpy.dtype(object))
+        self.assertEqual(list(array['A']), ['1', 'x'])
+
+    def test_empty(self):
+        array = Reader([]).to_numpy()
+        self.assertEqual(len(array), 0)
+
+
+@unittest.skipIf(not pandas, 'pandas not found')
+class TestReaderToDataFrame(unittest.TestCase):
+    def test_dataframe(self):
+        data = [['A', 'B'], ['x', '1'], ['y', '2']]
+        df = Reader(data).to_dataframe()
+        self.assertEqual(list(df.columns), ['A', 'B'])
+        self.assertEqual(list(df['A']), ['x', 'y'])
+        self.assertEqual(list(df['B']), [1, 2])
+
+    def test_duplicate_names(self):
+        data = [['a', 'a'], [1, 2], [3, 4]]
+        df = Reader(data).to_dataframe()
+        self.assertEqual(list(df.columns), ['a', 'a'])
+        self.assertEqual(list(df.iloc[:, 0]), [1, 3])
+        self.assertEqual(list(df.iloc[:, 1]), [2, 4])
+
+
+class TestSharedReader(unittest.TestCase):
+    def setUp(self):
+        self.log = {'close_count': 0}
+
+        def close():
+            self.log['close_count'] += 1
+
+        self.rows = [['A', 'B']] + [[x, str(x)] for x in range(2500)]
+        self.reader = Reader(self.rows, close)
+
+    def test_batches(self):
+        shared = self.reader.shared(batch_size=1000)
+        self.assertIsInstance(shared, SharedReader)
+        self.assertEqual(shared.header, ['A', 'B'])
+
+        batches = list(shared)
+        self.assertEqual([seq for seq, _ in batches], [0, 1, 2])
+        self.assertEqual([len(rows) for _, rows in batches], [1000, 1000, 500])
+        self.assertIsNone(shared.next_batch())
+        self.assertEqual(self.log['close_count'], 1)
+
+    def test_threads(self):
+        shared = SharedReader(self.reader, batch_size=7)
+        results = []
+
+        def worker():
+            for batch in shared:
+                results.append(batch)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        results.sort()
+        self.assertEqual([seq for seq, _ in results], list(range(len(results))))
+        rows = [row for _, batch in results for row in batch]
+        self.assertEqual(rows, self.rows[1:], msg='reordered by sequence number')
+        self.assertEqual(self.log['close_count'], 1)
+
+    def test_close(self):
+        shared = self.reader.shared()
+        shared.next_batch()
+        shared.close()
+        shared.close()
+        self.assertIsNone(shared.next_batch())
+        self.assertEqual(self.log['close_count'], 1)
+
+    def test_error(self):
+        def generate():
+            yield ['A']
+            yield ['x']
+            raise ValueError('bad row')
+
+        shared = SharedReader(Reader(generate(), self.reader._closefunc))
+        with self.assertRaises(ValueError):
+            shared.next_batch()
+        with self.assertRaises(ValueError):
+            shared.next_batch()  # <- Raised again, not treated as the end.
+
+        errors = []
+
+        def worker():
+            try:
+                list(shared)
+            except ValueError as err:
+                errors.append(err)
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        self.assertEqual(len(errors), 1, msg='other threads get the error too')
+        self.assertEqual(self.log['close_count'], 1)
+
+    def test_empty(self):
+        shared = SharedReader([])
+        self.assertIsNone(shared.header)
+        self.assertIsNone(shared.next_batch())
+
+
+@unittest.skipIf(not futures, 'concurrent.futures not found')
+class TestReaderParallelMap(unittest.TestCase):
+    def setUp(self):
+        self.log = {'close_count': 0}
+
+        def close():
+            self.log['close_count'] += 1
+
+        self.rows = [['A', 'B']] + [[x, str(x)] for x in range(250)]
+        self.reader = Reader(self.rows, close)
+
+    def test_ordered(self):
+        reader = self.reader.parallel_map(tuple, workers=2, chunksize=10)
+        self.assertIsInstance(reader, Reader)
+        expected = [['A', 'B']] + [tuple(row) for row in self.rows[1:]]
+        self.assertEqual(list(reader), expected, msg='header is unchanged')
+        self.assertEqual(self.log['close_count'], 1)
+
+    def test_unordered(self):
+        reader = self.reader.parallel_map(len, workers=2, chunksize=7, ordered=False)
+        self.assertEqual(next(reader), ['A', 'B'])
+        self.assertEqual(list(reader), [2] * 250)
+        self.assertEqual(self.log['close_count'], 1)
+
+    def test_exception(self):
+        reader = self.reader.parallel_map(int, workers=2, chunksize=10)
+        next(reader)  # Header.
+        with self.assertRaises(TypeError):
+            list(reader)
+        self.assertEqual(self.log['close_count'], 1)
+
+    def test_close_early(self):
+        reader = self.reader.parallel_map(tuple, workers=2, chunksize=10)
+        next(reader)
+        next(reader)
+        reader.close()
+        self.assertEqual(self.log['close_count'], 1)
+
+    def test_close_unstarted(self):
+        reader = self.reader.parallel_map(tuple, workers=2)
+        reader.close()
+        self.assertEqual(self.log['close_count'], 1)